@@ -0,0 +1,257 @@
+import argparse
+import json
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use('Agg')
+
+from compressed_io import COMPRESSIONS
+from network_extractor import LAYOUTS, extract_path_from_hops, iter_traceroute_data, run_extraction
+
+
+TRACEROUTE_FILE_PATTERN = re.compile(
+    r'^measure-traceroute_ref-(?P<origin>[^_]+)_pop-(?P<destination>[^.]+)\.json(\.gz|\.xz|\.zst)?$'
+)
+
+# IPs conhecidos dos pontos de medição (último/primeiro salto dos traceroutes)
+KNOWN_POP_IPS = {
+    'rj': '200.159.254.238',
+    'es': '200.137.76.129',
+    'pi': '200.137.160.129',
+    'df': '200.19.119.67',
+}
+
+
+def discover_traceroute_files(root_dir):
+    """
+    Encontra todos os arquivos measure-traceroute_ref-*_pop-*.json
+    (inclusive comprimidos: .json.gz, .json.xz, .json.zst).
+    
+    Args:
+        root_dir: Diretório raiz (ex: dataset/Train/traceroute)
+    
+    Returns:
+        Lista ordenada de tuplas (origem, destino, caminho do arquivo)
+    """
+    found = []
+    for dirpath, _, filenames in os.walk(root_dir):
+        for filename in filenames:
+            match = TRACEROUTE_FILE_PATTERN.match(filename)
+            if match:
+                found.append((match.group('origin'), match.group('destination'),
+                              os.path.join(dirpath, filename)))
+    return sorted(found)
+
+
+def infer_endpoint_ips(filepath, sample_size=500):
+    """
+    Infere os IPs das pontas a partir das primeiras medições do arquivo:
+    o último salto mais frequente é a origem (ref) e o primeiro salto
+    mais frequente é o destino (pop).
+    
+    Args:
+        filepath: Arquivo de traceroute
+        sample_size: Número de medições lidas
+    
+    Returns:
+        Tupla (origin_ip, destination_ip); None quando não há medições
+    """
+    first_hops = Counter()
+    last_hops = Counter()
+    
+    for idx, entry in enumerate(iter_traceroute_data(filepath)):
+        if idx >= sample_size:
+            break
+        path = extract_path_from_hops(entry.get('val', []))
+        if path:
+            first_hops[path[0]] += 1
+            last_hops[path[-1]] += 1
+    
+    origin_ip = last_hops.most_common(1)[0][0] if last_hops else None
+    destination_ip = first_hops.most_common(1)[0][0] if first_hops else None
+    return origin_ip, destination_ip
+
+
+def build_manifest(root_dir, known_ips=None, manifest_path=None):
+    """
+    Monta o manifesto de pares a processar com os IPs de origem e destino.
+    IPs ausentes em known_ips são inferidos dos próprios dados.
+    Se manifest_path existir, seus IPs têm prioridade; o manifesto
+    resultante é salvo nele.
+    
+    Args:
+        root_dir: Diretório raiz dos traceroutes
+        known_ips: Dicionário {nome do ponto: IP}
+        manifest_path: Arquivo JSON do manifesto (opcional)
+    
+    Returns:
+        Lista de dicionários com origin, destination, filepath,
+        origin_ip e destination_ip
+    """
+    ips = dict(KNOWN_POP_IPS if known_ips is None else known_ips)
+    
+    overrides = {}
+    if manifest_path and os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            for item in json.load(f):
+                overrides[(item['origin'], item['destination'])] = item
+    
+    manifest = []
+    for origin, destination, filepath in discover_traceroute_files(root_dir):
+        previous = overrides.get((origin, destination), {})
+        origin_ip = previous.get('origin_ip') or ips.get(origin)
+        destination_ip = previous.get('destination_ip') or ips.get(destination)
+        
+        if origin_ip is None or destination_ip is None:
+            inferred_origin, inferred_destination = infer_endpoint_ips(filepath)
+            origin_ip = origin_ip or inferred_origin
+            destination_ip = destination_ip or inferred_destination
+        
+        manifest.append({
+            'origin': origin,
+            'destination': destination,
+            'filepath': filepath,
+            'origin_ip': origin_ip,
+            'destination_ip': destination_ip,
+        })
+    
+    if manifest_path:
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=4, ensure_ascii=False)
+    
+    return manifest
+
+
+def _run_pair(task, output_root, export_json, incremental, profile=None, render=None, compression=None):
+    """
+    Processa um par do manifesto (executado em um processo do pool).
+    
+    Returns:
+        Dicionário com o item do manifesto, tempo gasto e resultado ou erro
+    """
+    start = time.perf_counter()
+    try:
+        result = run_extraction(task['filepath'], task['origin'], task['origin_ip'],
+                                task['destination'], task['destination_ip'],
+                                output_root=output_root, export_json=export_json,
+                                incremental=incremental, verbose=False, profile=profile,
+                                render=render is not None, compression=compression, **(render or {}))
+        result.pop('files_created')
+        error = None
+    except Exception as e:
+        result = {}
+        error = f"{type(e).__name__}: {e}"
+    
+    return {**task, **result, 'elapsed_s': time.perf_counter() - start, 'error': error}
+
+
+def run_batch(manifest, output_root='analysis', workers=None, export_json=False, incremental=False,
+              profile=None, render=None, compression=None):
+    """
+    Executa run_extraction para todos os pares do manifesto em paralelo.
+    
+    Args:
+        manifest: Lista gerada por build_manifest
+        output_root: Diretório raiz das análises
+        workers: Número de processos (padrão: número de CPUs)
+        export_json: Se True, também exporta as medições completas em JSON
+        incremental: Se True, processa apenas medições novas de cada par
+        profile: None, 'cprofile' ou 'tracemalloc' (métricas de cada par)
+        render: None para não gerar imagens da topologia (padrão) ou
+                {'layout': ..., 'image_format': ...} para gerá-las
+        compression: None, 'gzip', 'xz' ou 'zstd' (medições e séries por caminho)
+    
+    Returns:
+        Lista de resultados por par, na ordem do manifesto
+    """
+    results = {}
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_run_pair, task, output_root, export_json, incremental, profile, render, compression): idx
+            for idx, task in enumerate(manifest)
+        }
+        
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            
+            pair = f"{result['origin']}-{result['destination']}"
+            if result['error']:
+                print(f"❌ {pair:10s} {result['elapsed_s']:8.2f}s  {result['error']}")
+            else:
+                print(f"✓ {pair:10s} {result['elapsed_s']:8.2f}s  "
+                      f"{result['valid_measurements']}/{result['total_measurements']} medições, "
+                      f"{result['num_paths']} caminhos")
+    
+    return [results[idx] for idx in range(len(manifest))]
+
+
+def print_summary(results, elapsed):
+    """
+    Imprime resumo da execução em lote.
+    """
+    failed = [r for r in results if r['error']]
+    cpu_time = sum(r['elapsed_s'] for r in results)
+    
+    print(f"\n{'='*80}")
+    print("✓ PROCESSAMENTO EM LOTE CONCLUÍDO")
+    print(f"{'='*80}")
+    print(f"Pares processados: {len(results) - len(failed)}/{len(results)}")
+    print(f"Tempo total: {elapsed:.2f}s (soma por par: {cpu_time:.2f}s)")
+    if elapsed > 0:
+        print(f"Aceleração: {cpu_time / elapsed:.2f}x")
+    print(f"{'='*80}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extração de todos os pares origem/destino do dataset.')
+    parser.add_argument('--root', default='dataset/Train/traceroute',
+                        help='Diretório com os arquivos measure-traceroute_ref-*_pop-*.json')
+    parser.add_argument('--output', default='analysis', help='Diretório raiz de saída')
+    parser.add_argument('--workers', type=int, default=None, help='Número de processos (padrão: CPUs)')
+    parser.add_argument('--manifest', default=None, help='Arquivo JSON do manifesto de pares/IPs')
+    parser.add_argument('--json', action='store_true',
+                        help='Também exporta as medições completas de cada caminho em JSON')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Processa apenas medições posteriores ao checkpoint de cada par')
+    parser.add_argument('--profile', choices=['cprofile', 'tracemalloc'], default=None,
+                        help='Perfila cada par (resumo em <par>/metrics/network_extractor.json)')
+    parser.add_argument('--render', action='store_true',
+                        help='Gera a imagem da topologia de cada par (desligado por padrão)')
+    parser.add_argument('--layout', choices=LAYOUTS, default='hops', help='Layout da imagem (com --render)')
+    parser.add_argument('--image-format', choices=['png', 'svg'], default='svg',
+                        help='Formato da imagem (com --render)')
+    parser.add_argument('--compress', choices=COMPRESSIONS, default=None,
+                        help='Comprime as medições (JSON Lines com IPs deduplicados) e séries por caminho')
+    args = parser.parse_args()
+    
+    render = {'layout': args.layout, 'image_format': args.image_format} if args.render else None
+    
+    print(f"📂 Procurando arquivos em: {args.root}")
+    manifest = build_manifest(args.root, manifest_path=args.manifest)
+    print(f"✓ Pares encontrados: {len(manifest)}")
+    
+    if not manifest:
+        return
+    
+    print(f"\n📊 Processando pares em paralelo...")
+    start = time.perf_counter()
+    results = run_batch(manifest, output_root=args.output, workers=args.workers,
+                        export_json=args.json, incremental=args.incremental, profile=args.profile,
+                        render=render, compression=args.compress)
+    print_summary(results, time.perf_counter() - start)
+    
+    timings_path = os.path.join(args.output, 'batch_timings.json')
+    os.makedirs(args.output, exist_ok=True)
+    with open(timings_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=4, ensure_ascii=False)
+    print(f"✓ Tempos por par salvos em: {timings_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from build_table import build_latency_matrix, load_latency_data_from_store
+from interpolation import align_series, load_store_timeseries
+from metrics import peak_rss, reset_peak_rss
+from network_extractor import PathStreamWriter, iter_traceroute_data, process_traceroute_data
+from path_stats import PathLatencyTracker
+from path_store import PathStoreWriter
+from synthetic_traceroute import generate_dataset
+from util import generate_route_labels
+
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+
+def _current_rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def _measure_child(func, conn):
+    # O filho herda o pico (VmHWM) do pai no fork: sem zerá-lo, alocações
+    # abaixo desse pico não apareceriam, então o pico não é informado
+    reset = reset_peak_rss()
+    baseline = _current_rss()
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+
+    peak_mb = max(peak_rss() - baseline, 0) / 2**20 if reset else None
+    conn.send({'seconds': seconds, 'peak_mb': peak_mb})
+    conn.close()
+
+
+def measure(func, memory=True):
+    """
+    Mede o tempo de uma execução de func e, com memory=True, o pico de
+    memória residente acima do ponto de partida. Para isolar o pico de
+    cada etapa, func roda num processo filho (fork) sem custo de
+    rastreamento, com o pico zerado via /proc/self/clear_refs; os arquivos
+    que ela grava ficam para as etapas seguintes.
+
+    Returns:
+        Dicionário com seconds e peak_mb (None sem memory ou quando o
+        kernel não permite zerar o pico)
+    """
+    if not memory:
+        start = time.perf_counter()
+        func()
+        return {'seconds': time.perf_counter() - start, 'peak_mb': None}
+
+    ctx = multiprocessing.get_context('fork')
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_measure_child, args=(func, child_conn))
+    process.start()
+    child_conn.close()
+    try:
+        result = parent_conn.recv()
+    except EOFError:
+        raise RuntimeError(f"A etapa falhou (código de saída {process.exitcode})") from None
+    finally:
+        process.join()
+    return result
+
+
+def benchmark_size(num_measurements, work_dir, memory=True, seed=0, **generator_options):
+    """
+    Gera um dataset sintético e mede cada etapa do pipeline, da extração
+    à geração de rótulos.
+
+    Returns:
+        Dicionário {etapa: {seconds, peak_mb}} com o tamanho do arquivo
+    """
+    dataset = generate_dataset(os.path.join(work_dir, 'dataset'), num_measurements, seed=seed, **generator_options)
+    filepath, origin_ip = dataset['filepath'], dataset['origin_ip']
+    out_dir = os.path.join(work_dir, 'out')
+    paths_dir = os.path.join(out_dir, 'paths')
+    store_dir = os.path.join(paths_dir, 'store')
+    latency_filepath = os.path.join(out_dir, 'routes_latency.csv')
+
+    def parse():
+        for _ in iter_traceroute_data(filepath):
+            pass
+
+    def process():
+        process_traceroute_data(iter_traceroute_data(filepath), origin_ip, latency_state=PathLatencyTracker())
+
+    def export():
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.makedirs(paths_dir)
+        with PathStreamWriter(paths_dir, export_json=True) as writer, PathStoreWriter(store_dir) as store:
+            def on_measurement(path_id, entry):
+                writer.write(path_id, entry)
+                store.write(path_id, entry)
+            process_traceroute_data(iter_traceroute_data(filepath), origin_ip, on_measurement=on_measurement)
+
+    def latency_matrix():
+        build_latency_matrix(load_latency_data_from_store(store_dir), os.path.join(out_dir, 'latency_matrix.csv'))
+
+    def interpolation():
+        align_series(load_store_timeseries(store_dir)).to_csv(latency_filepath, index=False)
+
+    def route_labels():
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            generate_route_labels(latency_filepath)
+
+    # Cada etapa inclui as anteriores que ela consome (parse ⊂ process ⊂ export)
+    stages = [
+        ('parse', parse),
+        ('process_traceroute_data', process),
+        ('export (JSON + TXT + NPY)', export),
+        ('build_latency_matrix', latency_matrix),
+        ('interpolation (align_series)', interpolation),
+        ('generate_route_labels', route_labels),
+    ]
+
+    results = {'measurements': num_measurements, 'file_mb': os.path.getsize(filepath) / 2**20, 'stages': {}}
+    for name, func in stages:
+        results['stages'][name] = measure(func, memory)
+    return results
+
+
+def print_results(results, baseline=None):
+    """
+    Imprime a tabela de resultados e, com baseline, a razão em relação a ela.
+    """
+    previous = {}
+    for entry in baseline or []:
+        for stage, values in entry['stages'].items():
+            previous[(entry['measurements'], stage)] = values
+
+    print(f"\n{'medições':>10} {'etapa':<30} {'tempo (s)':>10} {'pico (MB)':>10} {'vs base':>8}")
+    print("-" * 72)
+    for entry in results:
+        for stage, values in entry['stages'].items():
+            peak = f"{values['peak_mb']:.1f}" if values['peak_mb'] is not None else '-'
+            ratio = ''
+            old = previous.get((entry['measurements'], stage))
+            if old and old['seconds']:
+                ratio = f"{values['seconds'] / old['seconds']:.2f}x"
+            print(f"{entry['measurements']:>10} {stage:<30} {values['seconds']:>10.3f} {peak:>10} {ratio:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do pipeline extração → rótulos com dados sintéticos.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help='Números de medições (ex: 1000 10000 100000 10000000)')
+    parser.add_argument('--paths', type=int, default=3, help='Número de caminhos distintos')
+    parser.add_argument('--nodes', type=int, default=20, help='Número de IPs intermediários')
+    parser.add_argument('--noise', type=float, default=0.1, help='Ruído relativo dos atrasos')
+    parser.add_argument('--no-memory', action='store_true', help='Não mede o pico de memória (mais rápido)')
+    parser.add_argument('--output', default='benchmark_results.json', help='Arquivo JSON de resultados')
+    parser.add_argument('--baseline', default=None, help='Resultados anteriores para comparação')
+    parser.add_argument('--work-dir', default=None, help='Diretório de trabalho (padrão: temporário)')
+    args = parser.parse_args()
+
+    work_root = args.work_dir or tempfile.mkdtemp(prefix='benchmark-')
+    results = []
+    try:
+        for size in args.sizes:
+            print(f"⏱ {size} medições...")
+            results.append(benchmark_size(size, os.path.join(work_root, str(size)), memory=not args.no_memory,
+                                          num_paths=args.paths, num_nodes=args.nodes, noise=args.noise))
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print_results(results, baseline)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=4)
+    print(f"\n✓ Resultados salvos em: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,15 @@
 import json
 import os
-import csv
 from collections import defaultdict
 
+import numpy as np
+import pandas as pd
+
+from compressed_io import open_text, split_compression_suffix
+from dataset_cache import cached_series
+from metrics import RunMetrics
+from path_store import load_path_store, path_series
+
 
 def load_latency_data_from_txt(paths_dir):
     """
@@ -10,33 +17,29 @@ def load_latency_data_from_txt(paths_dir):
     
     Args:
         paths_dir: Diretório contendo os arquivos *_timeseries.txt
+                   (comprimidos ou não: .gz, .xz, .zst)
     
     Returns:
-        Dicionário {path_id: {timestamp: latency}}
+        Dicionário {path_id: (timestamps, latências)} com arrays NumPy
     """
     latency_by_path = {}
     
     # Lista todos os arquivos _timeseries.txt
     for filename in sorted(os.listdir(paths_dir)):
-        if not filename.endswith('_timeseries.txt'):
+        name, _ = split_compression_suffix(filename)
+        if not name.endswith('_timeseries.txt'):
             continue
         
         # Extrai o path_id do nome do arquivo (ex: 0_timeseries.txt -> 0)
-        path_id = int(filename.replace('_timeseries.txt', ''))
+        path_id = int(name.replace('_timeseries.txt', ''))
         
         filepath = os.path.join(paths_dir, filename)
-        latency_by_path[path_id] = {}
         
-        # Lê o arquivo
-        with open(filepath, 'r') as f:
-            next(f)  # Pula cabeçalho
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                timestamp, latency = line.split(',')
-                latency_by_path[path_id][int(timestamp)] = float(latency)
+        # Lê o arquivo inteiro de uma vez (pula cabeçalho)
+        with open_text(filepath) as f:
+            data = pd.read_csv(f, dtype={'timestamp': np.int64, 'latency_ms': np.float64},
+                               float_precision='round_trip')
+        latency_by_path[path_id] = (data['timestamp'].to_numpy(), data['latency_ms'].to_numpy())
     
     return latency_by_path
 
@@ -46,14 +49,15 @@ def load_latency_data_from_json(json_filepath):
     Carrega dados de latência de um arquivo JSON consolidado.
     
     Args:
-        json_filepath: Caminho para o arquivo latency.json
+        json_filepath: Caminho para o arquivo latency.json (comprimido ou não)
     
     Returns:
-        Dicionário {path_id: {timestamp: latency}}
+        Dicionário {path_id: (timestamps, latências)} com arrays NumPy
     """
-    latency_by_path = defaultdict(dict)
+    timestamps_by_path = defaultdict(list)
+    latencies_by_path = defaultdict(list)
     
-    with open(json_filepath, 'r') as f:
+    with open_text(json_filepath) as f:
         data = json.load(f)
     
     for entry in data:
@@ -63,50 +67,106 @@ def load_latency_data_from_json(json_filepath):
             rtt = lat_info['rtt']
             
             if rtt is not None:
-                latency_by_path[path_id][timestamp] = rtt
+                timestamps_by_path[path_id].append(timestamp)
+                latencies_by_path[path_id].append(rtt)
+    
+    return {
+        path_id: (np.array(timestamps_by_path[path_id], dtype=np.int64),
+                  np.array(latencies_by_path[path_id], dtype=np.float64))
+        for path_id in timestamps_by_path
+    }
+
+
+def load_latency_data_from_store(store_dir):
+    """
+    Carrega dados de latência do armazenamento colunar (paths/store),
+    mapeando os arrays do disco sem parsing de texto.
+    
+    Args:
+        store_dir: Diretório do armazenamento gerado pelo network_extractor
     
-    return dict(latency_by_path)
+    Returns:
+        Dicionário {path_id: (timestamps, latências)} com arrays NumPy
+    """
+    return path_series(load_path_store(store_dir))
 
 
-def build_latency_matrix(latency_by_path, output_filepath):
+def _as_arrays(path_data):
     """
-    Constrói matriz de latência com timestamps nas linhas e paths nas colunas.
+    Converte os dados de um caminho para (timestamps, latências) em arrays.
+    Aceita também o formato antigo {timestamp: latency}.
+    """
+    if isinstance(path_data, dict):
+        return (np.fromiter(path_data.keys(), dtype=np.int64, count=len(path_data)),
+                np.fromiter(path_data.values(), dtype=np.float64, count=len(path_data)))
+    timestamps, latencies = path_data
+    return np.asarray(timestamps, dtype=np.int64), np.asarray(latencies, dtype=np.float64)
+
+
+def align_latency_matrix(latency_by_path):
+    """
+    Alinha as séries de todos os caminhos em uma matriz timestamps × caminhos.
+    Faz uma única união ordenada dos timestamps e espalha as latências
+    de todos os caminhos em um array pré-alocado (NaN onde não há medição).
     
     Args:
-        latency_by_path: Dicionário {path_id: {timestamp: latency}}
-        output_filepath: Caminho do arquivo CSV de saída
+        latency_by_path: Dicionário {path_id: (timestamps, latências)}
+    
+    Returns:
+        Tupla (timestamps, path_ids, matriz) com arrays NumPy
     """
-    # Coleta todos os timestamps únicos
-    all_timestamps = set()
-    for path_data in latency_by_path.values():
-        all_timestamps.update(path_data.keys())
+    path_ids = np.array(sorted(latency_by_path.keys()), dtype=np.int64)
+    series = [_as_arrays(latency_by_path[path_id]) for path_id in path_ids]
     
-    # Ordena timestamps
-    sorted_timestamps = sorted(all_timestamps)
+    all_ts = np.concatenate([ts for ts, _ in series]) if series else np.empty(0, dtype=np.int64)
+    all_latencies = np.concatenate([lat for _, lat in series]) if series else np.empty(0)
+    columns = np.repeat(np.arange(len(series)), [len(ts) for ts, _ in series])
     
-    # Ordena path_ids
-    sorted_path_ids = sorted(latency_by_path.keys())
+    # União ordenada dos timestamps + posição de cada amostra na união
+    timestamps, rows = np.unique(all_ts, return_inverse=True)
     
-    # Escreve CSV
-    with open(output_filepath, 'w', newline='') as f:
-        writer = csv.writer(f)
-        
-        # Cabeçalho
-        header = ['timestamp'] + [f'path_{pid}' for pid in sorted_path_ids]
-        writer.writerow(header)
-        
-        # Dados
-        for ts in sorted_timestamps:
-            row = [ts]
-            
-            for path_id in sorted_path_ids:
-                # Pega latência ou NaN se não existir
-                latency = latency_by_path[path_id].get(ts, float('nan'))
-                row.append(latency)
-            
-            writer.writerow(row)
+    matrix = np.full((len(timestamps), len(path_ids)), np.nan)
+    matrix[rows, columns] = all_latencies
     
-    return len(sorted_timestamps), len(sorted_path_ids)
+    return timestamps, path_ids, matrix
+
+
+def write_latency_matrix(output_filepath, timestamps, path_ids, matrix):
+    """
+    Grava a matriz de latência de uma vez.
+    Arquivos .npz são gravados em formato binário NumPy; os demais, em CSV.
+    
+    Args:
+        output_filepath: Caminho do arquivo de saída (.csv ou .npz)
+        timestamps: Array de timestamps (linhas)
+        path_ids: Array de path_ids (colunas)
+        matrix: Matriz de latências
+    """
+    if output_filepath.endswith('.npz'):
+        np.savez(output_filepath, timestamps=timestamps, path_ids=path_ids, matrix=matrix)
+        return
+    
+    df = pd.DataFrame(matrix, columns=[f'path_{pid}' for pid in path_ids])
+    df.insert(0, 'timestamp', timestamps)
+    df.to_csv(output_filepath, index=False, na_rep='nan', lineterminator='\r\n')
+
+
+def build_latency_matrix(latency_by_path, output_filepath):
+    """
+    Constrói matriz de latência com timestamps nas linhas e paths nas colunas.
+    
+    Args:
+        latency_by_path: Dicionário {path_id: (timestamps, latências)}
+                         (ou {path_id: {timestamp: latency}})
+        output_filepath: Caminho do arquivo de saída (.csv ou .npz)
+    
+    Returns:
+        Tupla (número de timestamps, número de caminhos)
+    """
+    timestamps, path_ids, matrix = align_latency_matrix(latency_by_path)
+    write_latency_matrix(output_filepath, timestamps, path_ids, matrix)
+    
+    return len(timestamps), len(path_ids)
 
 
 def print_summary(output_filepath, num_timestamps, num_paths):
@@ -126,22 +186,34 @@ def main():
     origin = 'rj'
     destination = 'es'
     
-    # Opção 1: Carregar de arquivos TXT individuais
+    # Opção 1: Carregar do armazenamento colunar (quando existir)
+    store_dir = f'analysis/{origin}/{origin}-{destination}/paths/store'
+    
+    # Opção 2: Carregar de arquivos TXT individuais
     paths_dir = f'analysis/{origin}/{origin}-{destination}/paths/timeseries'
     
-    # Opção 2: Carregar de JSON consolidado (comentar a linha acima e descomentar as linhas abaixo)
+    # Opção 3: Carregar de JSON consolidado (comentar a linha acima e descomentar as linhas abaixo)
     # json_filepath = f'analysis/telemetry/{origin}/{origin}-{destination}/latency.json'
-    # latency_by_path = load_latency_data_from_json(json_filepath)
+    # latency_by_path = cached_series(load_latency_data_from_json, json_filepath)
+    
+    # Perfilamento opcional: None, 'cprofile' ou 'tracemalloc'
+    metrics = RunMetrics('build_table', profile=None)
     
     print(f"📂 Carregando dados de latência...")
     
-    # Carrega dados (usando TXT por padrão)
-    if os.path.exists(paths_dir):
-        latency_by_path = load_latency_data_from_txt(paths_dir)
-        print(f"✓ Dados carregados de arquivos TXT: {len(latency_by_path)} caminhos")
-    else:
-        print(f"❌ Diretório não encontrado: {paths_dir}")
-        return
+    # Carrega dados (armazenamento colunar ou TXT)
+    with metrics.stage('load') as stage:
+        if os.path.exists(store_dir):
+            latency_by_path = load_latency_data_from_store(store_dir)
+            print(f"✓ Dados carregados do armazenamento colunar: {len(latency_by_path)} caminhos")
+        elif os.path.exists(paths_dir):
+            # Arquivos TXT inalterados são lidos do cache (.cache)
+            latency_by_path = cached_series(load_latency_data_from_txt, paths_dir)
+            print(f"✓ Dados carregados de arquivos TXT: {len(latency_by_path)} caminhos")
+        else:
+            print(f"❌ Diretório não encontrado: {paths_dir}")
+            return
+        stage.count('measurements', sum(len(ts) for ts, _ in latency_by_path.values()))
     
     # Verifica se há dados
     if not latency_by_path:
@@ -152,10 +224,21 @@ def main():
     output_filepath = f'analysis/{origin}/{origin}-{destination}/latency_matrix.csv'
     
     print(f"\n📊 Construindo matriz de latência...")
-    num_timestamps, num_paths = build_latency_matrix(latency_by_path, output_filepath)
+    with metrics.stage('build') as stage:
+        timestamps, path_ids, matrix = align_latency_matrix(latency_by_path)
+        stage.count('cells', matrix.size)
+    
+    with metrics.stage('write') as stage:
+        write_latency_matrix(output_filepath, timestamps, path_ids, matrix)
+        stage.add_files(output_filepath)
     
     # Resumo
-    print_summary(output_filepath, num_timestamps, num_paths)
+    print_summary(output_filepath, len(timestamps), len(path_ids))
+    
+    metrics_filepath = metrics.save(f'analysis/{origin}/{origin}-{destination}/metrics/build_table.json')
+    print(f"⏱ Métricas salvas em: {metrics_filepath}")
+    for line in metrics.format_table():
+        print(line)
 
 
 if __name__ == "__main__":
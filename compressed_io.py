@@ -0,0 +1,169 @@
+import gzip
+import io
+import json
+import lzma
+
+
+# Formatos aceitos e sufixo dos arquivos gerados (zstd exige o pacote zstandard)
+COMPRESSIONS = ('gzip', 'xz', 'zstd')
+SUFFIXES = {'gzip': '.gz', 'xz': '.xz', 'zstd': '.zst'}
+
+_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+)
+
+
+def split_compression_suffix(filename):
+    """
+    Separa o sufixo de compressão do nome do arquivo.
+
+    Returns:
+        Tupla (nome sem o sufixo, compressão ou None)
+    """
+    for compression, suffix in SUFFIXES.items():
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)], compression
+    return filename, None
+
+
+def detect_compression(filepath):
+    """
+    Identifica a compressão pelos primeiros bytes do arquivo (ou pelo
+    sufixo, se ele ainda não existe).
+
+    Returns:
+        'gzip', 'xz', 'zstd' ou None
+    """
+    try:
+        with open(filepath, 'rb') as f:
+            head = f.read(6)
+    except FileNotFoundError:
+        return split_compression_suffix(filepath)[1]
+
+    for magic, compression in _MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("Arquivos .zst exigem o pacote zstandard (pip install zstandard)") from None
+    return zstandard
+
+
+def open_text(filepath, mode='r', compression='auto', level=None):
+    """
+    Abre um arquivo de texto, comprimido ou não, como stream.
+
+    Args:
+        filepath: Caminho do arquivo
+        mode: 'r', 'w' ou 'a' (em arquivos comprimidos, 'a' acrescenta um
+              novo bloco, que a leitura concatena de forma transparente)
+        compression: 'auto' (pelo conteúdo na leitura, pelo sufixo na
+                     escrita), None ou um de COMPRESSIONS
+        level: Nível de compressão (padrão de cada formato se None)
+
+    Returns:
+        Objeto de arquivo em modo texto (UTF-8)
+    """
+    if compression == 'auto':
+        compression = detect_compression(filepath) if mode == 'r' else split_compression_suffix(filepath)[1]
+
+    if compression is None:
+        return open(filepath, mode, encoding='utf-8')
+    if compression == 'gzip':
+        return gzip.open(filepath, mode + 't', encoding='utf-8', compresslevel=6 if level is None else level)
+    if compression == 'xz':
+        return lzma.open(filepath, mode + 't', encoding='utf-8', preset=level)
+    if compression == 'zstd':
+        zstandard = _zstandard()
+        raw = open(filepath, mode + 'b')
+        if mode == 'r':
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        else:
+            stream = zstandard.ZstdCompressor(level=3 if level is None else level).stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding='utf-8')
+    raise ValueError(f"compressão deve ser uma de {COMPRESSIONS}: {compression}")
+
+
+class DedupJsonLinesWriter:
+    """
+    Grava medições de traceroute em JSON Lines trocando IPs e hostnames
+    repetidos por índices de uma tabela gravada no próprio arquivo. Linhas
+    {"ips": [...]} e {"hostnames": [...]} acrescentam valores novos à
+    tabela antes do primeiro uso; {"format": ...} inicia uma tabela vazia
+    (cada sessão de escrita, inclusive em modo 'a', começa com ela).
+
+    Uso:
+        with DedupJsonLinesWriter('paths/0.jsonl.gz') as writer:
+            writer.write(entry)
+    """
+
+    FORMAT = 'traceroute-dedup-1'
+
+    def __init__(self, filepath, mode='w'):
+        self.filepath = filepath
+        self._file = open_text(filepath, mode)
+        self._ips = {}
+        self._hostnames = {}
+        self._file.write(json.dumps({'format': self.FORMAT}) + '\n')
+
+    def _index(self, table, key, value):
+        index = table.get(value)
+        if index is None:
+            index = table[value] = len(table)
+            self._file.write(json.dumps({key: [value]}, ensure_ascii=False) + '\n')
+        return index
+
+    def write(self, entry):
+        hops = []
+        for hop in entry.get('val', []):
+            hop = dict(hop)
+            if hop.get('ip'):
+                hop['ip'] = self._index(self._ips, 'ips', hop['ip'])
+            if hop.get('hostname'):
+                hop['hostname'] = self._index(self._hostnames, 'hostnames', hop['hostname'])
+            hops.append(hop)
+        self._file.write(json.dumps({**entry, 'val': hops}, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_dedup_json_lines(filepath):
+    """
+    Lê um arquivo de DedupJsonLinesWriter, restaurando as medições originais.
+
+    Yields:
+        Dicionário de cada medição
+    """
+    ips = []
+    hostnames = []
+    with open_text(filepath) as f:
+        for line in f:
+            record = json.loads(line)
+            if 'val' in record:
+                hops = []
+                for hop in record['val']:
+                    if isinstance(hop.get('ip'), int):
+                        hop['ip'] = ips[hop['ip']]
+                    if isinstance(hop.get('hostname'), int):
+                        hop['hostname'] = hostnames[hop['hostname']]
+                    hops.append(hop)
+                yield record
+            elif 'format' in record:
+                ips, hostnames = [], []
+            else:
+                ips.extend(record.get('ips', []))
+                hostnames.extend(record.get('hostnames', []))
@@ -0,0 +1,284 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_CACHE_DIR = '.cache'
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+def file_fingerprint(path, use_hash=False):
+    """
+    Identifica o conteúdo de um arquivo ou diretório sem lê-lo: caminho,
+    tamanho e mtime de cada arquivo (ou o SHA-1 do conteúdo, com use_hash).
+
+    Args:
+        path: Arquivo ou diretório (diretórios incluem os arquivos do
+              primeiro nível, que é o que os leitores do projeto leem)
+        use_hash: Se True, usa o hash do conteúdo em vez de tamanho/mtime
+
+    Returns:
+        Lista de tuplas serializável em JSON
+    """
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, name) for name in os.listdir(path)
+                       if os.path.isfile(os.path.join(path, name)))
+    else:
+        files = [path]
+
+    fingerprint = []
+    for filepath in files:
+        stat = os.stat(filepath)
+        if use_hash:
+            digest = hashlib.sha1()
+            with open(filepath, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+            fingerprint.append((os.path.abspath(filepath), digest.hexdigest()))
+        else:
+            fingerprint.append((os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns))
+    return fingerprint
+
+
+class DatasetCache:
+    """
+    Cache em disco de dados já convertidos em arrays NumPy (.npz sem
+    compressão), indexado pelas entradas (tamanho/mtime ou hash) e pelos
+    parâmetros de leitura. Quando o total passa de max_bytes, os arquivos
+    usados há mais tempo são removidos.
+
+    Uso:
+        cache = DatasetCache()
+        arrays = cache.load('labels', [filepath], lambda: {'labels': np.loadtxt(filepath)})
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, use_hash=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.use_hash = use_hash
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, name, sources, params=None):
+        """
+        Returns:
+            Hash que identifica as entradas e parâmetros
+        """
+        description = {
+            'name': name,
+            'sources': [file_fingerprint(source, self.use_hash) for source in sources],
+            'params': params,
+        }
+        return hashlib.sha1(json.dumps(description, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _filepath(self, name, key):
+        return os.path.join(self.cache_dir, f'{name}-{key}.npz')
+
+    def get(self, name, key):
+        """
+        Returns:
+            Dicionário de arrays ou None se não estiver em cache
+        """
+        filepath = self._filepath(name, key)
+        try:
+            with np.load(filepath, allow_pickle=False) as data:
+                arrays = {k: data[k] for k in data.files}
+        except (OSError, ValueError):
+            return None
+
+        # Marca como usado recentemente (ordem de remoção)
+        os.utime(filepath)
+        return arrays
+
+    def put(self, name, key, arrays):
+        """
+        Grava os arrays no cache e remove entradas antigas se necessário.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Escrita atômica: processos concorrentes nunca leem arquivo parcial
+        fd, tmp_filepath = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_filepath, self._filepath(name, key))
+
+        self.evict()
+
+    def load(self, name, sources, loader, params=None):
+        """
+        Retorna os arrays em cache ou chama loader() e guarda o resultado.
+
+        Args:
+            name: Nome do tipo de dado (prefixo do arquivo)
+            sources: Arquivos/diretórios de entrada
+            loader: Função sem argumentos que retorna {nome: array}
+            params: Parâmetros de leitura (entram na chave)
+
+        Returns:
+            Dicionário {nome: array}
+        """
+        key = self.key(name, sources, params)
+        arrays = self.get(name, key)
+        if arrays is not None:
+            self.hits += 1
+            return arrays
+
+        self.misses += 1
+        arrays = loader()
+        self.put(name, key, arrays)
+        return arrays
+
+    def evict(self):
+        """
+        Remove as entradas usadas há mais tempo até o total caber em max_bytes.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.npz'):
+                stat = os.stat(os.path.join(self.cache_dir, filename))
+                entries.append((stat.st_mtime_ns, stat.st_size, filename))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, filename in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, filename))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """
+        Remove todas as entradas do cache.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.npz'):
+                os.remove(os.path.join(self.cache_dir, filename))
+
+
+def pack_series(series_by_path):
+    """
+    Converte {path_id: (timestamps, valores)} em arrays contíguos,
+    mantendo a ordem do dicionário.
+    """
+    path_ids = list(series_by_path)
+    lengths = [len(series_by_path[path_id][0]) for path_id in path_ids]
+    offsets = np.zeros(len(path_ids) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    return {
+        'path_ids': np.array(path_ids, dtype=np.int64),
+        'offsets': offsets,
+        'ts': np.concatenate([series_by_path[p][0] for p in path_ids]) if path_ids else np.empty(0, dtype=np.int64),
+        'values': np.concatenate([series_by_path[p][1] for p in path_ids]) if path_ids else np.empty(0),
+    }
+
+
+def unpack_series(arrays):
+    """
+    Inverso de pack_series.
+    """
+    offsets = arrays['offsets']
+    return {
+        int(path_id): (arrays['ts'][start:end], arrays['values'][start:end])
+        for path_id, start, end in zip(arrays['path_ids'], offsets[:-1], offsets[1:])
+    }
+
+
+def cached_series(loader, source, cache=None, **params):
+    """
+    Carrega {path_id: (timestamps, valores)} com loader(source, **params),
+    usando o cache quando source não mudou.
+
+    Args:
+        loader: Ex: build_table.load_latency_data_from_txt
+        source: Arquivo ou diretório lido pelo loader
+        cache: DatasetCache (padrão: DatasetCache())
+    """
+    cache = DatasetCache() if cache is None else cache
+    return unpack_series(cache.load(loader.__name__, [source], lambda: pack_series(loader(source, **params)), params))
+
+
+def _frame_to_arrays(df):
+    """
+    Colunas do DataFrame como arrays para o cache. Colunas object só com
+    strings são guardadas com uma máscara dos nulos.
+
+    Returns:
+        Dicionário de arrays, ou None se o DataFrame não pode ser remontado
+        igual ao original (índice próprio, nomes de coluna não-string ou
+        colunas object com outros tipos)
+    """
+    if not isinstance(df.index, pd.RangeIndex) or not all(isinstance(column, str) for column in df.columns):
+        return None
+
+    arrays = {'columns': np.array(list(df.columns), dtype=str)}
+    for idx, column in enumerate(df.columns):
+        values = df[column].to_numpy()
+        if values.dtype == object:
+            null = pd.isna(values)
+            if not all(isinstance(value, str) for value in values[~null]):
+                return None
+            arrays[f'col{idx}'] = np.where(null, '', values).astype(str)
+            arrays[f'null{idx}'] = null
+        elif values.dtype.kind in 'biufcmM':
+            arrays[f'col{idx}'] = values
+        else:
+            return None
+    return arrays
+
+
+def _arrays_to_frame(arrays):
+    """
+    Inverso de _frame_to_arrays (nulos das colunas de texto voltam como NaN).
+    """
+    columns = {}
+    for idx, column in enumerate(arrays['columns'].tolist()):
+        values = arrays[f'col{idx}']
+        if f'null{idx}' in arrays:
+            values = values.astype(object)
+            values[arrays[f'null{idx}']] = np.nan
+        columns[column] = values
+    return pd.DataFrame(columns)
+
+
+def read_csv_cached(filepath, cache=None, **kwargs):
+    """
+    pd.read_csv com cache: as colunas são guardadas como arrays e o
+    DataFrame é remontado sem parsing quando o arquivo não mudou.
+    DataFrames que os arrays não representam exatamente (ver
+    _frame_to_arrays) são sempre lidos com pd.read_csv.
+    """
+    cache = DatasetCache() if cache is None else cache
+    parsed = {}
+
+    def loader():
+        df = parsed['df'] = pd.read_csv(filepath, **kwargs)
+        arrays = _frame_to_arrays(df)
+        # Sem representação exata: o cache só registra que o CSV deve ser lido
+        return {'uncached': np.array(True)} if arrays is None else arrays
+
+    arrays = cache.load('read_csv', [filepath], loader, {'format': 2, 'kwargs': kwargs})
+    if 'df' in parsed:
+        return parsed['df']
+    if 'uncached' in arrays:
+        return pd.read_csv(filepath, **kwargs)
+    return _arrays_to_frame(arrays)
+
+
+def loadtxt_cached(filepath, cache=None, **kwargs):
+    """
+    np.loadtxt com cache.
+    """
+    cache = DatasetCache() if cache is None else cache
+    return cache.load('loadtxt', [filepath], lambda: {'data': np.loadtxt(filepath, **kwargs)}, kwargs)['data']
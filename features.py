@@ -0,0 +1,305 @@
+import os
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from dataset_cache import DatasetCache, read_csv_cached
+from path_store import list_segments, load_path_store, path_series
+
+
+DEFAULT_LAGS = (1, 2, 3)
+DEFAULT_DELTAS = (1, 6)
+DEFAULT_WINDOWS = (6, 36, 144)
+
+
+def real_sample_times(store_dir, columns):
+    """
+    Timestamps das medições reais (não interpoladas) de cada coluna
+    latency_<path_id + 1>, a partir do armazenamento colunar.
+
+    Returns:
+        Lista de arrays ordenados, na ordem de columns
+    """
+    series = path_series(load_path_store(store_dir))
+    times = []
+    for column in columns:
+        path_id = int(column.rsplit('_', 1)[1]) - 1
+        ts = series[path_id][0] if path_id in series else np.empty(0, dtype=np.int64)
+        times.append(np.sort(np.asarray(ts, dtype=np.int64)))
+    return times
+
+
+def last_real_times(timestamps, real_times):
+    """
+    Última medição real até cada timestamp, por coluna.
+
+    Returns:
+        Array linhas × colunas (NaN antes da primeira medição)
+    """
+    last = np.full((len(timestamps), len(real_times)), np.nan)
+    for col, ts in enumerate(real_times):
+        idx = np.searchsorted(ts, timestamps, side='right') - 1
+        last[:, col] = np.where(idx >= 0, ts[np.maximum(idx, 0)], np.nan)
+    return last
+
+
+def compute_features(timestamps, latencies, last_real=None, columns=None, lags=DEFAULT_LAGS,
+                     deltas=DEFAULT_DELTAS, windows=DEFAULT_WINDOWS, time_of_day=True, start=0,
+                     origin_ts=None):
+    """
+    Calcula os atributos de cada linha da matriz alinhada de latências,
+    usando apenas linhas anteriores (sem vazamento do futuro).
+
+    Args:
+        timestamps: Timestamps em segundos (linhas)
+        latencies: Array linhas × caminhos
+        last_real: Última medição real até cada linha (last_real_times);
+                   None omite o atributo since_real
+        columns: Nomes dos caminhos (padrão: latency_1, latency_2, ...)
+        lags: Atrasos em passos da grade
+        deltas: Diferenças em relação a `delta` passos atrás
+        windows: Janelas (em passos) da média, desvio e mínimo móveis;
+                 no início da série as janelas são parciais
+        time_of_day: Se True, inclui hora do dia e dia da semana em seno/cosseno
+        start: Primeira linha a devolver (as anteriores servem só de histórico)
+        origin_ts: Início da série (padrão: primeiro timestamp); since_real
+                   conta a partir dele enquanto não há medição real
+
+    Returns:
+        Tupla (array linhas × atributos a partir de start, nomes dos atributos)
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    latencies = np.asarray(latencies, dtype=float)
+    num_rows, num_paths = latencies.shape
+    columns = columns or [f'latency_{idx + 1}' for idx in range(num_paths)]
+    rows = slice(start, num_rows)
+
+    blocks = [latencies[rows]]
+    names = list(columns)
+
+    # Antes do início da série, lags e deltas repetem a primeira linha
+    for lag in lags:
+        idx = np.maximum(np.arange(num_rows)[rows] - lag, 0)
+        blocks.append(latencies[idx])
+        names += [f'{column}_lag{lag}' for column in columns]
+    for delta in deltas:
+        idx = np.maximum(np.arange(num_rows)[rows] - delta, 0)
+        blocks.append(latencies[rows] - latencies[idx])
+        names += [f'{column}_delta{delta}' for column in columns]
+
+    for window in windows:
+        padded = np.vstack((np.full((window - 1, num_paths), np.nan), latencies))
+        view = sliding_window_view(padded, window, axis=0)[rows]
+        blocks += [np.nanmean(view, axis=2), np.nanstd(view, axis=2), np.nanmin(view, axis=2)]
+        names += [f'{column}_mean{window}' for column in columns]
+        names += [f'{column}_std{window}' for column in columns]
+        names += [f'{column}_min{window}' for column in columns]
+
+    if last_real is not None:
+        since = timestamps[rows, None] - np.asarray(last_real)[rows]
+        # Sem medição real até a linha: tempo desde o início da série
+        origin_ts = timestamps[0] if origin_ts is None else origin_ts
+        since = np.where(np.isnan(since), (timestamps[rows] - origin_ts)[:, None], since)
+        blocks.append(since)
+        names += [f'{column}_since_real' for column in columns]
+
+    if time_of_day:
+        seconds = timestamps[rows]
+        day = 2 * np.pi * (seconds % 86400) / 86400
+        # 1970-01-01 foi uma quinta-feira: dia 0 da semana = segunda
+        week = 2 * np.pi * ((seconds // 86400 + 3) % 7) / 7
+        blocks.append(np.column_stack((np.sin(day), np.cos(day), np.sin(week), np.cos(week))))
+        names += ['tod_sin', 'tod_cos', 'dow_sin', 'dow_cos']
+
+    return np.hstack(blocks), names
+
+
+class FeatureEngine:
+    """
+    Mantém o histórico mínimo da matriz de latências para calcular os
+    atributos de novas linhas sem recalcular a série inteira: fit processa
+    o histórico e append as linhas que chegam (ex: inferência online).
+    Os atributos de append são idênticos aos de fit sobre a série completa.
+
+    Uso:
+        engine = FeatureEngine(columns, windows=(6, 36))
+        X_train, names = engine.fit(timestamps, latencies, real_times)
+        x_now = engine.append([ts], [[7.1, 12.0, 8.4]])
+    """
+
+    def __init__(self, columns, lags=DEFAULT_LAGS, deltas=DEFAULT_DELTAS, windows=DEFAULT_WINDOWS,
+                 time_of_day=True, since_real=True):
+        self.columns = list(columns)
+        self.lags = tuple(lags)
+        self.deltas = tuple(deltas)
+        self.windows = tuple(windows)
+        self.time_of_day = time_of_day
+        self.since_real = since_real
+        self.history = max(self.lags + self.deltas + tuple(window - 1 for window in self.windows) + (0,))
+        self.names = None
+        self._timestamps = np.empty(0, dtype=np.int64)
+        self._latencies = np.empty((0, len(self.columns)))
+        self._last_real = np.empty((0, len(self.columns)))
+        self._first_ts = None
+
+    def config(self):
+        """
+        Returns:
+            Parâmetros dos atributos (chave do cache)
+        """
+        return {'columns': self.columns, 'lags': list(self.lags), 'deltas': list(self.deltas),
+                'windows': list(self.windows), 'time_of_day': self.time_of_day, 'since_real': self.since_real}
+
+    def _compute(self, timestamps, latencies, last_real, start):
+        features, self.names = compute_features(
+            timestamps, latencies, last_real if self.since_real else None, self.columns,
+            self.lags, self.deltas, self.windows, self.time_of_day, start, self._first_ts
+        )
+        return features
+
+    def _keep(self, timestamps, latencies, last_real):
+        keep = max(self.history, 1)
+        self._timestamps = timestamps[-keep:]
+        self._latencies = latencies[-keep:]
+        self._last_real = last_real[-keep:]
+
+    def _prepare(self, timestamps, latencies, real_times):
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        latencies = np.asarray(latencies, dtype=float)
+        if real_times is None:
+            last_real = np.repeat(timestamps[:, None].astype(float), len(self.columns), axis=1)
+        else:
+            last_real = last_real_times(timestamps, real_times)
+        self._first_ts = int(timestamps[0]) if len(timestamps) else None
+        return timestamps, latencies, last_real
+
+    def restore(self, timestamps, latencies, real_times=None):
+        """
+        Guarda o histórico da série sem calcular atributos (ex: quando os
+        atributos de fit vieram do cache).
+        """
+        self._keep(*self._prepare(timestamps, latencies, real_times))
+        self.names = None
+
+    def fit(self, timestamps, latencies, real_times=None):
+        """
+        Calcula os atributos de toda a série e guarda o histórico final.
+
+        Args:
+            timestamps: Timestamps em segundos
+            latencies: Array linhas × caminhos (na ordem de columns)
+            real_times: Timestamps das medições reais por coluna
+                        (real_sample_times); None trata todas as linhas como reais
+
+        Returns:
+            Tupla (array linhas × atributos, nomes dos atributos)
+        """
+        timestamps, latencies, last_real = self._prepare(timestamps, latencies, real_times)
+        features = self._compute(timestamps, latencies, last_real, 0)
+        self._keep(timestamps, latencies, last_real)
+        return features, self.names
+
+    def append(self, timestamps, latencies, real_mask=None):
+        """
+        Calcula os atributos das novas linhas usando apenas o histórico guardado.
+
+        Args:
+            timestamps: Timestamps das novas linhas
+            latencies: Array novas linhas × caminhos
+            real_mask: Booleano novas linhas × caminhos indicando medições
+                       reais; None trata todas como reais
+
+        Returns:
+            Array novas linhas × atributos
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        latencies = np.atleast_2d(np.asarray(latencies, dtype=float))
+        if real_mask is None:
+            real_mask = np.ones(latencies.shape, dtype=bool)
+
+        if self._first_ts is None:
+            self._first_ts = int(timestamps[0])
+
+        # Última medição real: a linha atual quando real, senão a anterior
+        last_real = np.empty(latencies.shape)
+        previous = self._last_real[-1] if len(self._last_real) else np.full(len(self.columns), np.nan)
+        for row, (ts, mask) in enumerate(zip(timestamps, np.asarray(real_mask, dtype=bool))):
+            previous = np.where(mask, float(ts), previous)
+            last_real[row] = previous
+
+        all_timestamps = np.concatenate((self._timestamps, timestamps))
+        all_latencies = np.vstack((self._latencies, latencies))
+        all_last_real = np.vstack((self._last_real, last_real))
+
+        features = self._compute(all_timestamps, all_latencies, all_last_real, len(self._timestamps))
+        self._keep(all_timestamps, all_latencies, all_last_real)
+        return features
+
+
+def load_features(latency_filepath, store_dir=None, cache=None, **config):
+    """
+    Atributos da matriz alinhada (routes_latency.csv), guardados no cache
+    em disco por arquivo de entrada e configuração das janelas.
+
+    Args:
+        latency_filepath: Caminho do routes_latency.csv
+        store_dir: Armazenamento colunar do par (para since_real); None
+                   ou diretório inexistente trata todas as linhas como reais
+        cache: DatasetCache (padrão: DatasetCache())
+        **config: lags, deltas, windows, time_of_day (ver FeatureEngine)
+
+    Returns:
+        Tupla (DataFrame com timestamp e atributos, FeatureEngine pronto
+        para append)
+    """
+    cache = DatasetCache() if cache is None else cache
+    if store_dir and not os.path.isdir(store_dir):
+        store_dir = None
+    df = read_csv_cached(latency_filepath, cache=cache)
+    columns = [str(column) for column in df.columns[1:]]
+    timestamps = pd.to_datetime(df.iloc[:, 0]).to_numpy().astype('datetime64[s]').astype(np.int64)
+    latencies = df.iloc[:, 1:].to_numpy(dtype=float)
+    real_times = real_sample_times(store_dir, columns) if store_dir else None
+
+    engine = FeatureEngine(columns, **config)
+    sources = [latency_filepath] + (list_segments(store_dir) if store_dir else [])
+
+    def loader():
+        features, names = engine.fit(timestamps, latencies, real_times)
+        return {'features': features, 'names': np.array(names)}
+
+    arrays = cache.load('features', sources, loader, engine.config())
+    if engine.names is None:
+        # Atributos vieram do cache: guarda só o histórico usado por append
+        engine.restore(timestamps, latencies, real_times)
+        engine.names = arrays['names'].tolist()
+
+    features = pd.DataFrame(arrays['features'], columns=arrays['names'].tolist())
+    features.insert(0, 'timestamp', df.iloc[:, 0].to_numpy())
+    return features, engine
+
+
+def main():
+    # Configurações
+    origin = 'rj'
+    destination = 'es'
+    windows = DEFAULT_WINDOWS
+
+    base_dir = f'analysis/{origin}/{origin}-{destination}'
+    latency_filepath = f'{base_dir}/ml/routes_latency.csv'
+    store_dir = f'{base_dir}/paths/store'
+
+    print(f"📂 Calculando atributos de: {latency_filepath}")
+    if not os.path.isdir(store_dir):
+        print(f"⚠ {store_dir} não encontrado: todas as linhas tratadas como medições reais")
+        store_dir = None
+    cache = DatasetCache()
+    features, engine = load_features(latency_filepath, store_dir, cache=cache, windows=windows)
+    print(f"✓ {features.shape[0]} linhas × {features.shape[1] - 1} atributos "
+          f"(cache: {cache.hits} acertos, {cache.misses} faltas)")
+    print(f"  Histórico mantido para append: {engine.history} linhas")
+
+
+if __name__ == "__main__":
+    main()
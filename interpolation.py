@@ -1,7 +1,12 @@
 import pandas as pd
-from io import StringIO
 from os import listdir
-from os.path import isfile, join
+from os.path import exists, isfile, join
+
+from build_table import load_latency_data_from_txt
+from compressed_io import open_text, split_compression_suffix
+from dataset_cache import cached_series
+from metrics import RunMetrics
+from path_store import load_path_store, path_series
 
 
 def save_interpolation(df_interpolated, out_dir):
@@ -12,58 +17,101 @@ def save_interpolation(df_interpolated, out_dir):
 
     print(f"Sucesso! O arquivo '{filepath}' foi salvo.")
 
-def load_interpolated_data(root_dir):
-    files = [f for f in listdir(root_dir) if isfile(join(root_dir, f))]
+def load_timeseries(root_dir):
+    # {path_id: série de latência}, com o path_id tirado do nome do arquivo
+    # (0_timeseries.txt -> 0) para não depender da ordem do listdir
+    series_by_path = {}
 
-    dfs = []
-    
-    for f in files:
+    for f in listdir(root_dir):
         filepath = join(root_dir, f)
+        name, _ = split_compression_suffix(f)
+        if not isfile(filepath) or not name.endswith('_timeseries.txt'):
+            continue
 
-        df = pd.read_csv(filepath)
-
+        with open_text(filepath) as handle:
+            df = pd.read_csv(handle, float_precision='round_trip')
         df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
-        df = df.set_index('timestamp')
 
-        df_minute = df.resample('10min').nearest()
-        df_interpolated = df_minute.interpolate(method='linear', limit_direction='both')
+        path_id = int(name.replace('_timeseries.txt', ''))
+        series_by_path[path_id] = df.set_index('timestamp')['latency_ms']
+
+    return series_by_path
+
+def to_timeseries(latency_by_path):
+    # {path_id: (timestamps, latências)} -> {path_id: série de latência}
+    series_by_path = {}
+
+    for path_id, (timestamps, latencies) in latency_by_path.items():
+        index = pd.DatetimeIndex(pd.to_datetime(timestamps, unit='s'), name='timestamp')
+        series_by_path[path_id] = pd.Series(latencies, index=index, name='latency_ms')
 
-        dfs.append(df_interpolated)
-    
-    return dfs
+    return series_by_path
 
-def rename_columns(dfs):
-    renamed_dfs = []
+def load_store_timeseries(store_dir):
+    return to_timeseries(path_series(load_path_store(store_dir)))
 
-    for i, df in enumerate(dfs):
-        df = df.rename(columns={df.columns[0]: f"latency_{i+1}"})
-        renamed_dfs.append(df)
-    
-    return renamed_dfs
+def load_cached_timeseries(root_dir):
+    # Mesmo resultado de load_timeseries, sem reler os TXT inalterados
+    return to_timeseries(cached_series(load_latency_data_from_txt, root_dir))
 
-def join_data(dfs):
-    merged_df = dfs[0]
+def align_series(series_by_path, interval='10min', method='linear', tolerance=None):
+    # Caminhos sem amostras não têm coluna (nem definem os limites da grade)
+    series_by_path = {path_id: s for path_id, s in series_by_path.items() if len(s)}
+    if not series_by_path:
+        print("❌ Nenhuma série com amostras para alinhar")
+        return pd.DataFrame({'timestamp': pd.DatetimeIndex([])})
 
-    for i in range(1, len(dfs)):
-        merged_df = pd.merge_asof(merged_df, dfs[i], on='timestamp', direction='nearest')
+    # Grade de tempo comum a todos os caminhos
+    start = min(s.index.min() for s in series_by_path.values()).floor(interval)
+    end = max(s.index.max() for s in series_by_path.values()).floor(interval)
+    grid = pd.date_range(start, end, freq=interval, name='timestamp')
 
-    return merged_df
+    # Cada caminho recebe, em cada ponto da grade, a amostra mais próxima
+    # (até tolerance de distância, se informado); coluna latency_<path_id + 1>
+    columns = {}
+    for path_id in sorted(series_by_path):
+        s = series_by_path[path_id].sort_index()
+        s = s[~s.index.duplicated(keep='last')]
+        columns[f"latency_{path_id + 1}"] = s.reindex(grid, method='nearest', tolerance=tolerance)
+
+    df = pd.concat(columns, axis=1)
+
+    # Preenche as lacunas restantes (pontos além da tolerância)
+    df = df.interpolate(method=method, limit_direction='both')
+
+    return df.reset_index()
 
 def main():
     origin = 'rj'
     destination = 'es'
 
+    store_dir = f'analysis/{origin}/{origin}-{destination}/paths/store'
     root_dir = f'analysis/{origin}/{origin}-{destination}/paths/timeseries'
     out_dir = f'analysis/{origin}/{origin}-{destination}'
 
-    dfs = load_interpolated_data(root_dir)
-    dfs = rename_columns(dfs)
+    # Perfilamento opcional: None, 'cprofile' ou 'tracemalloc'
+    metrics = RunMetrics('interpolation', profile=None)
+
+    with metrics.stage('load') as stage:
+        if exists(store_dir):
+            series_by_path = load_store_timeseries(store_dir)
+        else:
+            series_by_path = load_cached_timeseries(root_dir)
+        stage.count('measurements', sum(len(s) for s in series_by_path.values()))
+
+    with metrics.stage('align') as stage:
+        merged_df = align_series(series_by_path, interval='10min', method='linear')
+        stage.count('rows', len(merged_df))
+    if merged_df.empty:
+        return
 
-    merged_df = join_data(dfs)
+    with metrics.stage('write') as stage:
+        save_interpolation(merged_df, out_dir)
+        stage.add_files(join(out_dir, 'latency_matrix_interpolated.csv'))
 
-    save_interpolation(merged_df, out_dir)
+    metrics.save(join(out_dir, 'metrics', 'interpolation.json'))
 
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
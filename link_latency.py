@@ -0,0 +1,251 @@
+import os
+from collections import namedtuple
+
+import networkx as nx
+import numpy as np
+
+from network_extractor import find_all_simple_paths
+from path_store import load_path_store, path_series
+
+
+# Atraso médio de cada enlace (aresta do grafo) em cada intervalo de tempo:
+#   edges   lista de arestas (ip_a, ip_b), com ip_a < ip_b (ordem de string)
+#   bins    int64   início de cada intervalo (timestamp)
+#   delay   float64 arestas × intervalos, atraso médio em ms (NaN sem amostras)
+#   counts  int64   arestas × intervalos, número de amostras
+#   base    float64 RTT médio até o primeiro salto em cada intervalo
+LinkLatency = namedtuple('LinkLatency', ['edges', 'bins', 'delay', 'counts', 'base', 'interval'])
+
+
+def hop_deltas(store, clip_negative=False):
+    """
+    Decompõe os RTTs por salto de todas as medições em atrasos por enlace.
+
+    Hops sem IP já não existem no armazenamento, então a aresta entre dois
+    IPs consecutivos inclui os saltos anônimos entre eles, como no grafo.
+    Quando um hop tem IP mas não tem RTT, a diferença entre os RTTs
+    válidos vizinhos é dividida igualmente entre os enlaces intermediários.
+
+    Args:
+        store: PathStore carregado por load_path_store
+        clip_negative: Se True, atrasos negativos (RTTs fora de ordem) viram 0.
+                       Desligado por padrão: sem o corte, a soma dos atrasos
+                       de um caminho reproduz o RTT ponta a ponta
+
+    Returns:
+        Tupla (índice da medição, id do IP a, id do IP b, atraso) com um
+        elemento por enlace atravessado
+    """
+    offsets = np.asarray(store.hop_offsets)
+    hop_ip = np.asarray(store.hop_ip)
+    hop_rtt = np.asarray(store.hop_rtt)
+    num_hops = len(hop_ip)
+
+    measurement = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    position = np.arange(num_hops)
+    valid = ~np.isnan(hop_rtt)
+
+    # Último hop com RTT antes de cada hop e próximo hop com RTT a partir dele
+    last_valid = np.maximum.accumulate(np.where(valid, position, -1))
+    prev_valid = np.concatenate(([-1], last_valid[:-1]))
+    next_valid = np.minimum.accumulate(np.where(valid, position, num_hops)[::-1])[::-1]
+
+    # Enlace k liga o hop k-1 ao hop k da mesma medição
+    is_link = position != offsets[measurement]
+    is_link &= prev_valid >= offsets[measurement]
+    safe_next = np.minimum(next_valid, num_hops - 1)
+    is_link &= (next_valid < num_hops) & (measurement[safe_next] == measurement)
+    is_link &= hop_ip != np.concatenate(([-1], hop_ip[:-1]))
+
+    k = np.flatnonzero(is_link)
+    start, end = prev_valid[k], next_valid[k]
+    delay = (hop_rtt[end] - hop_rtt[start]) / (end - start)
+    if clip_negative:
+        delay = np.maximum(delay, 0.0)
+
+    return measurement[k], hop_ip[k - 1], hop_ip[k], delay
+
+
+def link_latency_matrix(store, interval=600, clip_negative=False):
+    """
+    Monta o array enlaces × tempo com o atraso médio de cada enlace em
+    intervalos de `interval` segundos.
+
+    Args:
+        store: PathStore carregado por load_path_store
+        interval: Tamanho do intervalo em segundos (padrão: 10 min, como
+                  a grade do routes_latency.csv)
+        clip_negative: Se True, atrasos negativos viram 0
+
+    Returns:
+        LinkLatency
+    """
+    ts = np.asarray(store.ts)
+    measurement, ip_a, ip_b, delay = hop_deltas(store, clip_negative)
+
+    # Arestas não direcionadas, como no grafo
+    low, high = np.minimum(ip_a, ip_b), np.maximum(ip_a, ip_b)
+    edge_keys, edge_idx = np.unique(low.astype(np.int64) * len(store.ips) + high, return_inverse=True)
+
+    measurement_bins = ts // interval * interval
+    bins, measurement_bin_idx = np.unique(measurement_bins, return_inverse=True)
+    bin_idx = measurement_bin_idx[measurement]
+
+    shape = (len(edge_keys), len(bins))
+    flat = edge_idx * len(bins) + bin_idx
+    counts = np.bincount(flat, minlength=shape[0] * shape[1]).reshape(shape)
+    sums = np.bincount(flat, weights=delay, minlength=shape[0] * shape[1]).reshape(shape)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_delay = sums / counts
+
+    # RTT até o primeiro salto (comum a todos os caminhos do par)
+    first_rtt = np.asarray(store.hop_rtt)[np.asarray(store.hop_offsets)[:-1]] if len(ts) else np.empty(0)
+    has_first = ~np.isnan(first_rtt)
+    base_counts = np.bincount(measurement_bin_idx[has_first], minlength=len(bins))
+    base_sums = np.bincount(measurement_bin_idx[has_first], weights=first_rtt[has_first], minlength=len(bins))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        base = base_sums / base_counts
+
+    edges = [tuple(sorted((store.ips[key // len(store.ips)], store.ips[key % len(store.ips)])))
+             for key in edge_keys.tolist()]
+    return LinkLatency(edges=edges, bins=bins, delay=mean_delay, counts=counts, base=base, interval=interval)
+
+
+def fill_gaps(values):
+    """
+    Preenche os NaN de cada linha com o último valor conhecido (e o início
+    com o primeiro valor conhecido).
+
+    Args:
+        values: Array 1D ou 2D (linhas × tempo)
+
+    Returns:
+        Novo array preenchido
+    """
+    one_dimensional = np.ndim(values) == 1
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    num_cols = values.shape[1]
+    known = ~np.isnan(values)
+
+    idx = np.where(known, np.arange(num_cols), -1)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    first = np.where(known.any(axis=1), known.argmax(axis=1), 0)
+    idx = np.where(idx < 0, first[:, None], idx)
+
+    filled = np.take_along_axis(values, idx, axis=1)
+    return filled[0] if one_dimensional else filled
+
+
+def estimate_path_latency(links, nodes, fill=True):
+    """
+    Estima a latência ponta a ponta de um caminho (medido ou não) em cada
+    intervalo: RTT até o primeiro salto + soma dos atrasos dos enlaces.
+
+    Args:
+        links: LinkLatency de link_latency_matrix
+        nodes: Lista ordenada de IPs do caminho
+        fill: Se True, usa o último atraso conhecido de cada enlace nos
+              intervalos sem amostra
+
+    Returns:
+        Array com a latência estimada por intervalo (NaN se algum enlace
+        do caminho nunca foi observado)
+    """
+    edge_index = {edge: idx for idx, edge in enumerate(links.edges)}
+    delay = fill_gaps(links.delay) if fill else links.delay
+    base = fill_gaps(links.base) if fill else links.base
+
+    estimate = base.copy()
+    for a, b in zip(nodes[:-1], nodes[1:]):
+        idx = edge_index.get((min(a, b), max(a, b)))
+        if idx is None:
+            return np.full(len(links.bins), np.nan)
+        estimate += delay[idx]
+
+    return estimate
+
+
+def estimate_possible_paths(links, G, source, target, max_hops=None, max_paths=1000, fill=True):
+    """
+    Estima a latência de todos os caminhos simples do grafo entre source e
+    target, inclusive os que nunca foram medidos.
+
+    Args:
+        links: LinkLatency de link_latency_matrix
+        G: Grafo NetworkX do par
+        source: Primeiro IP dos caminhos (primeiro salto das medições)
+        target: Último IP dos caminhos
+        max_hops: Limite de saltos
+        max_paths: Limite de caminhos enumerados
+        fill: Ver estimate_path_latency
+
+    Returns:
+        Tupla (lista de (caminho, latências estimadas), truncado)
+    """
+    paths, truncated = find_all_simple_paths(G, source, target, max_hops=max_hops, max_paths=max_paths)
+    return [(path, estimate_path_latency(links, path, fill)) for path in paths], truncated
+
+
+def save_link_latency(links, filepath):
+    """
+    Salva o array enlaces × tempo em .npz.
+
+    Returns:
+        Caminho do arquivo criado
+    """
+    np.savez(filepath, edges=np.array(links.edges, dtype=str).reshape(-1, 2), bins=links.bins,
+             delay=links.delay, counts=links.counts, base=links.base, interval=links.interval)
+    return filepath
+
+
+def load_link_latency(filepath):
+    """
+    Carrega um LinkLatency salvo por save_link_latency.
+    """
+    with np.load(filepath) as data:
+        return LinkLatency(edges=[tuple(edge) for edge in data['edges'].tolist()], bins=data['bins'],
+                           delay=data['delay'], counts=data['counts'], base=data['base'],
+                           interval=int(data['interval']))
+
+
+def main():
+    # Configurações
+    origin = 'rj'
+    destination = 'es'
+    interval = 600
+
+    base_dir = f'analysis/{origin}/{origin}-{destination}'
+    store_dir = f'{base_dir}/paths/store'
+
+    print(f"📂 Carregando medições de: {store_dir}")
+    store = load_path_store(store_dir)
+    G = nx.read_gml(os.path.join(base_dir, 'network_topology.gml'))
+
+    links = link_latency_matrix(store, interval)
+    filepath = save_link_latency(links, os.path.join(base_dir, 'link_latency.npz'))
+    print(f"✓ {len(links.edges)} enlaces × {len(links.bins)} intervalos de {interval}s salvos em {filepath}")
+
+    # Primeiro e último IP dos caminhos medidos
+    first_path = store.paths[min(store.paths)]
+    source, target = store.ips[first_path[0]], store.ips[first_path[-1]]
+    measured = {tuple(store.ips[idx] for idx in nodes) for nodes in store.paths.values()}
+
+    # Erro da estimativa nos caminhos medidos (média por intervalo)
+    for path_id, (ts, rtt) in sorted(path_series(store).items()):
+        nodes = [store.ips[idx] for idx in store.paths[path_id]]
+        estimate = estimate_path_latency(links, nodes)
+        bin_idx = np.searchsorted(links.bins, ts // interval * interval)
+        error = np.abs(estimate[bin_idx] - rtt)
+        print(f"  Caminho {path_id}: erro médio da estimativa = {np.nanmean(error):.2f}ms")
+
+    estimates, truncated = estimate_possible_paths(links, G, source, target)
+    print(f"\n🔎 Caminhos possíveis no grafo: {len(estimates)}{' (truncado)' if truncated else ''}")
+    for path, estimate in sorted(estimates, key=lambda item: np.nanmean(item[1]) if np.any(~np.isnan(item[1])) else np.inf):
+        status = 'medido' if tuple(path) in measured else 'NÃO medido'
+        mean = np.nanmean(estimate) if np.any(~np.isnan(estimate)) else float('nan')
+        print(f"  {len(path) - 1} saltos, {status}: latência estimada média = {mean:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
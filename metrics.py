@@ -0,0 +1,258 @@
+import cProfile
+import json
+import os
+import pstats
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+
+PROFILE_MODES = (None, 'cprofile', 'tracemalloc')
+
+
+def peak_rss():
+    """
+    Pico de memória residente do processo em bytes (desde o último
+    reset_peak_rss, quando o kernel permite).
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def reset_peak_rss():
+    """
+    Zera o pico de memória residente (Linux: /proc/self/clear_refs) para
+    que o pico de cada etapa seja medido isoladamente.
+
+    Returns:
+        True se o pico foi zerado
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+class Stage:
+    """
+    Medições de uma etapa: tempo, pico de memória, contadores, bytes
+    gravados e sub-temporizadores acumulados (ex: tempo gasto no parsing
+    dentro de uma etapa que também processa e exporta).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.peak_rss = None
+        self.traced_peak = None
+        self.counters = {}
+        self.timers = {}
+        self.bytes_written = 0
+
+    def count(self, key, value=1):
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def add_files(self, *filepaths):
+        """
+        Soma o tamanho dos arquivos gravados pela etapa.
+        """
+        for filepath in filepaths:
+            if isinstance(filepath, (list, tuple)):
+                self.add_files(*filepath)
+            elif filepath and os.path.isfile(filepath):
+                self.bytes_written += os.path.getsize(filepath)
+
+    def timed(self, key, func):
+        """
+        Envolve func acumulando o tempo de cada chamada em timers[key].
+        """
+        self.timers.setdefault(key, 0.0)
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.timers[key] += time.perf_counter() - start
+
+        return wrapper
+
+    def timed_iter(self, key, iterable):
+        """
+        Repassa os itens de iterable acumulando em timers[key] o tempo
+        gasto para produzi-los (ex: leitura e parsing do JSON).
+        """
+        self.timers.setdefault(key, 0.0)
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.timers[key] += time.perf_counter() - start
+                return
+            self.timers[key] += time.perf_counter() - start
+            yield item
+
+    def to_dict(self):
+        summary = {
+            'name': self.name,
+            'seconds': self.seconds,
+            'peak_rss_mb': self.peak_rss / 2**20 if self.peak_rss is not None else None,
+            'bytes_written': self.bytes_written,
+            'counters': dict(self.counters),
+            'rates': {f'{key}_per_sec': value / self.seconds
+                      for key, value in self.counters.items() if self.seconds > 0},
+        }
+        if self.timers:
+            summary['timers'] = dict(self.timers)
+        if self.traced_peak is not None:
+            summary['traced_peak_mb'] = self.traced_peak / 2**20
+        return summary
+
+
+class RunMetrics:
+    """
+    Métricas de uma execução, por etapa, com resumo em JSON.
+
+    Com profile='cprofile', toda a execução é perfilada (arquivo .prof e
+    funções mais caras no resumo); com profile='tracemalloc', cada etapa
+    registra também o pico de memória alocada pelo Python/NumPy.
+
+    O perfilamento começa na criação e termina em finish/save; usado como
+    contexto (with), finish é chamado também em caso de exceção.
+
+    Uso:
+        with RunMetrics('network_extractor') as metrics:
+            with metrics.stage('report') as stage:
+                filepath = export_consolidated_report(...)
+                stage.add_files(filepath)
+            metrics.save('analysis/rj/rj-es/metrics/network_extractor.json')
+    """
+
+    def __init__(self, name, profile=None):
+        if profile not in PROFILE_MODES:
+            raise ValueError(f"profile deve ser um de {PROFILE_MODES}: {profile}")
+
+        self.name = name
+        self.profile = profile
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.stages = []
+        self._start = time.perf_counter()
+        self._total = None
+        self._profiler = None
+
+        if profile == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif profile == 'tracemalloc' and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Mede a etapa executada dentro do bloco with.
+
+        Yields:
+            Stage para registrar contadores, arquivos e sub-temporizadores
+        """
+        stage = Stage(name)
+        self.stages.append(stage)
+
+        reset_peak_rss()
+        if self.profile == 'tracemalloc':
+            tracemalloc.reset_peak()
+
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.seconds = time.perf_counter() - start
+            # Sem reset do pico, o valor é o máximo do processo até aqui
+            stage.peak_rss = peak_rss()
+            if self.profile == 'tracemalloc':
+                stage.traced_peak = tracemalloc.get_traced_memory()[1]
+
+    def finish(self):
+        """
+        Encerra a execução (tempo total e perfilamento).
+        """
+        if self._total is None:
+            self._total = time.perf_counter() - self._start
+            if self._profiler is not None:
+                self._profiler.disable()
+            if self.profile == 'tracemalloc':
+                tracemalloc.stop()
+
+    def summary(self, top=20):
+        """
+        Returns:
+            Dicionário com o resumo da execução e de cada etapa
+        """
+        total = self._total if self._total is not None else time.perf_counter() - self._start
+        summary = {
+            'name': self.name,
+            'started_at': self.started_at,
+            'total_seconds': total,
+            'peak_rss_mb': max([peak_rss()] + [stage.peak_rss for stage in self.stages
+                                               if stage.peak_rss is not None]) / 2**20,
+            'profile': self.profile,
+            'stages': [stage.to_dict() for stage in self.stages],
+        }
+
+        if self._profiler is not None:
+            stats = pstats.Stats(self._profiler).stats
+            ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+            summary['top_functions'] = [
+                {'function': f'{filename}:{line}({function})', 'calls': calls,
+                 'tottime': tottime, 'cumtime': cumtime}
+                for (filename, line, function), (_, calls, tottime, cumtime, _) in ranked
+            ]
+        return summary
+
+    def save(self, filepath):
+        """
+        Encerra a execução e grava o resumo em JSON (e o .prof, se houver).
+
+        Returns:
+            Caminho do arquivo criado
+        """
+        self.finish()
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+
+        if self._profiler is not None:
+            self._profiler.dump_stats(os.path.splitext(filepath)[0] + '.prof')
+
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=4)
+        return filepath
+
+    def format_table(self):
+        """
+        Returns:
+            Linhas de texto com tempo, memória e bytes de cada etapa
+        """
+        lines = []
+        for stage in self.stages:
+            peak = f"{stage.peak_rss / 2**20:8.1f} MB" if stage.peak_rss is not None else '       -   '
+            line = f"  {stage.name:<20} {stage.seconds:9.3f}s {peak} {stage.bytes_written:>14,} bytes"
+            for key, seconds in stage.timers.items():
+                line += f"\n    └ {key:<16} {seconds:9.3f}s"
+            lines.append(line)
+        return lines
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn import svm, tree
+from sklearn.base import clone
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, confusion_matrix, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.naive_bayes import GaussianNB
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import Pipeline
+
+
+def default_classifiers():
+    """
+    Classificadores comparados no notebook.
+    
+    Returns:
+        Lista de tuplas (nome, estimador)
+    """
+    return [
+        ('LogisticRegression', LogisticRegression()),
+        ('KNeighbors', KNeighborsClassifier()),
+        ('svc', svm.SVC(probability=True)),
+        ('DecisionTree', tree.DecisionTreeClassifier()),
+        ('ExtraTrees', ExtraTreesClassifier()),
+        ('RandomForest', RandomForestClassifier()),
+        ('GaussianNB', GaussianNB()),
+    ]
+
+
+def _fit_fold(pipeline, X, y, train_idx, test_idx, classes):
+    """
+    Treina um modelo em um fold e obtém predições e probabilidades do
+    mesmo ajuste.
+    
+    Returns:
+        Tupla (acurácia, predições, probabilidades) para test_idx
+    """
+    model = clone(pipeline)
+    model.fit(X[train_idx], y[train_idx])
+    
+    y_pred = model.predict(X[test_idx])
+    
+    # Alinha as colunas às classes globais (o fold pode não conter todas)
+    y_predproba = np.zeros((len(test_idx), len(classes)))
+    y_predproba[:, np.searchsorted(classes, model.classes_)] = model.predict_proba(X[test_idx])
+    
+    return accuracy_score(y[test_idx], y_pred), y_pred, y_predproba
+
+
+def compare_models(X, y, folds=5, classifiers=None, binary_classification=False, n_jobs=-1):
+    """
+    Compara classificadores por validação cruzada, ajustando cada modelo
+    uma única vez por fold. Acurácia, predições e probabilidades saem do
+    mesmo ajuste, e todos os pares (modelo, fold) rodam em paralelo.
+    Os folds são os mesmos de cross_val_score(cv=folds).
+    
+    Args:
+        X: Matriz de atributos (ex: routes_latency)
+        y: Rótulos (ex: routes_label)
+        folds: Número de folds
+        classifiers: Lista de (nome, estimador); padrão: default_classifiers()
+        binary_classification: Se True, calcula ROC AUC binária
+        n_jobs: Processos usados (-1 = todos os núcleos)
+    
+    Returns:
+        Tupla (cv_df, y_pred_dic, y_predproba_dic, confusion_matrix_dic,
+        pipelines) no formato do antigo modelCrossVal do notebook
+    """
+    X = np.asarray(X)
+    y = np.asarray(y)
+    classes = np.unique(y)
+    
+    if classifiers is None:
+        classifiers = default_classifiers()
+    
+    pipelines = [Pipeline(steps=[('classifier', clf)]) for _, clf in classifiers]
+    splits = list(StratifiedKFold(n_splits=folds).split(X, y))
+    
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_fold)(pipeline, X, y, train_idx, test_idx, classes)
+        for pipeline in pipelines
+        for train_idx, test_idx in splits
+    )
+    
+    rows = []
+    y_pred_dic = {}
+    y_predproba_dic = {}
+    confusion_matrix_dic = {}
+    
+    for model_idx, (clf_name, _) in enumerate(classifiers):
+        scores = []
+        y_pred = np.empty(len(y), dtype=y.dtype)
+        y_predproba = np.zeros((len(y), len(classes)))
+        
+        for fold_idx, (_, test_idx) in enumerate(splits):
+            score, fold_pred, fold_proba = results[model_idx * len(splits) + fold_idx]
+            scores.append(score)
+            y_pred[test_idx] = fold_pred
+            y_predproba[test_idx] = fold_proba
+        
+        scores = np.array(scores)
+        if binary_classification:
+            roc_auc_score_value = roc_auc_score(y, y_predproba[:, 1], average="macro")
+        else:
+            roc_auc_score_value = roc_auc_score(y, y_predproba, multi_class='ovr', average="macro")
+        
+        rows.append({
+            'Model': clf_name,
+            'Acc.avg': "%0.3f" % (scores.mean()),
+            'Acc.std': "%0.3f" % (scores.std()),
+            'roc_auc_score': "%0.3f" % (roc_auc_score_value)
+        })
+        confusion_matrix_dic[clf_name] = confusion_matrix(y, y_pred)
+        y_pred_dic[clf_name] = y_pred
+        y_predproba_dic[clf_name] = y_predproba
+    
+    cv_df = pd.DataFrame(rows, columns=['Model', 'Acc.avg', 'Acc.std', 'roc_auc_score'])
+    return cv_df, y_pred_dic, y_predproba_dic, confusion_matrix_dic, pipelines
@@ -1,23 +1,43 @@
+import hashlib
 import json
 import os
+import shutil
 import networkx as nx
 import matplotlib.pyplot as plt
 from datetime import datetime
-from collections import defaultdict
+from array import array
+from collections import namedtuple
 
+import numpy as np
 
-def create_output_directories(origin, destination):
+from compressed_io import SUFFIXES, DedupJsonLinesWriter, open_text
+from dataset_cache import file_fingerprint
+from metrics import RunMetrics
+from path_stats import PathLatencyTracker
+from path_store import PathStoreWriter, list_segments, measurement_ts
+
+
+# Layouts de visualize_graph: 'spring' (force-directed, caro), 'hops'
+# (camadas por distância à origem) e 'shell' são determinísticos
+LAYOUTS = ('spring', 'hops', 'shell')
+
+# Acima disso os rótulos de IP ficam ilegíveis e só custam tempo
+MAX_LABELED_NODES = 60
+
+
+def create_output_directories(origin, destination, output_root='analysis'):
     """
     Cria a estrutura de diretórios para saída.
     
     Args:
         origin: Nome da origem
         destination: Nome do destino
+        output_root: Diretório raiz das análises
     
     Returns:
         Tupla com (diretório base, diretório paths)
     """
-    base_path = os.path.join('analysis', origin, f'{origin}-{destination}')
+    base_path = os.path.join(output_root, origin, f'{origin}-{destination}')
     paths_path = os.path.join(base_path, 'paths')
     os.makedirs(paths_path, exist_ok=True)
     return base_path, paths_path
@@ -57,87 +77,260 @@ def extract_rtt_from_hops(hops):
     return None
 
 
-def process_traceroute_data(traceroute_data, destination_ip):
+def iter_traceroute_data(filepath, chunk_size=1 << 20):
+    """
+    Lê incrementalmente um arquivo de traceroute (array JSON no nível raiz),
+    produzindo uma medição por vez sem carregar o arquivo inteiro em memória.
+    Arquivos comprimidos (gzip, xz, zstd) são descomprimidos no caminho.
+    
+    Args:
+        filepath: Caminho do arquivo measure-traceroute_*.json[.gz|.xz|.zst]
+        chunk_size: Quantidade de caracteres lidos por vez
+    
+    Yields:
+        Dicionário de cada medição do array
+    """
+    decoder = json.JSONDecoder()
+    
+    with open_text(filepath) as f:
+        buffer = f.read(chunk_size)
+        pos = 0
+        eof = not buffer
+        started = False
+        
+        while True:
+            # Pula espaços e separadores entre os elementos do array
+            while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ',')):
+                pos += 1
+            
+            if pos >= len(buffer):
+                if eof:
+                    raise ValueError(f"Fim inesperado do arquivo: {filepath}")
+                buffer = buffer[pos:] + f.read(chunk_size)
+                pos = 0
+                eof = len(buffer) < chunk_size
+                continue
+            
+            if not started:
+                if buffer[pos] != '[':
+                    raise ValueError(f"Arquivo não contém um array JSON: {filepath}")
+                started = True
+                pos += 1
+                continue
+            
+            if buffer[pos] == ']':
+                return
+            
+            try:
+                entry, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Elemento incompleto no buffer: lê mais dados e tenta novamente
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            
+            yield entry
+            pos = end
+            
+            # Descarta a parte já consumida do buffer
+            if pos >= chunk_size:
+                buffer = buffer[pos:]
+                pos = 0
+
+
+def iter_new_measurements(traceroute_data, last_ts=None, cursor=None):
+    """
+    Descarta medições já processadas em uma execução anterior.
+    
+    Args:
+        traceroute_data: Iterável de medições de traceroute
+        last_ts: Último timestamp processado (None processa tudo)
+        cursor: Dicionário opcional; cursor['last_ts'] recebe o maior ts lido
+    
+    Yields:
+        Medições com ts posterior a last_ts; com last_ts, medições sem ts
+        numérico também são descartadas (já foram contadas na execução
+        anterior)
+    """
+    if cursor is not None:
+        cursor.setdefault('last_ts', last_ts)
+    
+    for entry in traceroute_data:
+        ts = measurement_ts(entry)
+        if last_ts is not None and (ts is None or ts <= last_ts):
+            continue
+        if cursor is not None and ts is not None and (cursor['last_ts'] is None or ts > cursor['last_ts']):
+            cursor['last_ts'] = ts
+        yield entry
+
+
+Measurements = namedtuple('Measurements', ['ts', 'path_id', 'rtt'])
+
+
+def process_traceroute_data(traceroute_data, destination_ip, on_measurement=None, checkpoint=None,
+                            latency_state=None):
     """
     Processa os dados do traceroute e agrupa medições por caminho.
     Considera a ORDEM dos IPs no caminho.
     FILTRA apenas medições que terminam no IP de destino especificado.
     
+    Os dados são consumidos como iterável (lista ou gerador), em uma
+    única passada. Os IPs são internados como inteiros e cada caminho é
+    identificado por uma tupla de inteiros; nós e arestas entram no grafo
+    apenas na primeira vez que o caminho aparece. De cada medição válida
+    só são guardados ts, path_id e RTT ponta a ponta, em arrays paralelos;
+    a medição completa pode ser consumida por on_measurement e o RTT
+    alimenta latency_state, quando informado.
+    
     Args:
-        traceroute_data: Lista de medições de traceroute
+        traceroute_data: Iterável de medições de traceroute
         destination_ip: IP de destino esperado (último salto)
+        on_measurement: Função opcional chamada como on_measurement(path_id, entry)
+        checkpoint: Checkpoint de uma execução anterior (load_checkpoint);
+                    mantém os IDs dos caminhos e o grafo já conhecidos
+        latency_state: PathLatencyTracker opcional atualizado a cada medição
     
     Returns:
         Tupla com:
-        - measurements_by_path: {path_id: [lista de medições completas]}
+        - measurements: Measurements(ts, path_id, rtt) com arrays NumPy
+          (rtt é NaN quando a medição não tem RTT válido)
         - path_to_nodes: {path_id: [lista ordenada de IPs]}
         - G: Grafo NetworkX não direcionado
-        - filtered_count: Número de medições filtradas
+        - filtered_count: Número de medições filtradas (sem ts numérico,
+          sem caminho ou que não terminam em destination_ip)
+        - total_measurements: Número de medições lidas
     """
     G = nx.Graph()
+    ip_to_index = {}
+    index_to_ip = []
     path_to_id = {}
     path_to_nodes = {}
     path_counter = 0
-    measurements_by_path = defaultdict(list)
+    ts_column = array('q')
+    path_id_column = array('i')
+    rtt_column = array('d')
     filtered_count = 0
+    total_measurements = 0
+    nan = float('nan')
+    
+    def intern(ip):
+        index = ip_to_index.get(ip)
+        if index is None:
+            index = len(index_to_ip)
+            ip_to_index[ip] = index
+            index_to_ip.append(ip)
+        return index
+    
+    destination_index = intern(destination_ip)
+    
+    # Retoma caminhos e grafo de uma execução anterior
+    if checkpoint is not None:
+        for path_id, nodes in checkpoint['path_to_nodes'].items():
+            path_to_id[tuple(intern(ip) for ip in nodes)] = path_id
+            path_to_nodes[path_id] = list(nodes)
+            G.add_nodes_from(nodes)
+        G.add_edges_from(checkpoint['edges'])
+        path_counter = max(path_to_nodes, default=-1) + 1
     
     for entry in traceroute_data:
-        hops = entry.get('val', [])
+        total_measurements += 1
         
-        # Extrai o caminho (sequência ordenada de IPs)
-        path = extract_path_from_hops(hops)
-        
-        # Descarta medições sem caminho válido
-        if not path:
+        # Descarta medições sem ts numérico (não entram na série temporal)
+        ts = measurement_ts(entry)
+        if ts is None:
             filtered_count += 1
             continue
         
-        # FILTRO: Descarta medições que NÃO terminam no IP de destino
-        if path[-1] != destination_ip:
+        # Extrai o caminho como tupla de IPs internados e o último RTT válido
+        path_key = []
+        rtt = None
+        for hop in entry.get('val', []):
+            ip = hop.get('ip')
+            if ip:
+                path_key.append(intern(ip))
+                if hop.get('rtt') is not None:
+                    rtt = hop['rtt']
+        
+        # Descarta medições sem caminho válido ou que NÃO terminam no IP de destino
+        if not path_key or path_key[-1] != destination_index:
             filtered_count += 1
             continue
         
-        # Converte para tupla para usar como chave (mantém ordem)
-        path_tuple = tuple(path)
-        
-        # Adiciona nós e arestas ao grafo
-        previous_node = None
-        for node in path:
-            G.add_node(node)
-            if previous_node is not None:
-                G.add_edge(previous_node, node)
-            previous_node = node
+        path_key = tuple(path_key)
+        path_id = path_to_id.get(path_key)
         
-        # Identifica ou registra o caminho
-        if path_tuple not in path_to_id:
+        # Caminho novo: registra e adiciona nós e arestas ao grafo
+        if path_id is None:
             path_id = path_counter
-            path_to_id[path_tuple] = path_id
-            path_to_nodes[path_id] = list(path)
             path_counter += 1
-        else:
-            path_id = path_to_id[path_tuple]
+            path_to_id[path_key] = path_id
+            nodes = [index_to_ip[index] for index in path_key]
+            path_to_nodes[path_id] = nodes
+            G.add_nodes_from(nodes)
+            G.add_edges_from(zip(nodes[:-1], nodes[1:]))
+        
+        ts_column.append(ts)
+        path_id_column.append(path_id)
+        rtt_column.append(nan if rtt is None else rtt)
+        
+        if latency_state is not None:
+            latency_state.update(path_id, rtt, ts)
         
-        # Adiciona a medição completa ao caminho
-        measurements_by_path[path_id].append(entry)
+        if on_measurement is not None:
+            on_measurement(path_id, entry)
     
-    return measurements_by_path, path_to_nodes, G, filtered_count
+    measurements = Measurements(
+        ts=np.frombuffer(ts_column, dtype=np.int64),
+        path_id=np.frombuffer(path_id_column, dtype=np.int32),
+        rtt=np.frombuffer(rtt_column, dtype=np.float64),
+    )
+    return measurements, path_to_nodes, G, filtered_count, total_measurements
+
+
+def _json_array_item(entry):
+    """
+    Serializa uma medição no mesmo formato de json.dump(lista, indent=4).
+    """
+    return '    ' + json.dumps(entry, indent=4, ensure_ascii=False).replace('\n', '\n    ')
+
+
+def _timeseries_line(entry):
+    """
+    Gera a linha "timestamp,latência" de uma medição ou None se incompleta.
+    """
+    timestamp = measurement_ts(entry)
+    latency = extract_rtt_from_hops(entry.get('val', []))
+    
+    if timestamp is not None and latency is not None:
+        return f"{timestamp},{latency}\n"
+    return None
 
 
 def export_path_measurements_json(paths_path, path_id, measurements):
     """
     Exporta as medições de um caminho para JSON.
+    As medições são escritas uma a uma, então aceita geradores.
     
     Args:
         paths_path: Diretório paths
         path_id: ID do caminho
-        measurements: Lista de medições
+        measurements: Iterável de medições
     
     Returns:
         Caminho do arquivo criado
     """
     filepath = os.path.join(paths_path, f'{path_id}.json')
     with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(measurements, f, indent=4, ensure_ascii=False)
+        separator = '[\n'
+        for entry in measurements:
+            f.write(separator)
+            f.write(_json_array_item(entry))
+            separator = ',\n'
+        f.write('\n]' if separator != '[\n' else '[]')
     return filepath
 
 
@@ -148,7 +341,7 @@ def export_path_timeseries(paths_path, path_id, measurements):
     Args:
         paths_path: Diretório paths
         path_id: ID do caminho
-        measurements: Lista de medições
+        measurements: Iterável de medições
     
     Returns:
         Caminho do arquivo criado
@@ -159,45 +352,204 @@ def export_path_timeseries(paths_path, path_id, measurements):
         f.write("timestamp,latency_ms\n")
         
         for entry in measurements:
-            timestamp = entry.get('ts')
-            hops = entry.get('val', [])
-            latency = extract_rtt_from_hops(hops)
-            
-            if timestamp is not None and latency is not None:
-                f.write(f"{timestamp},{latency}\n")
+            line = _timeseries_line(entry)
+            if line is not None:
+                f.write(line)
     
     return filepath
 
 
-def find_all_simple_paths(G, origin, destination):
+def _reopen_json_array(filepath):
+    """
+    Remove o fechamento "]" de um array JSON existente para permitir
+    acrescentar elementos.
+    
+    Returns:
+        True se o arquivo existia e tinha elementos; False caso contrário
+    """
+    if not os.path.exists(filepath):
+        return False
+    
+    with open(filepath, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - 64))
+        tail = f.read()
+        closing = tail.rstrip().rfind(b']')
+        if closing < 0 or tail[:closing].rstrip().endswith(b'['):
+            return False
+        
+        # Trunca antes do "\n]" final
+        f.truncate(size - len(tail) + len(tail[:closing].rstrip()))
+    return True
+
+
+class PathStreamWriter:
+    """
+    Exporta medições e séries temporais por caminho à medida que são
+    processadas, mantendo um arquivo aberto por caminho.
+    Produz os mesmos arquivos de export_path_measurements_json e
+    export_path_timeseries, sem acumular as medições em memória.
+    
+    Com append=True, acrescenta as medições aos arquivos já existentes
+    (execução incremental) em vez de sobrescrevê-los.
+    
+    Com compression ('gzip', 'xz' ou 'zstd'), as medições são gravadas em
+    <id>.jsonl<sufixo> (JSON Lines com IPs e hostnames deduplicados, ver
+    compressed_io.DedupJsonLinesWriter) e as séries em
+    <id>_timeseries.txt<sufixo>.
+    
+    Uso:
+        with PathStreamWriter(paths_path) as writer:
+            process_traceroute_data(dados, ip, on_measurement=writer.write)
+    """
+    
+    def __init__(self, paths_path, export_json=True, export_timeseries=True, append=False, compression=None):
+        self.paths_path = paths_path
+        self.export_json = export_json
+        self.export_timeseries = export_timeseries
+        self.append = append
+        self.compression = compression
+        self.suffix = SUFFIXES[compression] if compression else ''
+        self.json_files = {}
+        self.timeseries_files = {}
+        self._json_handles = {}
+        self._timeseries_handles = {}
+    
+    def write(self, path_id, entry):
+        """
+        Escreve uma medição nos arquivos do caminho.
+        
+        Args:
+            path_id: ID do caminho
+            entry: Medição completa do traceroute
+        """
+        if self.export_json and self.compression:
+            handle = self._json_handles.get(path_id)
+            if handle is None:
+                filepath = os.path.join(self.paths_path, f'{path_id}.jsonl{self.suffix}')
+                mode = 'a' if self.append and os.path.exists(filepath) else 'w'
+                handle = self._json_handles[path_id] = DedupJsonLinesWriter(filepath, mode)
+                self.json_files[path_id] = filepath
+            handle.write(entry)
+        elif self.export_json:
+            handle = self._json_handles.get(path_id)
+            if handle is None:
+                filepath = os.path.join(self.paths_path, f'{path_id}.json')
+                if self.append and _reopen_json_array(filepath):
+                    handle = open(filepath, 'a', encoding='utf-8')
+                    handle.write(',\n')
+                else:
+                    handle = open(filepath, 'w', encoding='utf-8')
+                    handle.write('[\n')
+                self._json_handles[path_id] = handle
+                self.json_files[path_id] = filepath
+            else:
+                handle.write(',\n')
+            handle.write(_json_array_item(entry))
+        
+        if self.export_timeseries:
+            handle = self._timeseries_handles.get(path_id)
+            if handle is None:
+                filepath = os.path.join(self.paths_path, f'{path_id}_timeseries.txt{self.suffix}')
+                if self.append and os.path.exists(filepath):
+                    handle = open_text(filepath, 'a')
+                else:
+                    handle = open_text(filepath, 'w')
+                    handle.write("timestamp,latency_ms\n")
+                self._timeseries_handles[path_id] = handle
+                self.timeseries_files[path_id] = filepath
+            line = _timeseries_line(entry)
+            if line is not None:
+                handle.write(line)
+    
+    def close(self):
+        """
+        Finaliza os arrays JSON e fecha todos os arquivos.
+        """
+        for handle in self._json_handles.values():
+            if not self.compression:
+                handle.write('\n]')
+            handle.close()
+        for handle in self._timeseries_handles.values():
+            handle.close()
+        self._json_handles = {}
+        self._timeseries_handles = {}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def find_k_shortest_paths(G, origin, destination, k, max_hops=None):
     """
-    Encontra todos os caminhos simples entre origem e destino.
+    Encontra os k caminhos simples mais curtos (em saltos) entre origem e
+    destino, gerados de forma preguiçosa com nx.shortest_simple_paths.
     
     Args:
         G: Grafo NetworkX
         origin: Nó de origem
         destination: Nó de destino
+        k: Número máximo de caminhos
+        max_hops: Número máximo de saltos por caminho (opcional)
     
     Returns:
-        Lista de caminhos encontrados (ordenados por tamanho)
+        Tupla (caminhos ordenados por tamanho, truncado), onde truncado
+        indica que existem mais caminhos além dos k retornados
     """
     try:
-        all_paths = list(nx.all_simple_paths(G, origin, destination))
+        paths = []
+        for path in nx.shortest_simple_paths(G, origin, destination):
+            if max_hops is not None and len(path) - 1 > max_hops:
+                return paths, False
+            if len(paths) == k:
+                return paths, True
+            paths.append(path)
+        return paths, False
+    except (nx.NodeNotFound, nx.NetworkXNoPath):
+        return [], False
+
+
+def find_all_simple_paths(G, origin, destination, max_hops=None, max_paths=None):
+    """
+    Encontra os caminhos simples entre origem e destino.
+    O número de caminhos cresce exponencialmente com a topologia, então
+    a enumeração pode ser limitada por saltos e/ou por quantidade; com
+    max_paths, são retornados os caminhos mais curtos.
+    
+    Args:
+        G: Grafo NetworkX
+        origin: Nó de origem
+        destination: Nó de destino
+        max_hops: Número máximo de saltos por caminho (opcional)
+        max_paths: Número máximo de caminhos (opcional)
+    
+    Returns:
+        Tupla (caminhos ordenados por tamanho, truncado), onde truncado
+        indica que o limite max_paths foi atingido
+    """
+    if max_paths is not None:
+        return find_k_shortest_paths(G, origin, destination, max_paths, max_hops)
+    
+    try:
+        all_paths = list(nx.all_simple_paths(G, origin, destination, cutoff=max_hops))
         all_paths.sort(key=len)
-        return all_paths
+        return all_paths, False
     except (nx.NodeNotFound, nx.NetworkXNoPath):
-        return []
+        return [], False
 
 
-def export_consolidated_report(base_path, measurements_by_path, path_to_nodes, G, 
+def export_consolidated_report(base_path, latency_state, path_to_nodes, G, 
                                origin_name, destination_name, origin_ip, destination_ip,
-                               filtered_count, total_measurements):
+                               filtered_count, total_measurements, max_hops=None, max_paths=1000):
     """
     Exporta relatório consolidado com todas as informações.
     
     Args:
         base_path: Diretório base de saída
-        measurements_by_path: Medições agrupadas por caminho
+        latency_state: PathLatencyTracker com as estatísticas por caminho
         path_to_nodes: Mapeamento path_id -> lista de IPs
         G: Grafo NetworkX
         origin_name: Nome da origem
@@ -206,35 +558,23 @@ def export_consolidated_report(base_path, measurements_by_path, path_to_nodes, G
         destination_ip: IP de destino
         filtered_count: Número de medições filtradas
         total_measurements: Total de medições no arquivo original
+        max_hops: Limite de saltos na contagem de caminhos possíveis
+        max_paths: Limite de caminhos possíveis enumerados
     
     Returns:
         Caminho do arquivo criado
     """
     filepath = os.path.join(base_path, 'network_analysis_report.txt')
     
-    # Calcula estatísticas de latência por caminho
-    latency_stats = {}
-    for path_id, measurements in measurements_by_path.items():
-        latencies = []
-        for entry in measurements:
-            latency = extract_rtt_from_hops(entry.get('val', []))
-            if latency is not None:
-                latencies.append(latency)
-        
-        if latencies:
-            latency_stats[path_id] = {
-                'count': len(latencies),
-                'min': min(latencies),
-                'max': max(latencies),
-                'avg': sum(latencies) / len(latencies)
-            }
-    
     # Encontra caminhos no grafo
     shortest_path = None
     all_graph_paths = []
+    paths_truncated = False
     try:
         shortest_path = nx.shortest_path(G, origin_ip, destination_ip)
-        all_graph_paths = find_all_simple_paths(G, origin_ip, destination_ip)
+        all_graph_paths, paths_truncated = find_all_simple_paths(
+            G, origin_ip, destination_ip, max_hops=max_hops, max_paths=max_paths
+        )
     except (nx.NetworkXNoPath, nx.NodeNotFound):
         pass
     
@@ -253,7 +593,7 @@ def export_consolidated_report(base_path, measurements_by_path, path_to_nodes, G
         f.write("-"*80 + "\n")
         f.write(f"Total de medições no arquivo: {total_measurements}\n")
         f.write(f"Medições filtradas (não terminam em {destination_ip}): {filtered_count}\n")
-        valid_measurements = sum(len(m) for m in measurements_by_path.values())
+        valid_measurements = latency_state.measurements
         f.write(f"Medições válidas (terminam em {destination_ip}): {valid_measurements}\n")
         f.write(f"Taxa de aproveitamento: {(valid_measurements/total_measurements*100):.2f}%\n\n")
         
@@ -275,8 +615,15 @@ def export_consolidated_report(base_path, measurements_by_path, path_to_nodes, G
         f.write("ANÁLISE DE CAMINHOS\n")
         f.write("="*80 + "\n\n")
         
-        f.write(f"Caminhos OBSERVADOS (medidos): {len(measurements_by_path)}\n")
-        f.write(f"Caminhos POSSÍVEIS (no grafo): {len(all_graph_paths)}\n\n")
+        f.write(f"Caminhos OBSERVADOS (medidos): {len(latency_state)}\n")
+        if paths_truncated:
+            f.write(f"Caminhos POSSÍVEIS (no grafo): mais de {len(all_graph_paths)} "
+                    f"(enumeração TRUNCADA no limite de {max_paths} caminhos)\n")
+        else:
+            f.write(f"Caminhos POSSÍVEIS (no grafo): {len(all_graph_paths)}\n")
+        if max_hops is not None:
+            f.write(f"  (considerando apenas caminhos com até {max_hops} saltos)\n")
+        f.write("\n")
         
         f.write("DIFERENÇA ENTRE CAMINHOS OBSERVADOS E POSSÍVEIS:\n")
         f.write("-"*80 + "\n")
@@ -307,15 +654,17 @@ def export_consolidated_report(base_path, measurements_by_path, path_to_nodes, G
         
         for path_id in sorted(path_to_nodes.keys()):
             nodes = path_to_nodes[path_id]
-            num_measurements = len(measurements_by_path[path_id])
+            stats = latency_state.get(path_id)
+            num_measurements = stats.measurements if stats else 0
             
             f.write(f"Caminho {path_id} ({len(nodes) - 1} saltos, {num_measurements} medições):\n")
             f.write(f"  {' → '.join(nodes)}\n")
             
-            if path_id in latency_stats:
-                stats = latency_stats[path_id]
-                f.write(f"  Latência: mín={stats['min']:.2f}ms, "
-                       f"máx={stats['max']:.2f}ms, média={stats['avg']:.2f}ms\n")
+            if stats and stats.count:
+                f.write(f"  Latência: mín={stats.min:.2f}ms, "
+                       f"máx={stats.max:.2f}ms, média={stats.mean:.2f}ms\n")
+                f.write(f"  Desvio padrão={stats.std:.2f}ms, EWMA={stats.ewma:.2f}ms, "
+                       f"p50≈{stats.quantile(0.5):.2f}ms, p95≈{stats.quantile(0.95):.2f}ms\n")
             f.write("\n")
         
         # LISTA DE TODOS OS NÓS
@@ -329,7 +678,83 @@ def export_consolidated_report(base_path, measurements_by_path, path_to_nodes, G
     return filepath
 
 
-def visualize_graph(G, base_path, origin_ip, destination_ip, path_to_nodes):
+def hops_layout(G, origin_ip):
+    """
+    Layout em camadas pela distância (em saltos) até a origem, com os nós
+    de cada camada ordenados pelo IP. Custo linear e sempre o mesmo
+    resultado para o mesmo grafo.
+    
+    Args:
+        G: Grafo NetworkX
+        origin_ip: Nó da primeira camada
+    
+    Returns:
+        Dicionário {nó: (x, y)}
+    """
+    distance = nx.single_source_shortest_path_length(G, origin_ip) if origin_ip in G else {}
+    unreachable = max(distance.values(), default=-1) + 1
+    
+    layers = {}
+    for node in G.nodes():
+        layers.setdefault(distance.get(node, unreachable), []).append(node)
+    
+    pos = {}
+    num_layers = max(len(layers) - 1, 1)
+    for layer, nodes in layers.items():
+        nodes.sort(key=str)
+        for idx, node in enumerate(nodes):
+            y = 0.0 if len(nodes) == 1 else 1.0 - 2.0 * idx / (len(nodes) - 1)
+            pos[node] = (2.0 * layer / num_layers - 1.0, y)
+    return pos
+
+
+def compute_layout(G, layout='spring', origin_ip=None, cache_path=None):
+    """
+    Calcula as posições dos nós, reaproveitando as de uma execução anterior
+    quando o conjunto de nós e o layout são os mesmos.
+    
+    Args:
+        G: Grafo NetworkX
+        layout: Um de LAYOUTS
+        origin_ip: Origem (primeira camada do layout 'hops')
+        cache_path: Arquivo JSON com as posições em cache (None desativa)
+    
+    Returns:
+        Dicionário {nó: (x, y)}
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"layout deve ser um de {LAYOUTS}: {layout}")
+    
+    nodes_key = hashlib.sha1('\n'.join(sorted(str(node) for node in G.nodes())).encode('utf-8')).hexdigest()
+    
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('layout') == layout and cached.get('nodes_key') == nodes_key:
+            return {node: tuple(cached['positions'][str(node)]) for node in G.nodes()}
+    
+    if layout == 'hops':
+        pos = hops_layout(G, origin_ip)
+    elif layout == 'shell':
+        pos = nx.shell_layout(G)
+    else:
+        try:
+            pos = nx.spring_layout(G, k=2, iterations=50, seed=42)
+        except:
+            pos = nx.shell_layout(G)
+    
+    if cache_path:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'layout': layout,
+                'nodes_key': nodes_key,
+                'positions': {str(node): [float(x), float(y)] for node, (x, y) in pos.items()},
+            }, f)
+    return pos
+
+
+def visualize_graph(G, base_path, origin_ip, destination_ip, path_to_nodes,
+                    layout='spring', image_format='png', dpi=300, labels=None, cache_layout=True):
     """
     Cria visualização do grafo e salva em arquivo.
     
@@ -339,6 +764,11 @@ def visualize_graph(G, base_path, origin_ip, destination_ip, path_to_nodes):
         origin_ip: IP de origem
         destination_ip: IP de destino
         path_to_nodes: Mapeamento path_id -> lista de IPs
+        layout: Um de LAYOUTS ('hops' é o mais barato)
+        image_format: 'png' ou 'svg' (vetorial, sem custo de rasterização)
+        dpi: Resolução do PNG
+        labels: Se desenha os IPs; None desenha só até MAX_LABELED_NODES nós
+        cache_layout: Se True, reaproveita as posições em network_layout.json
     
     Returns:
         Caminho do arquivo de imagem salvo
@@ -346,10 +776,8 @@ def visualize_graph(G, base_path, origin_ip, destination_ip, path_to_nodes):
     plt.figure(figsize=(16, 10))
     
     # Layout do grafo
-    try:
-        pos = nx.spring_layout(G, k=2, iterations=50, seed=42)
-    except:
-        pos = nx.shell_layout(G)
+    cache_path = os.path.join(base_path, 'network_layout.json') if cache_layout else None
+    pos = compute_layout(G, layout, origin_ip, cache_path)
     
     # Configuração de cores
     node_colors = []
@@ -385,9 +813,11 @@ def visualize_graph(G, base_path, origin_ip, destination_ip, path_to_nodes):
                           edgecolors='black', linewidths=2)
     
     # Labels
-    labels = {node: node for node in G.nodes()}
-    nx.draw_networkx_labels(G, pos, labels, font_size=8,
-                           font_weight='bold', font_color='black')
+    if labels is None:
+        labels = G.number_of_nodes() <= MAX_LABELED_NODES
+    if labels:
+        nx.draw_networkx_labels(G, pos, {node: node for node in G.nodes()}, font_size=8,
+                               font_weight='bold', font_color='black')
     
     # Título
     title = f"Topologia de Rede - {len(G.nodes())} nós, {len(G.edges())} arestas"
@@ -410,14 +840,14 @@ def visualize_graph(G, base_path, origin_ip, destination_ip, path_to_nodes):
     plt.legend(handles=legend_elements, loc='upper left', fontsize=10)
     
     # Salva
-    image_path = os.path.join(base_path, 'network_topology.png')
-    plt.savefig(image_path, dpi=300, bbox_inches='tight', facecolor='white')
+    image_path = os.path.join(base_path, f'network_topology.{image_format}')
+    plt.savefig(image_path, format=image_format, dpi=dpi, bbox_inches='tight', facecolor='white')
     plt.close()
     
     return image_path
 
 
-def print_summary(base_path, files_created, measurements_by_path, filtered_count, total_measurements):
+def print_summary(base_path, files_created, latency_state, filtered_count, total_measurements):
     """
     Imprime resumo dos arquivos criados.
     """
@@ -426,14 +856,14 @@ def print_summary(base_path, files_created, measurements_by_path, filtered_count
     print(f"{'='*80}")
     print(f"Diretório: {base_path}\n")
     
-    valid_measurements = sum(len(m) for m in measurements_by_path.values())
+    valid_measurements = latency_state.measurements
     
     print(f"Total de medições no arquivo: {total_measurements}")
     print(f"Medições filtradas (destino incorreto): {filtered_count}")
     print(f"Medições válidas processadas: {valid_measurements}")
     print(f"Taxa de aproveitamento: {(valid_measurements/total_measurements*100):.2f}%\n")
     
-    print(f"Caminhos únicos identificados: {len(measurements_by_path)}\n")
+    print(f"Caminhos únicos identificados: {len(latency_state)}\n")
     
     print("Arquivos criados:")
     for file_type, filepath in files_created.items():
@@ -447,85 +877,279 @@ def print_summary(base_path, files_created, measurements_by_path, filtered_count
     print(f"\n{'='*80}\n")
 
 
-def main():
-    # Configurações
-    origin_name = 'rj'
-    origin_ip = "200.159.254.238"
-    
-    destination_name = 'pi'
-    destination_ip = "200.137.160.129"
+def load_checkpoint(base_path):
+    """
+    Carrega o checkpoint da última execução de um par.
     
-    filepath = f'dataset/Train/traceroute/{origin_name}/measure-traceroute_ref-{origin_name}_pop-{destination_name}.json'
+    Args:
+        base_path: Diretório base do par
     
-    # Cria diretórios
-    base_path, paths_path = create_output_directories(origin_name, destination_name)
-    print(f"✓ Diretórios criados: {base_path}")
+    Returns:
+        Dicionário do checkpoint ou None se não existir
+    """
+    filepath = os.path.join(base_path, 'checkpoint.json')
+    if not os.path.exists(filepath):
+        return None
     
-    # Carrega dados
-    print(f"\n📂 Carregando dados de: {filepath}")
     with open(filepath, 'r', encoding='utf-8') as f:
-        traceroute_data = json.load(f)
-    
-    total_measurements = len(traceroute_data)
-    print(f"✓ Total de medições carregadas: {total_measurements}")
+        checkpoint = json.load(f)
     
-    # Processa dados
-    print(f"\n📊 Processando dados de traceroute...")
-    print(f"🎯 Filtrando apenas caminhos que terminam em: {origin_ip}")
-    measurements_by_path, path_to_nodes, G, filtered_count = process_traceroute_data(
-        traceroute_data, origin_ip
+    # Chaves JSON são strings: restaura os path_ids inteiros
+    checkpoint['path_to_nodes'] = {int(k): v for k, v in checkpoint['path_to_nodes'].items()}
+    # Checkpoints antigos guardavam apenas min/max/soma em 'latency_stats'
+    checkpoint['latency_state'] = PathLatencyTracker.from_dict(
+        checkpoint.get('latency_state', checkpoint.get('latency_stats', {}))
     )
+    checkpoint['edges'] = [tuple(edge) for edge in checkpoint['edges']]
+    return checkpoint
+
+
+def save_checkpoint(base_path, last_ts, path_to_nodes, G, latency_state,
+                    filtered_count, total_measurements, source=None):
+    """
+    Salva o estado necessário para continuar a extração incrementalmente.
     
-    valid_measurements = sum(len(m) for m in measurements_by_path.values())
+    Args:
+        base_path: Diretório base do par
+        last_ts: Último timestamp processado
+        path_to_nodes: Mapeamento path_id -> lista de IPs
+        G: Grafo NetworkX
+        latency_state: PathLatencyTracker acumulado
+        filtered_count: Total acumulado de medições filtradas
+        total_measurements: Total acumulado de medições lidas
+        source: Identificação do arquivo lido (file_fingerprint)
     
-    print(f"✓ Medições válidas: {valid_measurements}/{total_measurements} ({(valid_measurements/total_measurements*100):.2f}%)")
-    print(f"✓ Medições filtradas: {filtered_count}")
-    print(f"✓ Caminhos únicos identificados: {len(measurements_by_path)}")
-    print(f"✓ Nós no grafo: {len(G.nodes())}")
-    print(f"✓ Arestas no grafo: {len(G.edges())}")
+    Returns:
+        Caminho do arquivo criado
+    """
+    filepath = os.path.join(base_path, 'checkpoint.json')
+    checkpoint = {
+        'last_ts': last_ts,
+        'path_to_nodes': {str(k): v for k, v in sorted(path_to_nodes.items())},
+        'edges': [list(edge) for edge in G.edges()],
+        'latency_state': latency_state.to_dict(),
+        'filtered_count': filtered_count,
+        'total_measurements': total_measurements,
+        'source': source,
+    }
     
-    # Exporta arquivos
-    print(f"\n💾 Exportando arquivos...")
+    # Escreve em arquivo temporário para não corromper o checkpoint anterior
+    tmp_filepath = filepath + '.tmp'
+    with open(tmp_filepath, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_filepath, filepath)
+    return filepath
+
+
+def run_extraction(filepath, origin_name, origin_ip, destination_name, destination_ip,
+                   output_root='analysis', export_json=False, incremental=False, verbose=True,
+                   profile=None, render=True, layout='spring', image_format='png', compression=None):
+    """
+    Executa a extração completa de um par origem/destino: leitura,
+    processamento, exportação dos caminhos, relatório, GML e visualização.
     
-    files_created = {}
-    path_files_json = []
-    path_files_ts = []
+    Args:
+        filepath: Arquivo measure-traceroute_ref-*_pop-*.json
+        origin_name: Nome da origem (ref)
+        origin_ip: IP da origem (último salto esperado das medições)
+        destination_name: Nome do destino (pop)
+        destination_ip: IP do destino
+        output_root: Diretório raiz das análises
+        export_json: Se True, também exporta as medições completas em JSON
+        incremental: Se True, processa apenas medições posteriores ao
+                     checkpoint do par e acrescenta às saídas existentes
+        verbose: Se True, imprime o progresso
+        profile: None, 'cprofile' ou 'tracemalloc' (ver metrics.RunMetrics)
+        render: Se False, não gera a imagem da topologia
+        layout: Layout da imagem (ver LAYOUTS)
+        image_format: 'png' ou 'svg'
+        compression: None, 'gzip', 'xz' ou 'zstd' para comprimir as
+                     medições e séries por caminho (ver PathStreamWriter)
     
-    # 1. Exporta medições e séries temporais por caminho
-    for path_id in sorted(measurements_by_path.keys()):
-        measurements = measurements_by_path[path_id]
+    Returns:
+        Dicionário com base_path, files_created, contagens de medições,
+        número de caminhos, nós e arestas
+    """
+    log = print if verbose else (lambda *args, **kwargs: None)
+    
+    # Cria diretórios
+    base_path, paths_path = create_output_directories(origin_name, destination_name, output_root)
+    log(f"✓ Diretórios criados: {base_path}")
+    
+    checkpoint = load_checkpoint(base_path) if incremental else None
+    store_path = os.path.join(paths_path, 'store')
+    if checkpoint is None:
+        # Execução completa: descarta as saídas por caminho de execuções
+        # anteriores (arquivos de caminhos que não existem mais e o armazenamento)
+        shutil.rmtree(paths_path, ignore_errors=True)
+        os.makedirs(paths_path, exist_ok=True)
+    else:
+        log(f"↻ Modo incremental: medições após ts={checkpoint['last_ts']}")
+    
+    # Arquivo igual ao da última execução: nada novo para ler
+    source = [list(item) for item in file_fingerprint(filepath)]
+    if checkpoint is not None and checkpoint.get('source') == source:
+        log(f"✓ {filepath} não mudou desde o checkpoint; nada a processar")
+        latency_state = checkpoint['latency_state']
+        return {
+            'base_path': base_path,
+            'files_created': {},
+            'total_measurements': checkpoint['total_measurements'],
+            'valid_measurements': latency_state.measurements,
+            'filtered_count': checkpoint['filtered_count'],
+            'num_paths': len(checkpoint['path_to_nodes']),
+            'num_nodes': len({node for nodes in checkpoint['path_to_nodes'].values() for node in nodes}),
+            'num_edges': len(checkpoint['edges']),
+        }
+    
+    # Criado após o retorno antecipado; o with encerra o perfilamento
+    # mesmo em caso de exceção (workers do pool são reaproveitados)
+    with RunMetrics('network_extractor', profile=profile) as metrics:
+        # Carrega e processa dados em uma única passada, exportando as
+        # medições por caminho à medida que são lidas
+        log(f"\n📂 Lendo dados de: {filepath}")
+        log(f"📊 Processando dados de traceroute...")
+        log(f"🎯 Filtrando apenas caminhos que terminam em: {origin_ip}")
+        cursor = {}
+        latency_state = checkpoint['latency_state'] if checkpoint is not None else PathLatencyTracker()
+        with metrics.stage('load+process') as stage, \
+                PathStreamWriter(paths_path, export_json=export_json, append=checkpoint is not None,
+                                 compression=compression) as writer, \
+                PathStoreWriter(store_path) as store:
+            # Leitura, processamento e exportação por caminho acontecem na mesma
+            # passada; os sub-temporizadores separam o tempo de cada parte
+            write_paths = stage.timed('export_paths', writer.write)
+            write_store = stage.timed('export_store', store.write)
+        
+            def on_measurement(path_id, entry):
+                write_paths(path_id, entry)
+                write_store(path_id, entry)
+        
+            measurements, path_to_nodes, G, filtered_count, total_measurements = process_traceroute_data(
+                iter_new_measurements(stage.timed_iter('load', iter_traceroute_data(filepath)),
+                                      checkpoint['last_ts'] if checkpoint else None, cursor),
+                origin_ip, on_measurement=on_measurement, checkpoint=checkpoint,
+                latency_state=latency_state
+            )
+            stage.count('measurements', total_measurements)
+            stage.count('valid', len(measurements.ts))
+            stage.count('filtered', filtered_count)
+        
+        log(f"✓ Total de medições lidas: {total_measurements}")
+        
+        valid_measurements = len(measurements.ts)
         
-        # JSON com medições completas
-        json_file = export_path_measurements_json(paths_path, path_id, measurements)
-        path_files_json.append(json_file)
+        if total_measurements:
+            log(f"✓ Medições válidas: {valid_measurements}/{total_measurements} ({(valid_measurements/total_measurements*100):.2f}%)")
+        log(f"✓ Medições filtradas: {filtered_count}")
         
-        # Série temporal
-        ts_file = export_path_timeseries(paths_path, path_id, measurements)
-        path_files_ts.append(ts_file)
+        # Acumula com o checkpoint anterior (latency_state já continua dele)
+        if checkpoint is not None:
+            filtered_count += checkpoint['filtered_count']
+            total_measurements += checkpoint['total_measurements']
+            valid_measurements = latency_state.measurements
+        
+        log(f"✓ Caminhos únicos identificados: {len(path_to_nodes)}")
+        log(f"✓ Nós no grafo: {len(G.nodes())}")
+        log(f"✓ Arestas no grafo: {len(G.edges())}")
+        
+        # Exporta arquivos
+        log(f"\n💾 Exportando arquivos...")
+        
+        files_created = {}
+        
+        # 1. Medições e séries temporais por caminho (escritas durante o processamento)
+        path_files_json = [writer.json_files[path_id] for path_id in sorted(writer.json_files)]
+        path_files_ts = [writer.timeseries_files[path_id] for path_id in sorted(writer.timeseries_files)]
+        
+        if path_files_json:
+            files_created['Medições por caminho (JSON)'] = path_files_json
+        files_created['Séries temporais (TXT)'] = path_files_ts
+        files_created['Medições colunares (NPY)'] = [
+            os.path.join(segment, name)
+            for segment in list_segments(store_path) for name in sorted(os.listdir(segment))
+        ]
+        stage.add_files(path_files_json, path_files_ts, files_created['Medições colunares (NPY)'])
+        
+        # 2. Exporta relatório consolidado
+        with metrics.stage('report') as stage:
+            report_file = export_consolidated_report(
+                base_path, latency_state, path_to_nodes, G, 
+                origin_name, destination_name, origin_ip, destination_ip,
+                filtered_count, total_measurements
+            )
+            stage.add_files(report_file)
+        files_created['Relatório consolidado'] = report_file
+        
+        # 3. Salva grafo GML
+        with metrics.stage('gml') as stage:
+            gml_path = os.path.join(base_path, 'network_topology.gml')
+            nx.write_gml(G, gml_path)
+            stage.add_files(gml_path)
+        files_created['Grafo (GML)'] = gml_path
+        
+        # 4. Visualização
+        if render:
+            with metrics.stage('visualization') as stage:
+                image_path = visualize_graph(G, base_path, origin_ip, destination_ip, path_to_nodes,
+                                             layout=layout, image_format=image_format)
+                stage.add_files(image_path)
+            files_created['Visualização'] = image_path
+        
+        # 5. Checkpoint para a próxima execução incremental
+        with metrics.stage('checkpoint') as stage:
+            files_created['Checkpoint'] = save_checkpoint(
+                base_path, cursor.get('last_ts'), path_to_nodes, G, latency_state,
+                filtered_count, total_measurements, source
+            )
+            stage.add_files(files_created['Checkpoint'])
+        
+        # 6. Métricas da execução
+        files_created['Métricas'] = metrics.save(os.path.join(base_path, 'metrics', 'network_extractor.json'))
+        log(f"\n⏱ Etapas:")
+        for line in metrics.format_table():
+            log(line)
+        
+        # Resumo final
+        if verbose:
+            print_summary(base_path, files_created, latency_state, filtered_count, total_measurements)
+        
+        return {
+            'base_path': base_path,
+            'files_created': files_created,
+            'total_measurements': total_measurements,
+            'valid_measurements': valid_measurements,
+            'filtered_count': filtered_count,
+            'num_paths': len(path_to_nodes),
+            'num_nodes': G.number_of_nodes(),
+            'num_edges': G.number_of_edges(),
+        }
+
+
+def main():
+    # Configurações
+    origin_name = 'rj'
+    origin_ip = "200.159.254.238"
     
-    files_created['Medições por caminho (JSON)'] = path_files_json
-    files_created['Séries temporais (TXT)'] = path_files_ts
+    destination_name = 'pi'
+    destination_ip = "200.137.160.129"
     
-    # 2. Exporta relatório consolidado
-    report_file = export_consolidated_report(
-        base_path, measurements_by_path, path_to_nodes, G, 
-        origin_name, destination_name, origin_ip, destination_ip,
-        filtered_count, total_measurements
-    )
-    files_created['Relatório consolidado'] = report_file
+    filepath = f'dataset/Train/traceroute/{origin_name}/measure-traceroute_ref-{origin_name}_pop-{destination_name}.json'
+    
+    # Perfilamento opcional: None, 'cprofile' ou 'tracemalloc'
+    profile = None
     
-    # 3. Salva grafo GML
-    gml_path = os.path.join(base_path, 'network_topology.gml')
-    nx.write_gml(G, gml_path)
-    files_created['Grafo (GML)'] = gml_path
+    # Visualização: layout 'spring', 'hops' ou 'shell'; formato 'png' ou 'svg'
+    render = True
+    layout = 'spring'
+    image_format = 'png'
     
-    # 4. Visualização
-    image_path = visualize_graph(G, base_path, origin_ip, destination_ip, path_to_nodes)
-    files_created['Visualização'] = image_path
+    # Compressão das medições/séries por caminho: None, 'gzip', 'xz' ou 'zstd'
+    compression = None
     
-    # Resumo final
-    print_summary(base_path, files_created, measurements_by_path, filtered_count, total_measurements)
+    run_extraction(filepath, origin_name, origin_ip, destination_name, destination_ip, profile=profile,
+                   render=render, layout=layout, image_format=image_format, compression=compression)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
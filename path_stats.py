@@ -0,0 +1,279 @@
+import math
+
+
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+
+RANK_KEYS = ('ewma', 'mean', 'min', 'max', 'p50', 'p95', 'p99')
+
+
+class P2Quantile:
+    """
+    Estimativa de um quantil em memória constante pelo algoritmo P²
+    (Jain & Chlamtac, 1985): mantém 5 marcadores cujas alturas são
+    ajustadas por interpolação parabólica a cada nova amostra.
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def update(self, x):
+        q = self.heights
+
+        # As 5 primeiras amostras inicializam os marcadores
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        n = self.positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Ajusta os marcadores centrais que se afastaram da posição desejada
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def value(self):
+        """
+        Returns:
+            Quantil estimado (exato com menos de 5 amostras) ou None
+        """
+        q = self.heights
+        if not q:
+            return None
+        if len(q) < 5:
+            return q[min(len(q) - 1, int(round(self.p * (len(q) - 1))))]
+        return q[2]
+
+    def to_dict(self):
+        return {'p': self.p, 'heights': list(self.heights), 'positions': list(self.positions),
+                'desired': list(self.desired)}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['p'])
+        sketch.heights = list(data['heights'])
+        sketch.positions = list(data['positions'])
+        sketch.desired = list(data['desired'])
+        return sketch
+
+
+class PathLatencyState:
+    """
+    Estado incremental de latência de um caminho, atualizado em O(1) por
+    medição: contagem, mínimo, máximo, média e variância (Welford), média
+    móvel exponencial (EWMA) e quantis aproximados (P²).
+
+    'measurements' conta todas as medições do caminho; 'count', apenas as
+    que têm RTT (como em extract_rtt_from_hops).
+    """
+
+    def __init__(self, alpha=0.1, quantiles=DEFAULT_QUANTILES):
+        self.alpha = alpha
+        self.measurements = 0
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.ewma = None
+        self.last_ts = None
+        self.last_rtt = None
+        self.quantiles = {p: P2Quantile(p) for p in quantiles}
+
+    def update(self, rtt, ts=None):
+        """
+        Acrescenta uma medição.
+
+        Args:
+            rtt: Latência ponta a ponta em ms (None ou NaN se ausente)
+            ts: Timestamp da medição
+        """
+        self.measurements += 1
+        if ts is not None:
+            self.last_ts = ts
+        if rtt is None or rtt != rtt:
+            return
+
+        self.count += 1
+        self.last_rtt = rtt
+        if self.min is None or rtt < self.min:
+            self.min = rtt
+        if self.max is None or rtt > self.max:
+            self.max = rtt
+
+        delta = rtt - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (rtt - self.mean)
+
+        self.ewma = rtt if self.ewma is None else self.ewma + self.alpha * (rtt - self.ewma)
+
+        for sketch in self.quantiles.values():
+            sketch.update(rtt)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def quantile(self, p):
+        """
+        Returns:
+            Quantil p aproximado (p deve estar entre os quantis acompanhados)
+        """
+        return self.quantiles[p].value()
+
+    def summary(self):
+        """
+        Returns:
+            Dicionário com as estatísticas atuais (sem o estado interno)
+        """
+        summary = {
+            'measurements': self.measurements,
+            'count': self.count,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean if self.count else None,
+            'std': self.std if self.count else None,
+            'ewma': self.ewma,
+            'last_ts': self.last_ts,
+        }
+        for p, sketch in self.quantiles.items():
+            summary[f'p{p * 100:g}'] = sketch.value()
+        return summary
+
+    def to_dict(self):
+        return {
+            'alpha': self.alpha,
+            'measurements': self.measurements,
+            'count': self.count,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean,
+            'm2': self.m2,
+            'ewma': self.ewma,
+            'last_ts': self.last_ts,
+            'last_rtt': self.last_rtt,
+            'quantiles': [sketch.to_dict() for sketch in self.quantiles.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(alpha=data.get('alpha', 0.1), quantiles=())
+        for key in ('measurements', 'count', 'min', 'max', 'ewma', 'last_ts', 'last_rtt'):
+            setattr(state, key, data.get(key))
+        state.mean = data.get('mean', 0.0)
+        state.m2 = data.get('m2', 0.0)
+
+        # Checkpoints antigos guardavam apenas a soma
+        if 'sum' in data and 'mean' not in data:
+            state.mean = data['sum'] / data['count'] if data['count'] else 0.0
+
+        state.quantiles = {sketch['p']: P2Quantile.from_dict(sketch) for sketch in data.get('quantiles', [])}
+        for p in DEFAULT_QUANTILES:
+            state.quantiles.setdefault(p, P2Quantile(p))
+        return state
+
+
+class PathLatencyTracker:
+    """
+    Estados de latência de todos os caminhos de um par.
+
+    Uso:
+        tracker = PathLatencyTracker()
+        process_traceroute_data(dados, ip, latency_state=tracker)
+        tracker.rank_paths(by='ewma')
+    """
+
+    def __init__(self, alpha=0.1, quantiles=DEFAULT_QUANTILES):
+        self.alpha = alpha
+        self.quantile_levels = tuple(quantiles)
+        self.paths = {}
+
+    def update(self, path_id, rtt, ts=None):
+        state = self.paths.get(path_id)
+        if state is None:
+            state = PathLatencyState(self.alpha, self.quantile_levels)
+            self.paths[path_id] = state
+        state.update(rtt, ts)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, path_id):
+        return path_id in self.paths
+
+    def get(self, path_id):
+        return self.paths.get(path_id)
+
+    def items(self):
+        return sorted(self.paths.items())
+
+    @property
+    def measurements(self):
+        return sum(state.measurements for state in self.paths.values())
+
+    def rank_paths(self, by='ewma', min_count=1):
+        """
+        Ordena os caminhos pela latência atual, do melhor para o pior.
+
+        Args:
+            by: Estatística usada: 'ewma', 'mean', 'min', 'max', 'p50', 'p95' ou 'p99'
+            min_count: Mínimo de medições com RTT para o caminho entrar no ranking
+
+        Returns:
+            Lista de tuplas (path_id, valor) em ordem crescente de latência
+        """
+        if by not in RANK_KEYS:
+            raise ValueError(f"by deve ser um de {RANK_KEYS}: {by}")
+
+        ranking = []
+        for path_id, state in self.paths.items():
+            if state.count < min_count:
+                continue
+            if by.startswith('p'):
+                value = state.quantile(int(by[1:]) / 100)
+            else:
+                value = getattr(state, by)
+            ranking.append((path_id, value))
+
+        return sorted(ranking, key=lambda item: (item[1], item[0]))
+
+    def to_dict(self):
+        return {str(path_id): state.to_dict() for path_id, state in self.items()}
+
+    @classmethod
+    def from_dict(cls, data, alpha=0.1, quantiles=DEFAULT_QUANTILES):
+        tracker = cls(alpha, quantiles)
+        tracker.paths = {int(path_id): PathLatencyState.from_dict(state) for path_id, state in data.items()}
+        return tracker
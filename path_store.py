@@ -0,0 +1,378 @@
+import json
+import os
+import shutil
+from array import array
+from collections import namedtuple
+
+import numpy as np
+
+
+# Estrutura em disco:
+#
+#   store/
+#       ips.json            lista de IPs (o índice na lista é o id do IP)
+#       paths.json          {path_id: [ids dos IPs do caminho]}
+#       segment-00000/      um segmento por escrita (append-only)
+#           ts.npy          int64   timestamp de cada medição
+#           path_id.npy     int32   caminho de cada medição
+#           rtt.npy         float64 latência ponta a ponta (NaN se ausente)
+#           hop_offsets.npy int64   início dos hops de cada medição (n + 1 valores)
+#           hop_ip.npy      int32   id do IP de cada hop
+#           hop_rtt.npy     float64 RTT de cada hop (NaN se ausente)
+#
+# Os arquivos .npy podem ser mapeados em memória (np.load com mmap_mode),
+# então a leitura não exige parsing.
+
+COLUMNS = ('ts', 'path_id', 'rtt', 'hop_offsets', 'hop_ip', 'hop_rtt')
+
+PathStore = namedtuple('PathStore', COLUMNS + ('ips', 'paths'))
+
+
+def measurement_ts(entry):
+    """
+    Timestamp de uma medição como inteiro (segundos).
+    
+    Args:
+        entry: Medição do traceroute
+    
+    Returns:
+        Timestamp inteiro, ou None se ts está ausente ou não é numérico
+    """
+    ts = entry.get('ts')
+    if ts is None or isinstance(ts, bool):
+        return None
+    try:
+        return int(ts)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _load_metadata(store_dir):
+    """
+    Carrega a tabela de IPs e o catálogo de caminhos do armazenamento.
+    
+    Returns:
+        Tupla (lista de IPs, {path_id: [ids dos IPs]})
+    """
+    ips = []
+    paths = {}
+    
+    ips_path = os.path.join(store_dir, 'ips.json')
+    if os.path.exists(ips_path):
+        with open(ips_path, 'r', encoding='utf-8') as f:
+            ips = json.load(f)
+    
+    paths_path = os.path.join(store_dir, 'paths.json')
+    if os.path.exists(paths_path):
+        with open(paths_path, 'r', encoding='utf-8') as f:
+            paths = {int(path_id): nodes for path_id, nodes in json.load(f).items()}
+    
+    return ips, paths
+
+
+def list_segments(store_dir):
+    """
+    Lista os segmentos do armazenamento em ordem de escrita.
+    
+    Args:
+        store_dir: Diretório do armazenamento
+    
+    Returns:
+        Lista de caminhos dos diretórios de segmento
+    """
+    if not os.path.isdir(store_dir):
+        return []
+    return [os.path.join(store_dir, name) for name in sorted(os.listdir(store_dir))
+            if name.startswith('segment-')]
+
+
+class PathStoreWriter:
+    """
+    Grava medições de traceroute em formato colunar (arrays NumPy .npy).
+    
+    As medições são acumuladas em arrays compactos e gravadas como um novo
+    segmento a cada segment_rows medições e no close(). Segmentos
+    existentes são preservados, o que permite acrescentar dados novos
+    mantendo os ids de IPs e caminhos. Com compact=True, close() junta os
+    segmentos em um só (compact_path_store), para que load_path_store
+    continue mapeando os arrays sem cópia após execuções incrementais.
+    
+    Uso:
+        with PathStoreWriter(store_dir) as store:
+            process_traceroute_data(dados, ip, on_measurement=store.write)
+    """
+    
+    def __init__(self, store_dir, segment_rows=1_000_000, compact=True):
+        self.store_dir = store_dir
+        self.segment_rows = segment_rows
+        self.compact = compact
+        os.makedirs(store_dir, exist_ok=True)
+        
+        self.ips, self.paths = _load_metadata(store_dir)
+        self._ip_index = {ip: idx for idx, ip in enumerate(self.ips)}
+        self._next_segment = len(list_segments(store_dir))
+        self.skipped = 0
+        self._reset_buffers()
+    
+    def _reset_buffers(self):
+        self._ts = array('q')
+        self._path_id = array('i')
+        self._rtt = array('d')
+        self._hop_counts = array('q')
+        self._hop_ip = array('i')
+        self._hop_rtt = array('d')
+    
+    def _intern(self, ip):
+        idx = self._ip_index.get(ip)
+        if idx is None:
+            idx = len(self.ips)
+            self.ips.append(ip)
+            self._ip_index[ip] = idx
+        return idx
+    
+    def write(self, path_id, entry):
+        """
+        Acrescenta uma medição ao segmento em construção.
+        Considera apenas os hops com IP, como extract_path_from_hops.
+        Medições sem ts numérico são descartadas (contadas em skipped).
+        
+        Args:
+            path_id: ID do caminho
+            entry: Medição completa do traceroute
+        
+        Returns:
+            True se a medição foi gravada
+        """
+        ts = measurement_ts(entry)
+        if ts is None:
+            self.skipped += 1
+            return False
+        
+        nan = float('nan')
+        rtt = nan
+        hop_count = 0
+        
+        for hop in entry.get('val', []):
+            if 'ip' in hop and hop['ip']:
+                hop_rtt = hop.get('rtt')
+                self._hop_ip.append(self._intern(hop['ip']))
+                self._hop_rtt.append(nan if hop_rtt is None else hop_rtt)
+                hop_count += 1
+                
+                # Latência ponta a ponta = último hop com RTT (extract_rtt_from_hops)
+                if hop_rtt is not None:
+                    rtt = hop_rtt
+        
+        self._ts.append(ts)
+        self._path_id.append(path_id)
+        self._rtt.append(rtt)
+        self._hop_counts.append(hop_count)
+        
+        if path_id not in self.paths:
+            start = len(self._hop_ip) - hop_count
+            self.paths[path_id] = self._hop_ip[start:].tolist()
+        
+        if len(self._ts) >= self.segment_rows:
+            self.flush()
+        return True
+    
+    def flush(self):
+        """
+        Grava as medições acumuladas como um novo segmento.
+        """
+        if len(self._ts) == 0:
+            return
+        
+        segment_dir = os.path.join(self.store_dir, f'segment-{self._next_segment:05d}')
+        os.makedirs(segment_dir, exist_ok=True)
+        
+        hop_offsets = np.zeros(len(self._hop_counts) + 1, dtype=np.int64)
+        np.cumsum(np.frombuffer(self._hop_counts, dtype=np.int64), out=hop_offsets[1:])
+        
+        columns = {
+            'ts': np.frombuffer(self._ts, dtype=np.int64),
+            'path_id': np.frombuffer(self._path_id, dtype=np.int32),
+            'rtt': np.frombuffer(self._rtt, dtype=np.float64),
+            'hop_offsets': hop_offsets,
+            'hop_ip': np.frombuffer(self._hop_ip, dtype=np.int32),
+            'hop_rtt': np.frombuffer(self._hop_rtt, dtype=np.float64),
+        }
+        for name, values in columns.items():
+            np.save(os.path.join(segment_dir, f'{name}.npy'), values)
+        
+        self._next_segment += 1
+        self._reset_buffers()
+        self._save_metadata()
+    
+    def _save_metadata(self):
+        with open(os.path.join(self.store_dir, 'ips.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.ips, f)
+        with open(os.path.join(self.store_dir, 'paths.json'), 'w', encoding='utf-8') as f:
+            json.dump({str(path_id): nodes for path_id, nodes in sorted(self.paths.items())}, f)
+    
+    def close(self):
+        """
+        Grava o segmento pendente e os metadados (e compacta, com compact).
+        """
+        self.flush()
+        self._save_metadata()
+        if self.compact:
+            compact_path_store(self.store_dir)
+            self._next_segment = len(list_segments(self.store_dir))
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def compact_path_store(store_dir):
+    """
+    Junta os segmentos do armazenamento em um único segmento. Cada coluna
+    é copiada segmento a segmento para um .npy mapeado em memória, sem
+    carregar o armazenamento inteiro; os segmentos antigos só são
+    removidos depois que o novo está completo.
+    
+    Args:
+        store_dir: Diretório do armazenamento
+    
+    Returns:
+        Número de segmentos antes da compactação
+    """
+    segments = list_segments(store_dir)
+    if len(segments) <= 1:
+        return len(segments)
+    
+    tmp_dir = os.path.join(store_dir, 'compact.tmp')
+    old_dir = os.path.join(store_dir, 'compact.old')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    
+    for name in COLUMNS:
+        parts = [np.load(os.path.join(segment, f'{name}.npy'), mmap_mode='r') for segment in segments]
+        if name == 'hop_offsets':
+            # Offsets de cada segmento reposicionados após os anteriores
+            total = sum(len(part) - 1 for part in parts) + 1
+        else:
+            total = sum(len(part) for part in parts)
+        
+        filepath = os.path.join(tmp_dir, f'{name}.npy')
+        if total == 0:
+            np.save(filepath, np.empty(0, dtype=parts[0].dtype))
+            continue
+        
+        out = np.lib.format.open_memmap(filepath, mode='w+', dtype=parts[0].dtype, shape=(total,))
+        if name == 'hop_offsets':
+            out[0] = 0
+            pos, base = 1, 0
+            for part in parts:
+                out[pos:pos + len(part) - 1] = part[1:] + base
+                pos += len(part) - 1
+                base += int(part[-1])
+        else:
+            pos = 0
+            for part in parts:
+                out[pos:pos + len(part)] = part
+                pos += len(part)
+        out.flush()
+        del out
+    
+    # Troca: os segmentos antigos saem por rename antes de o novo entrar
+    shutil.rmtree(old_dir, ignore_errors=True)
+    os.makedirs(old_dir)
+    for segment in segments:
+        os.replace(segment, os.path.join(old_dir, os.path.basename(segment)))
+    os.replace(tmp_dir, os.path.join(store_dir, 'segment-00000'))
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return len(segments)
+
+
+def load_path_store(store_dir, mmap=True):
+    """
+    Carrega o armazenamento colunar de um par.
+    Com um único segmento e mmap=True, os arrays são mapeados diretamente
+    do disco (sem cópia). Com vários segmentos (gravados com
+    compact=False), as colunas são concatenadas em memória; use
+    compact_path_store para voltar ao mapeamento sem cópia.
+    
+    Args:
+        store_dir: Diretório do armazenamento
+        mmap: Se True, mapeia os arquivos em memória
+    
+    Returns:
+        PathStore com as colunas, a tabela de IPs e o catálogo de caminhos
+    """
+    ips, paths = _load_metadata(store_dir)
+    mmap_mode = 'r' if mmap else None
+    
+    segments = [{name: np.load(os.path.join(segment_dir, f'{name}.npy'), mmap_mode=mmap_mode)
+                 for name in COLUMNS}
+                for segment_dir in list_segments(store_dir)]
+    
+    if len(segments) == 1:
+        columns = segments[0]
+    elif not segments:
+        columns = {
+            'ts': np.empty(0, dtype=np.int64),
+            'path_id': np.empty(0, dtype=np.int32),
+            'rtt': np.empty(0, dtype=np.float64),
+            'hop_offsets': np.zeros(1, dtype=np.int64),
+            'hop_ip': np.empty(0, dtype=np.int32),
+            'hop_rtt': np.empty(0, dtype=np.float64),
+        }
+    else:
+        columns = {name: np.concatenate([segment[name] for segment in segments])
+                   for name in ('ts', 'path_id', 'rtt', 'hop_ip', 'hop_rtt')}
+        
+        # Reposiciona os offsets de cada segmento após os anteriores
+        offsets = [np.zeros(1, dtype=np.int64)]
+        base = 0
+        for segment in segments:
+            offsets.append(np.asarray(segment['hop_offsets'][1:]) + base)
+            base += int(segment['hop_offsets'][-1])
+        columns['hop_offsets'] = np.concatenate(offsets)
+    
+    return PathStore(ips=ips, paths=paths, **columns)
+
+
+def path_series(store, drop_missing=True):
+    """
+    Separa as colunas ts/rtt do armazenamento por caminho.
+    
+    Args:
+        store: PathStore carregado por load_path_store
+        drop_missing: Se True, descarta medições sem RTT
+    
+    Returns:
+        Dicionário {path_id: (timestamps, latências)} com arrays NumPy
+    """
+    ts = np.asarray(store.ts)
+    rtt = np.asarray(store.rtt)
+    path_ids = np.asarray(store.path_id)
+    
+    if drop_missing:
+        valid = ~np.isnan(rtt)
+        ts, rtt, path_ids = ts[valid], rtt[valid], path_ids[valid]
+    
+    order = np.argsort(path_ids, kind='stable')
+    unique_ids, starts = np.unique(path_ids[order], return_index=True)
+    ends = np.append(starts[1:], len(order))
+    
+    return {int(path_id): (ts[order[start:end]], rtt[order[start:end]])
+            for path_id, start, end in zip(unique_ids, starts, ends)}
+
+
+def measurement_hops(store, index):
+    """
+    Retorna os hops de uma medição do armazenamento.
+    
+    Args:
+        store: PathStore carregado por load_path_store
+        index: Posição da medição
+    
+    Returns:
+        Tupla (ids dos IPs, RTTs) dos hops da medição
+    """
+    start, end = store.hop_offsets[index], store.hop_offsets[index + 1]
+    return store.hop_ip[start:end], store.hop_rtt[start:end]
@@ -0,0 +1,268 @@
+import argparse
+import heapq
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from batch_extractor import build_manifest
+from network_extractor import extract_path_from_hops, iter_traceroute_data, load_checkpoint
+from path_store import measurement_ts
+
+
+class RouteChangeDetector:
+    """
+    Detecta trocas de caminho na sequência (ts, path_id) de um par, em uma
+    única passada e com memória constante (contadores por caminho).
+
+    Uma troca A -> B -> A em que o par ficou em B por menos de
+    flap_window segundos conta como oscilação (flap).
+
+    Uso:
+        detector = RouteChangeDetector()
+        for ts, path_id in sequence:
+            event = detector.update(ts, path_id)
+            if event:
+                print(event)
+        detector.summary()
+    """
+
+    def __init__(self, flap_window=3600):
+        self.flap_window = flap_window
+        self.current = None
+        self.previous = None
+        self.since = None
+        self.first_ts = None
+        self.last_ts = None
+        self.measurements = 0
+        self.changes = 0
+        self.flaps = 0
+        self.dwell = {}
+
+    def _add_dwell(self, path_id, seconds):
+        stats = self.dwell.setdefault(path_id, {'periods': 0, 'seconds': 0, 'max_seconds': 0})
+        stats['periods'] += 1
+        stats['seconds'] += seconds
+        stats['max_seconds'] = max(stats['max_seconds'], seconds)
+
+    def update(self, ts, path_id):
+        """
+        Registra uma medição (em ordem de tempo).
+
+        Returns:
+            Evento {ts, from_path, to_path, dwell_s, flap} quando o caminho
+            mudou, senão None
+        """
+        self.measurements += 1
+        if self.first_ts is None:
+            self.first_ts = ts
+        last_ts, self.last_ts = self.last_ts, ts
+
+        if self.current is None:
+            self.current, self.since = path_id, ts
+            return None
+        if path_id == self.current:
+            return None
+
+        # A troca aconteceu entre a última medição no caminho anterior e esta
+        dwell = ts - self.since
+        flap = path_id == self.previous and dwell < self.flap_window
+        event = {'ts': ts, 'from_path': self.current, 'to_path': path_id, 'dwell_s': dwell,
+                 'last_seen_ts': last_ts, 'flap': flap}
+
+        self._add_dwell(self.current, dwell)
+        self.changes += 1
+        self.flaps += flap
+        self.previous, self.current, self.since = self.current, path_id, ts
+        return event
+
+    def summary(self):
+        """
+        Returns:
+            Dicionário com contagens, taxas por dia e permanência por caminho
+        """
+        span_days = (self.last_ts - self.first_ts) / 86400 if self.measurements else 0
+        dwell = {path_id: dict(stats) for path_id, stats in self.dwell.items()}
+        if self.current is not None:
+            # Período em andamento (ainda sem troca)
+            dwell.setdefault(self.current, {'periods': 0, 'seconds': 0, 'max_seconds': 0})
+            dwell[self.current]['current_seconds'] = self.last_ts - self.since
+
+        return {
+            'measurements': self.measurements,
+            'first_ts': self.first_ts,
+            'last_ts': self.last_ts,
+            'changes': self.changes,
+            'flaps': self.flaps,
+            'changes_per_day': self.changes / span_days if span_days else 0.0,
+            'flaps_per_day': self.flaps / span_days if span_days else 0.0,
+            'current_path': self.current,
+            'dwell': {str(path_id): stats for path_id, stats in sorted(dwell.items())},
+        }
+
+
+def iter_path_sequence(traceroute_data, destination_ip, path_to_nodes=None, reorder=32, counters=None):
+    """
+    Converte as medições em (ts, path_id) na ordem do tempo, identificando
+    os caminhos como process_traceroute_data (IPs em ordem, apenas medições
+    que terminam em destination_ip).
+
+    Args:
+        traceroute_data: Iterável de medições
+        destination_ip: IP de destino esperado (último salto)
+        path_to_nodes: Caminhos já conhecidos (ex: checkpoint do par), para
+                       manter os mesmos path_ids da extração
+        reorder: Tamanho do buffer que reordena medições levemente fora de
+                 ordem; medições mais antigas que a última emitida são descartadas
+        counters: Dicionário opcional que recebe total, filtered, invalid_ts
+                  (medições sem ts numérico, descartadas) e out_of_order
+
+    Yields:
+        Tuplas (ts, path_id)
+    """
+    counters = {} if counters is None else counters
+    counters.update(total=0, filtered=0, invalid_ts=0, out_of_order=0)
+    path_to_id = {tuple(nodes): path_id for path_id, nodes in (path_to_nodes or {}).items()}
+    next_id = max(path_to_id.values(), default=-1) + 1
+
+    buffer = []
+    seq = 0
+    emitted_ts = None
+    for entry in traceroute_data:
+        counters['total'] += 1
+        ts = measurement_ts(entry)
+        if ts is None:
+            counters['invalid_ts'] += 1
+            continue
+
+        nodes = tuple(extract_path_from_hops(entry.get('val', [])))
+        if not nodes or nodes[-1] != destination_ip:
+            counters['filtered'] += 1
+            continue
+
+        path_id = path_to_id.get(nodes)
+        if path_id is None:
+            path_id = path_to_id[nodes] = next_id
+            next_id += 1
+
+        if emitted_ts is not None and ts < emitted_ts:
+            counters['out_of_order'] += 1
+            continue
+
+        heapq.heappush(buffer, (ts, seq, path_id))
+        seq += 1
+        if len(buffer) > reorder:
+            emitted_ts, _, emitted_path = heapq.heappop(buffer)
+            yield emitted_ts, emitted_path
+
+    while buffer:
+        ts, _, path_id = heapq.heappop(buffer)
+        yield ts, path_id
+
+
+def detect_route_changes(filepath, destination_ip, output_filepath=None, path_to_nodes=None, flap_window=3600):
+    """
+    Processa um arquivo de traceroute e grava os eventos de troca de caminho
+    (um JSON por linha) à medida que são detectados.
+
+    Args:
+        filepath: Arquivo measure-traceroute_ref-*_pop-*.json
+        destination_ip: IP de destino esperado (último salto)
+        output_filepath: Arquivo .jsonl de eventos (None não grava)
+        path_to_nodes: Caminhos já conhecidos (ver iter_path_sequence)
+        flap_window: Ver RouteChangeDetector
+
+    Returns:
+        Resumo do RouteChangeDetector com as contagens da leitura
+    """
+    detector = RouteChangeDetector(flap_window)
+    counters = {}
+    sequence = iter_path_sequence(iter_traceroute_data(filepath), destination_ip, path_to_nodes, counters=counters)
+
+    out = None
+    if output_filepath:
+        os.makedirs(os.path.dirname(output_filepath) or '.', exist_ok=True)
+        out = open(output_filepath, 'w', encoding='utf-8')
+    try:
+        for ts, path_id in sequence:
+            event = detector.update(ts, path_id)
+            if event and out:
+                out.write(json.dumps(event) + '\n')
+    finally:
+        if out:
+            out.close()
+
+    return {**detector.summary(), **counters}
+
+
+def _detect_pair(task, output_root, flap_window):
+    """
+    Detecta as trocas de um par do manifesto (executado em um processo do pool).
+    """
+    start = time.perf_counter()
+    base_path = os.path.join(output_root, task['origin'], f"{task['origin']}-{task['destination']}")
+    checkpoint = load_checkpoint(base_path) if os.path.isdir(base_path) else None
+    try:
+        # O último salto das medições é a origem (ref), como em run_extraction
+        summary = detect_route_changes(task['filepath'], task['origin_ip'],
+                                       os.path.join(base_path, 'route_changes.jsonl'),
+                                       checkpoint['path_to_nodes'] if checkpoint else None, flap_window)
+        error = None
+    except Exception as e:
+        summary = {}
+        error = f"{type(e).__name__}: {e}"
+    return {**task, **summary, 'elapsed_s': time.perf_counter() - start, 'error': error}
+
+
+def run_route_changes(manifest, output_root='analysis', workers=None, flap_window=3600):
+    """
+    Detecta as trocas de caminho de todos os pares do manifesto em paralelo.
+
+    Returns:
+        Lista de resumos por par, na ordem do manifesto
+    """
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_detect_pair, task, output_root, flap_window): idx
+                   for idx, task in enumerate(manifest)}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+
+            pair = f"{result['origin']}-{result['destination']}"
+            if result['error']:
+                print(f"❌ {pair:10s} {result['error']}")
+            else:
+                print(f"✓ {pair:10s} {result['changes']:6d} trocas ({result['changes_per_day']:.2f}/dia), "
+                      f"{result['flaps']} oscilações ({result['flaps_per_day']:.2f}/dia)")
+    return [results[idx] for idx in range(len(manifest))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Detecção de trocas e oscilações de caminho de todos os pares.')
+    parser.add_argument('--root', default='dataset/Train/traceroute',
+                        help='Diretório com os arquivos measure-traceroute_ref-*_pop-*.json')
+    parser.add_argument('--output', default='analysis', help='Diretório raiz de saída')
+    parser.add_argument('--workers', type=int, default=None, help='Número de processos (padrão: CPUs)')
+    parser.add_argument('--manifest', default=None, help='Arquivo JSON do manifesto de pares/IPs')
+    parser.add_argument('--flap-window', type=int, default=3600,
+                        help='Volta ao caminho anterior em menos de N segundos conta como oscilação')
+    args = parser.parse_args()
+
+    print(f"📂 Procurando arquivos em: {args.root}")
+    manifest = build_manifest(args.root, manifest_path=args.manifest)
+    print(f"✓ Pares encontrados: {len(manifest)}")
+    if not manifest:
+        return
+
+    results = run_route_changes(manifest, args.output, args.workers, args.flap_window)
+
+    summary_path = os.path.join(args.output, 'route_changes.json')
+    os.makedirs(args.output, exist_ok=True)
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=4, ensure_ascii=False)
+    print(f"✓ Resumo por par salvo em: {summary_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from series_index import open_series_index
+from util import path_ids_from_columns
+
+
+# Rótulo de label_routes (util.py, fill_label) para linhas sem nenhuma latência
+NO_ROUTE_LABEL = 0
+
+
+def load_path_catalogue(filepath):
+    """
+    Carrega o catálogo de caminhos de um par, a partir do paths.json
+    exportado pelo extrator ([{path_id, path_nodes}]) ou do checkpoint.json.
+
+    Args:
+        filepath: Caminho do paths.json ou checkpoint.json
+
+    Returns:
+        Dicionário {path_id: lista de IPs}
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if isinstance(data, list):
+        return {int(item['path_id']): item['path_nodes'] for item in data}
+    return {int(path_id): nodes for path_id, nodes in data['path_to_nodes'].items()}
+
+
+def train_selector_model(latency_filepath, model_filepath, estimator=None):
+    """
+    Treina um modelo de seleção de rota com todas as linhas do
+    routes_latency.csv (rótulos do oráculo) e o salva com joblib, junto
+    com as colunas de entrada (o rótulo n é a n-ésima coluna).
+
+    Args:
+        latency_filepath: Caminho do routes_latency.csv
+        model_filepath: Arquivo .joblib de saída
+        estimator: Classificador scikit-learn (padrão: RandomForest)
+
+    Returns:
+        Modelo treinado
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from walk_forward import load_routes_dataset
+
+    _, latencies, labels = load_routes_dataset(latency_filepath)
+    columns = pd.read_csv(latency_filepath, nrows=0).columns[1:].tolist()
+    model = estimator if estimator is not None else RandomForestClassifier(random_state=0)
+    model.fit(latencies, labels)
+    joblib.dump({'model': model, 'columns': columns}, model_filepath)
+    return model
+
+
+def load_selector_model(model_filepath, latency_filepath=None):
+    """
+    Carrega um modelo salvo por train_selector_model.
+
+    Args:
+        model_filepath: Arquivo .joblib
+        latency_filepath: routes_latency.csv do treino; só é lido para
+                          modelos salvos sem as colunas de entrada
+
+    Returns:
+        Tupla (modelo, path_ids das colunas de entrada, na ordem do modelo)
+    """
+    saved = joblib.load(model_filepath)
+    if isinstance(saved, dict):
+        return saved['model'], path_ids_from_columns(saved['columns'])
+
+    if latency_filepath is None or not os.path.exists(latency_filepath):
+        raise ValueError(f"{model_filepath} não guarda as colunas de entrada; treine novamente")
+    return saved, path_ids_from_columns(pd.read_csv(latency_filepath, nrows=0).columns[1:])
+
+
+class LatencyCounters:
+    """
+    Guarda as últimas `size` latências de atendimento (em microssegundos)
+    num buffer circular e calcula p50/p99 sob demanda.
+    """
+
+    def __init__(self, size=100_000):
+        self._samples = np.zeros(size)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def record(self, values_us):
+        with self._lock:
+            for value in values_us:
+                self._samples[self._count % len(self._samples)] = value
+                self._count += 1
+
+    def snapshot(self):
+        """
+        Returns:
+            Dicionário com requests, p50_us, p99_us e max_us
+        """
+        with self._lock:
+            samples = self._samples[:min(self._count, len(self._samples))].copy()
+            count = self._count
+
+        if len(samples) == 0:
+            return {'requests': 0}
+        p50, p99 = np.percentile(samples, [50, 99])
+        return {'requests': count, 'p50_us': float(p50), 'p99_us': float(p99), 'max_us': float(samples.max())}
+
+
+class RouteSelector:
+    """
+    Seleciona o melhor caminho de cada par a partir do vetor de latências
+    mais recente por caminho.
+
+    Pedidos concorrentes são acumulados por até max_wait_us (ou max_batch
+    pedidos) e atendidos com uma única chamada a predict por par. Cada par
+    tem o modelo, o catálogo de caminhos e os path_ids das colunas de
+    entrada do modelo (load_selector_model), que traduzem os rótulos.
+
+    Uso:
+        selector = RouteSelector({'rj-es': (modelo, path_to_nodes, [0, 1, 3])})
+        selector.start()
+        path_id = selector.select('rj-es', [12.1, 13.4, 30.2])
+    """
+
+    def __init__(self, pairs, max_batch=256, max_wait_us=200, indexes=None):
+        self.pairs = pairs
+        self.indexes = indexes or {}
+        self.max_batch = max_batch
+        self.max_wait = max_wait_us / 1e6
+        self.counters = LatencyCounters()
+        self.batches = 0
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, pair, latencies):
+        """
+        Enfileira um pedido.
+
+        Args:
+            pair: Par origem-destino (ex: 'rj-es')
+            latencies: Latência mais recente de cada caminho, na ordem das
+                colunas de entrada do modelo
+
+        Returns:
+            Future com o path_id escolhido (None se o modelo não indica
+            nenhum caminho)
+        """
+        if pair not in self.pairs:
+            raise KeyError(f"Par desconhecido: {pair}")
+        self._check_width(pair, len(latencies))
+
+        future = Future()
+        self._queue.put((pair, latencies, future, time.perf_counter()))
+        return future
+
+    def select(self, pair, latencies):
+        """
+        Seleciona o caminho de um pedido (bloqueia até o lote ser atendido).
+        """
+        return self.submit(pair, latencies).result()
+
+    def select_many(self, pair, batch):
+        """
+        Seleciona caminhos para vários vetores de um mesmo par, sem passar
+        pela fila.
+
+        Returns:
+            Lista de path_ids; None onde o modelo prevê NO_ROUTE_LABEL
+        """
+        model, _, path_ids = self.pairs[pair]
+        batch = np.asarray(batch, dtype=float)
+        if batch.ndim != 2:
+            raise ValueError(f"{pair}: o lote deve ser uma lista de vetores de latência")
+        self._check_width(pair, batch.shape[1])
+
+        # Rótulos são 1-based: n = n-ésima coluna de entrada do modelo
+        labels = model.predict(batch)
+        return [None if label == NO_ROUTE_LABEL else path_ids[int(label) - 1] for label in labels]
+
+    def _check_width(self, pair, width):
+        expected = len(self.pairs[pair][2])
+        if width != expected:
+            raise ValueError(f"{pair}: vetor com {width} latências, o modelo espera {expected} "
+                             f"(caminhos {self.pairs[pair][2]})")
+
+    def _collect(self):
+        item = self._queue.get()
+        if item is None:
+            return None
+
+        batch = [item]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+
+            by_pair = {}
+            for item in batch:
+                by_pair.setdefault(item[0], []).append(item)
+
+            for pair, items in by_pair.items():
+                try:
+                    path_ids = self.select_many(pair, [latencies for _, latencies, _, _ in items])
+                except Exception as exc:
+                    for _, _, future, _ in items:
+                        future.set_exception(exc)
+                    continue
+
+                now = time.perf_counter()
+                for (_, _, future, started), path_id in zip(items, path_ids):
+                    future.set_result(path_id)
+                self.counters.record([(now - started) * 1e6 for _, _, _, started in items])
+
+            self.batches += 1
+
+    def stats(self):
+        """
+        Returns:
+            Contadores de latência (p50/p99 em µs) e número de lotes; um
+            pedido "batch" conta como um pedido, com o tempo do lote inteiro
+        """
+        return dict(self.counters.snapshot(), batches=self.batches)
+
+    def handle(self, request):
+        """
+        Atende um pedido do protocolo JSON:
+            {"pair": "rj-es", "latencies": [...]}     -> {"pathId": 0, "nodes": [...]}
+            {"pair": "rj-es", "batch": [[...], ...]}  -> {"pathIds": [0, 2, ...]}
+            {"pair": "rj-es", "at": 1718359167}       -> {"pathId": 0, "nodes": [...]}
+            {"stats": true}                           -> contadores
+
+        Com "at", as latências são as últimas medidas até o instante,
+        lidas do índice de séries do par (indexes). Quando o modelo não
+        indica nenhum caminho, a resposta é {"pathId": null, "error": ...}
+        (em lote, null na posição do vetor).
+        """
+        if request.get('stats'):
+            return self.stats()
+
+        pair = request['pair']
+        if 'batch' in request:
+            # Lotes não passam pela fila, mas entram nos contadores de latência
+            started = time.perf_counter()
+            path_ids = self.select_many(pair, request['batch'])
+            self.counters.record([(time.perf_counter() - started) * 1e6])
+            return {'pathIds': path_ids}
+
+        if 'at' in request:
+            if pair not in self.indexes:
+                raise KeyError(f"Par sem índice de séries: {pair}")
+            # Mesmos caminhos e ordem das colunas de entrada do modelo
+            latencies = self.indexes[pair].latest(request['at'], path_ids=self.pairs[pair][2]).tolist()
+        else:
+            latencies = request['latencies']
+
+        path_id = self.select(pair, latencies)
+        if path_id is None:
+            return {'pathId': None, 'error': f"Nenhum caminho com latência válida para {pair}"}
+        return {'pathId': path_id, 'nodes': self.pairs[pair][1].get(path_id)}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    # Uma requisição JSON por linha, uma resposta JSON por linha
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = self.server.selector.handle(json.loads(line))
+            except Exception as exc:
+                response = {'error': str(exc)}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve(selector, unix_socket=None, port=8765):
+    """
+    Atende pedidos em JSON por linha num socket Unix ou em localhost:port.
+    """
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = _UnixServer(unix_socket, _RequestHandler)
+        address = unix_socket
+    else:
+        server = _TCPServer(('127.0.0.1', port), _RequestHandler)
+        address = f'127.0.0.1:{port}'
+
+    server.selector = selector
+    print(f"🚦 Seletor de rotas atendendo em {address}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        selector.stop()
+        if unix_socket and os.path.exists(unix_socket):
+            os.remove(unix_socket)
+
+
+def query(request, unix_socket=None, port=8765):
+    """
+    Cliente simples: envia um pedido e retorna a resposta.
+    """
+    if unix_socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(unix_socket)
+    else:
+        sock = socket.create_connection(('127.0.0.1', port))
+
+    with sock, sock.makefile('rwb') as f:
+        f.write(json.dumps(request).encode('utf-8') + b'\n')
+        f.flush()
+        return json.loads(f.readline())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serviço de seleção de rotas.')
+    parser.add_argument('--pair', action='append', required=True, metavar='PAR=MODELO,CATALOGO',
+                        help='Par, modelo .joblib e catálogo (paths.json ou checkpoint.json); '
+                             'ex: rj-es=analysis/rj/rj-es/ml/selector.joblib,analysis/rj/rj-es/paths/paths.json')
+    parser.add_argument('--train', action='store_true',
+                        help='Treina o modelo com ml/routes_latency.csv do catálogo se o .joblib não existir')
+    parser.add_argument('--socket', default=None, help='Socket Unix (padrão: TCP em localhost)')
+    parser.add_argument('--port', type=int, default=8765, help='Porta TCP em localhost')
+    parser.add_argument('--max-batch', type=int, default=256, help='Tamanho máximo do micro-lote')
+    parser.add_argument('--max-wait-us', type=int, default=200, help='Espera máxima para formar um lote (µs)')
+    parser.add_argument('--index', action='store_true',
+                        help='Carrega o índice de séries de cada par para pedidos {"pair", "at"}')
+    args = parser.parse_args()
+
+    pairs = {}
+    indexes = {}
+    for spec in args.pair:
+        pair, files = spec.split('=', 1)
+        model_filepath, catalogue_filepath = files.split(',', 1)
+
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(catalogue_filepath)))
+        if os.path.basename(catalogue_filepath) == 'checkpoint.json':
+            base_dir = os.path.dirname(os.path.abspath(catalogue_filepath))
+
+        latency_filepath = os.path.join(base_dir, 'ml', 'routes_latency.csv')
+        if args.train and not os.path.exists(model_filepath):
+            print(f"🧠 Treinando modelo de {pair}...")
+            train_selector_model(latency_filepath, model_filepath)
+
+        model, path_ids = load_selector_model(model_filepath, latency_filepath)
+        pairs[pair] = (model, load_path_catalogue(catalogue_filepath), path_ids)
+        print(f"✓ {pair}: {len(pairs[pair][1])} caminhos")
+
+        if args.index:
+            indexes[pair] = open_series_index(base_dir)
+            print(f"✓ {pair}: índice de séries com {len(indexes[pair].ts)} medições")
+
+    selector = RouteSelector(pairs, max_batch=args.max_batch, max_wait_us=args.max_wait_us,
+                             indexes=indexes).start()
+    serve(selector, unix_socket=args.socket, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
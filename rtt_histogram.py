@@ -0,0 +1,261 @@
+import os
+from array import array
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from dataset_cache import read_csv_cached
+from link_latency import fill_gaps
+from network_extractor import iter_traceroute_data
+from path_store import load_path_store, measurement_ts
+
+
+# Quantis extraídos de cada histograma (além de contagem, média, desvio, mínimo e máximo)
+HISTOGRAM_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+# Limites dos buckets fixos em ms (escala logarítmica de 0.5 ms a 1 s)
+BUCKET_EDGES = np.concatenate(([0.0], np.geomspace(0.5, 1000.0, 23), [np.inf]))
+
+# Histogramas lidos de um arquivo, em arrays contíguos:
+#   ts       int64   timestamp de cada histograma
+#   offsets  int64   início dos buckets de cada histograma (n + 1 valores)
+#   values   float64 RTT de cada bucket (ms)
+#   counts   float64 número de amostras de cada bucket
+HistogramTable = namedtuple('HistogramTable', ['ts', 'offsets', 'values', 'counts'])
+
+
+def feature_names(quantiles=HISTOGRAM_QUANTILES):
+    """
+    Returns:
+        Nomes das colunas de histogram_features
+    """
+    return ['count', 'mean', 'std', 'min', 'max'] + [f'q{round(q * 100):02d}' for q in quantiles]
+
+
+def load_histograms(filepath):
+    """
+    Lê incrementalmente um arquivo de histogramas de RTT
+    ([{"ts": ..., "val": {"7.00": 3, "6.99": 2, ...}}, ...]).
+
+    Args:
+        filepath: Arquivo de histogramas do par
+
+    Returns:
+        HistogramTable (histogramas sem ts numérico são descartados)
+    """
+    ts = array('q')
+    offsets = array('q', [0])
+    values = array('d')
+    counts = array('d')
+
+    for entry in iter_traceroute_data(filepath):
+        ts_value = measurement_ts(entry)
+        if ts_value is None:
+            continue
+
+        buckets = entry.get('val') or {}
+        for value, count in buckets.items():
+            try:
+                value, count = float(value), float(count)
+            except (TypeError, ValueError):
+                continue
+            values.append(value)
+            counts.append(count)
+        ts.append(ts_value)
+        offsets.append(len(values))
+
+    return HistogramTable(ts=np.frombuffer(ts, dtype=np.int64), offsets=np.frombuffer(offsets, dtype=np.int64),
+                          values=np.frombuffer(values, dtype=np.float64),
+                          counts=np.frombuffer(counts, dtype=np.float64))
+
+
+def histogram_features(groups, values, counts, num_groups, quantiles=HISTOGRAM_QUANTILES,
+                       bucket_edges=BUCKET_EDGES):
+    """
+    Resume os buckets de cada grupo (histogramas somados) em vetores de
+    tamanho fixo, sem laço por histograma.
+
+    Args:
+        groups: Grupo (linha de saída) de cada bucket
+        values: RTT de cada bucket
+        counts: Amostras de cada bucket
+        num_groups: Número de linhas de saída
+        quantiles: Quantis calculados
+        bucket_edges: Limites dos buckets fixos
+
+    Returns:
+        Tupla (atributos grupos × feature_names(quantiles), frações de
+        amostras por bucket fixo grupos × (len(bucket_edges) - 1)); NaN
+        nos grupos sem amostras
+    """
+    keep = counts > 0
+    groups, values, counts = np.asarray(groups)[keep], np.asarray(values)[keep], np.asarray(counts)[keep]
+
+    total = np.bincount(groups, weights=counts, minlength=num_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.bincount(groups, weights=counts * values, minlength=num_groups) / total
+        second = np.bincount(groups, weights=counts * values * values, minlength=num_groups) / total
+    std = np.sqrt(np.maximum(second - mean * mean, 0.0))
+
+    features = np.full((num_groups, 5 + len(quantiles)), np.nan)
+    features[:, 0] = total
+    features[:, 1] = mean
+    features[:, 2] = std
+
+    # Buckets ordenados por grupo e RTT: mínimo, máximo e quantis por busca na soma acumulada
+    order = np.lexsort((values, groups))
+    groups, values, counts = groups[order], values[order], counts[order]
+    present, starts = np.unique(groups, return_index=True)
+    ends = np.append(starts[1:], len(groups))
+    if len(present):
+        features[present, 3] = values[starts]
+        features[present, 4] = values[ends - 1]
+
+        cumulative = np.cumsum(counts)
+        before = np.concatenate(([0.0], cumulative))[starts]
+        for col, q in enumerate(quantiles, start=5):
+            idx = np.searchsorted(cumulative, before + q * total[present], side='left')
+            features[present, col] = values[np.clip(idx, starts, ends - 1)]
+
+    num_buckets = len(bucket_edges) - 1
+    bucket = np.clip(np.searchsorted(bucket_edges, values, side='right') - 1, 0, num_buckets - 1)
+    buckets = np.bincount(groups * num_buckets + bucket, weights=counts,
+                          minlength=num_groups * num_buckets).reshape(num_groups, num_buckets)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        buckets /= total[:, None]
+
+    return features, buckets
+
+
+def load_grid(latency_filepath):
+    """
+    Returns:
+        Timestamps (segundos) da grade do routes_latency.csv
+    """
+    df = read_csv_cached(latency_filepath, usecols=['timestamp'])
+    return pd.to_datetime(df['timestamp']).to_numpy().astype('datetime64[s]').astype(np.int64)
+
+
+def active_paths(store, grid):
+    """
+    Caminho do traceroute mais próximo de cada ponto da grade (como em
+    interpolation.align_series), para atribuir cada histograma ao caminho
+    em uso naquele momento.
+
+    Returns:
+        Array com o path_id por ponto da grade (-1 sem medições)
+    """
+    ts = np.asarray(store.ts)
+    if not len(ts):
+        return np.full(len(grid), -1, dtype=np.int64)
+
+    order = np.argsort(ts, kind='stable')
+    ts, path_ids = ts[order], np.asarray(store.path_id)[order]
+    right = np.clip(np.searchsorted(ts, grid), 0, len(ts) - 1)
+    left = np.clip(right - 1, 0, len(ts) - 1)
+    nearest = np.where(np.abs(ts[left] - grid) <= np.abs(ts[right] - grid), left, right)
+    return path_ids[nearest].astype(np.int64)
+
+
+def histograms_on_grid(table, grid, interval=600, fill=True, quantiles=HISTOGRAM_QUANTILES,
+                       bucket_edges=BUCKET_EDGES):
+    """
+    Soma os histogramas de cada intervalo [t, t + interval) da grade e
+    resume cada ponto em vetores de tamanho fixo.
+
+    Args:
+        table: HistogramTable de load_histograms
+        grid: Timestamps da grade (ex: load_grid)
+        interval: Tamanho do intervalo em segundos
+        fill: Se True, pontos sem histograma repetem o último resumo
+              conhecido (a contagem continua 0)
+        quantiles: Ver histogram_features
+        bucket_edges: Ver histogram_features
+
+    Returns:
+        Tupla (atributos, frações por bucket), uma linha por ponto da grade
+        (arrays sem linhas se a grade é vazia)
+    """
+    grid = np.asarray(grid, dtype=np.int64)
+    if not len(grid):
+        return np.empty((0, 5 + len(quantiles))), np.empty((0, len(bucket_edges) - 1))
+    row = np.searchsorted(grid, table.ts, side='right') - 1
+    inside = (row >= 0) & (table.ts < grid[np.maximum(row, 0)] + interval)
+    row = np.where(inside, row, -1)
+
+    bucket_row = np.repeat(row, np.diff(table.offsets))
+    keep = bucket_row >= 0
+    features, buckets = histogram_features(bucket_row[keep], table.values[keep], table.counts[keep],
+                                           len(grid), quantiles, bucket_edges)
+
+    if fill:
+        count = features[:, 0].copy()
+        features = fill_gaps(features.T).T
+        features[:, 0] = count
+        buckets = fill_gaps(buckets.T).T
+    return features, buckets
+
+
+def save_histogram_features(filepath, grid, features, buckets, path_ids=None, quantiles=HISTOGRAM_QUANTILES,
+                            bucket_edges=BUCKET_EDGES):
+    """
+    Salva os vetores alinhados à grade em .npz.
+
+    Returns:
+        Caminho do arquivo criado
+    """
+    os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+    np.savez(filepath, timestamps=np.asarray(grid, dtype=np.int64), features=features,
+             feature_names=np.array(feature_names(quantiles)), buckets=buckets, bucket_edges=bucket_edges,
+             path_id=np.full(len(grid), -1, dtype=np.int64) if path_ids is None else path_ids)
+    return filepath
+
+
+def load_histogram_features(filepath):
+    """
+    Carrega os vetores salvos por save_histogram_features como DataFrame
+    (uma linha por timestamp do routes_latency.csv), pronto para ser
+    concatenado aos atributos dos classificadores.
+
+    Returns:
+        DataFrame com timestamp, path_id, hist_<atributo> e hist_bucket_<i>
+    """
+    with np.load(filepath) as data:
+        columns = {'timestamp': pd.to_datetime(data['timestamps'], unit='s'), 'path_id': data['path_id']}
+        for idx, name in enumerate(data['feature_names'].tolist()):
+            columns[f'hist_{name}'] = data['features'][:, idx]
+        for idx in range(data['buckets'].shape[1]):
+            columns[f'hist_bucket_{idx}'] = data['buckets'][:, idx]
+    return pd.DataFrame(columns)
+
+
+def main():
+    # Configurações
+    origin = 'rj'
+    destination = 'es'
+    interval = 600
+
+    # Histogramas no mesmo formato dos arquivos de traceroute (array JSON com ts e val)
+    filepath = f'dataset/Train/histogram-rtt/{origin}/measure-histogram-rtt_ref-{origin}_pop-{destination}.json'
+
+    base_dir = f'analysis/{origin}/{origin}-{destination}'
+    latency_filepath = f'{base_dir}/ml/routes_latency.csv'
+    store_dir = f'{base_dir}/paths/store'
+    output_filepath = f'{base_dir}/ml/rtt_histogram_features.npz'
+
+    print(f"📂 Lendo histogramas de: {filepath}")
+    table = load_histograms(filepath)
+    print(f"✓ {len(table.ts)} histogramas, {len(table.values)} buckets")
+
+    grid = load_grid(latency_filepath)
+    features, buckets = histograms_on_grid(table, grid, interval)
+    path_ids = active_paths(load_path_store(store_dir), grid) if os.path.isdir(store_dir) else None
+
+    save_histogram_features(output_filepath, grid, features, buckets, path_ids)
+    covered = int(np.count_nonzero(features[:, 0] > 0))
+    print(f"✓ {len(grid)} pontos da grade ({covered} com histograma) salvos em: {output_filepath}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import json
+import os
+
+import numpy as np
+
+from build_table import load_latency_data_from_store, load_latency_data_from_txt
+from dataset_cache import cached_series
+
+
+DEFAULT_PERCENTILES = (1, 5, 25, 50, 75, 90, 95, 99)
+
+
+def inter_sample_gaps(timestamps):
+    """
+    Calcula os intervalos entre amostras consecutivas.
+    
+    Args:
+        timestamps: Array de timestamps (segundos), em qualquer ordem
+    
+    Returns:
+        Array com os intervalos em segundos (len(timestamps) - 1 valores)
+    """
+    return np.diff(np.sort(np.asarray(timestamps, dtype=np.int64)))
+
+
+def gap_statistics(gaps, percentiles=DEFAULT_PERCENTILES):
+    """
+    Resume a distribuição dos intervalos entre amostras.
+    
+    Args:
+        gaps: Array de intervalos em segundos
+        percentiles: Percentis calculados
+    
+    Returns:
+        Dicionário com count, min, max, mean, percentis e a distribuição
+        exata {intervalo: ocorrências}
+    """
+    gaps = np.asarray(gaps)
+    if len(gaps) == 0:
+        return {'count': 0}
+    
+    values, counts = np.unique(gaps, return_counts=True)
+    
+    return {
+        'count': int(len(gaps)),
+        'min': int(gaps.min()),
+        'max': int(gaps.max()),
+        'mean': float(gaps.mean()),
+        'percentiles': {f'p{p:g}': float(v) for p, v in zip(percentiles, np.percentile(gaps, percentiles))},
+        'distribution': {str(int(v)): int(c) for v, c in zip(values, counts)},
+    }
+
+
+def detect_outages(timestamps, threshold):
+    """
+    Detecta períodos sem amostras maiores que o limiar.
+    
+    Args:
+        timestamps: Array de timestamps (segundos)
+        threshold: Intervalo mínimo (segundos) para considerar uma falha
+    
+    Returns:
+        Lista de dicionários {start, end, duration} em segundos
+    """
+    ts = np.sort(np.asarray(timestamps, dtype=np.int64))
+    gaps = np.diff(ts)
+    idx = np.flatnonzero(gaps > threshold)
+    
+    return [{'start': int(ts[i]), 'end': int(ts[i + 1]), 'duration': int(gaps[i])} for i in idx]
+
+
+def suggest_resample_interval(gaps, percentile=50, step=60):
+    """
+    Sugere um intervalo de reamostragem (para interpolation.align_series)
+    a partir de um percentil dos intervalos, arredondado para cima.
+    
+    Args:
+        gaps: Array de intervalos em segundos
+        percentile: Percentil usado como referência
+        step: Granularidade do arredondamento em segundos
+    
+    Returns:
+        String de frequência do pandas (ex: '10min') ou None sem dados
+    """
+    if len(gaps) == 0:
+        return None
+    seconds = int(np.ceil(np.percentile(gaps, percentile) / step) * step)
+    seconds = max(seconds, step)
+    return f'{seconds // 60}min' if seconds % 60 == 0 else f'{seconds}s'
+
+
+def analyze_cadence(timestamps_by_path, outage_threshold=3600, percentiles=DEFAULT_PERCENTILES):
+    """
+    Analisa a cadência de amostragem de cada caminho e de todos os
+    caminhos juntos (a série do par, já que só um caminho é medido por vez).
+    
+    Args:
+        timestamps_by_path: Dicionário {path_id: array de timestamps}
+        outage_threshold: Intervalo mínimo (segundos) para registrar falha
+        percentiles: Percentis calculados
+    
+    Returns:
+        Dicionário {'paths': {path_id: resumo}, 'merged': resumo}
+    """
+    report = {'outage_threshold': outage_threshold, 'paths': {}}
+    
+    for path_id in sorted(timestamps_by_path):
+        ts = timestamps_by_path[path_id]
+        report['paths'][str(path_id)] = {
+            'samples': int(len(ts)),
+            'gaps': gap_statistics(inter_sample_gaps(ts), percentiles),
+            'outages': detect_outages(ts, outage_threshold),
+        }
+    
+    all_ts = (np.concatenate([np.asarray(ts, dtype=np.int64) for ts in timestamps_by_path.values()])
+              if timestamps_by_path else np.empty(0, dtype=np.int64))
+    merged_gaps = inter_sample_gaps(all_ts)
+    report['merged'] = {
+        'samples': int(len(all_ts)),
+        'gaps': gap_statistics(merged_gaps, percentiles),
+        'outages': detect_outages(all_ts, outage_threshold),
+        'suggested_interval': suggest_resample_interval(merged_gaps),
+    }
+    
+    return report
+
+
+def save_cadence_report(report, filepath):
+    """
+    Salva o relatório de cadência em JSON.
+    
+    Returns:
+        Caminho do arquivo criado
+    """
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4)
+    return filepath
+
+
+def main():
+    # Configurações
+    origin = 'rj'
+    destination = 'es'
+    outage_threshold = 3600
+    
+    base_dir = f'analysis/{origin}/{origin}-{destination}'
+    store_dir = f'{base_dir}/paths/store'
+    paths_dir = f'{base_dir}/paths/timeseries'
+    
+    print(f"📂 Carregando timestamps...")
+    if os.path.exists(store_dir):
+        latency_by_path = load_latency_data_from_store(store_dir)
+    else:
+        latency_by_path = cached_series(load_latency_data_from_txt, paths_dir)
+    
+    report = analyze_cadence({path_id: ts for path_id, (ts, _) in latency_by_path.items()}, outage_threshold)
+    filepath = save_cadence_report(report, f'{base_dir}/sampling_cadence.json')
+    
+    merged = report['merged']
+    print(f"✓ Amostras: {merged['samples']} em {len(report['paths'])} caminhos")
+    if merged['gaps']['count']:
+        print(f"✓ Intervalo mediano: {merged['gaps']['percentiles']['p50']:.0f}s "
+              f"(p95: {merged['gaps']['percentiles']['p95']:.0f}s)")
+    print(f"✓ Falhas > {outage_threshold}s: {len(merged['outages'])}")
+    print(f"✓ Intervalo de reamostragem sugerido: {merged['suggested_interval']}")
+    print(f"✓ Relatório salvo em: {filepath}")
+
+
+if __name__ == "__main__":
+    main()
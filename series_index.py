@@ -0,0 +1,250 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from dataset_cache import file_fingerprint
+from path_store import list_segments, load_path_store
+
+
+# Estrutura em disco (paths/index/ de cada par):
+#
+#   meta.json       block_size, path_ids, fingerprint do armazenamento de origem
+#   ts.npy          int64   timestamps, ordenados por (caminho, tempo)
+#   rtt.npy         float64 latência de cada timestamp
+#   offsets.npy     int64   início de cada caminho em ts/rtt (n + 1 valores)
+#   block_ts.npy    int64   primeiro timestamp de cada bloco de block_size amostras
+#   block_offsets.npy int64 início dos blocos de cada caminho em block_ts
+#
+# ts/rtt são mapeados em memória: uma consulta busca o bloco no índice
+# esparso (pequeno, em memória) e lê só o trecho contíguo do intervalo.
+
+DEFAULT_BLOCK_SIZE = 1024
+
+
+def to_seconds(value):
+    """
+    Converte timestamp (segundos, string ou datetime) em segundos.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer, float, np.floating)):
+        return int(value)
+    return int(pd.Timestamp(value).timestamp())
+
+
+def default_index_dir(base_path):
+    """
+    Returns:
+        Diretório do índice de um par (analysis/<origem>/<origem>-<destino>)
+    """
+    return os.path.join(base_path, 'paths', 'index')
+
+
+def _store_fingerprint(store_dir):
+    return [list(item) for segment in list_segments(store_dir) for item in file_fingerprint(segment)]
+
+
+def build_series_index(store_dir, index_dir, block_size=DEFAULT_BLOCK_SIZE, drop_missing=True):
+    """
+    Monta o índice das séries por caminho a partir do armazenamento colunar.
+
+    Args:
+        store_dir: Armazenamento colunar do par (paths/store)
+        index_dir: Diretório do índice
+        block_size: Amostras por bloco do índice esparso
+        drop_missing: Se True, descarta medições sem RTT
+
+    Returns:
+        Diretório do índice
+    """
+    if not list_segments(store_dir):
+        raise FileNotFoundError(f"Armazenamento colunar não encontrado ou vazio: {store_dir}")
+
+    store = load_path_store(store_dir)
+    ts = np.asarray(store.ts)
+    rtt = np.asarray(store.rtt)
+    path_ids = np.asarray(store.path_id)
+    if drop_missing:
+        valid = ~np.isnan(rtt)
+        ts, rtt, path_ids = ts[valid], rtt[valid], path_ids[valid]
+
+    order = np.lexsort((ts, path_ids))
+    ts, rtt, path_ids = ts[order], rtt[order], path_ids[order]
+    unique_ids, starts = np.unique(path_ids, return_index=True)
+    offsets = np.append(starts, len(ts)).astype(np.int64)
+
+    block_ts = [ts[start:end:block_size] for start, end in zip(offsets[:-1], offsets[1:])]
+    block_offsets = np.zeros(len(unique_ids) + 1, dtype=np.int64)
+    np.cumsum([len(blocks) for blocks in block_ts], out=block_offsets[1:])
+
+    os.makedirs(index_dir, exist_ok=True)
+    np.save(os.path.join(index_dir, 'ts.npy'), ts.astype(np.int64))
+    np.save(os.path.join(index_dir, 'rtt.npy'), rtt.astype(np.float64))
+    np.save(os.path.join(index_dir, 'offsets.npy'), offsets)
+    np.save(os.path.join(index_dir, 'block_ts.npy'),
+            np.concatenate(block_ts).astype(np.int64) if block_ts else np.empty(0, dtype=np.int64))
+    np.save(os.path.join(index_dir, 'block_offsets.npy'), block_offsets)
+
+    # meta.json por último: índice incompleto nunca é considerado atualizado
+    with open(os.path.join(index_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({'block_size': block_size, 'path_ids': unique_ids.tolist(),
+                   'source': _store_fingerprint(store_dir)}, f)
+    return index_dir
+
+
+class SeriesIndex:
+    """
+    Consulta às séries de latência por caminho de um par por intervalo de
+    tempo, sem parsing de arquivos: busca binária no índice de blocos e
+    leitura contígua dos arrays mapeados em memória.
+
+    Uso:
+        index = open_series_index('analysis/rj/rj-es')
+        index.query('2024-06-10 12:00', '2024-06-10 18:00')
+        index.latest('2024-06-10 12:00')
+    """
+
+    def __init__(self, index_dir):
+        with open(os.path.join(index_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.index_dir = index_dir
+        self.block_size = meta['block_size']
+        self.path_ids = meta['path_ids']
+        self._position = {path_id: idx for idx, path_id in enumerate(self.path_ids)}
+        self.ts = np.load(os.path.join(index_dir, 'ts.npy'), mmap_mode='r')
+        self.rtt = np.load(os.path.join(index_dir, 'rtt.npy'), mmap_mode='r')
+        self.offsets = np.load(os.path.join(index_dir, 'offsets.npy'))
+        self.block_ts = np.load(os.path.join(index_dir, 'block_ts.npy'))
+        self.block_offsets = np.load(os.path.join(index_dir, 'block_offsets.npy'))
+
+    def _search(self, path_id, ts, side):
+        # Bloco pelo índice esparso, depois a posição exata dentro dele
+        idx = self._position[path_id]
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+        blocks = self.block_ts[self.block_offsets[idx]:self.block_offsets[idx + 1]]
+        block = max(np.searchsorted(blocks, ts, side=side) - 1, 0)
+        lo = start + block * self.block_size
+        hi = min(lo + self.block_size + 1, end)
+        return int(lo + np.searchsorted(self.ts[lo:hi], ts, side=side))
+
+    def query(self, start=None, end=None, path_ids=None):
+        """
+        Latências de cada caminho no intervalo [start, end].
+
+        Args:
+            start: Início (segundos, string ou datetime; None = desde o início)
+            end: Fim, inclusivo (None = até o fim)
+            path_ids: Caminhos consultados (padrão: todos)
+
+        Returns:
+            Dicionário {path_id: (timestamps, latências)}; os arrays são
+            visões dos arquivos mapeados (copie antes de modificar)
+        """
+        start, end = to_seconds(start), to_seconds(end)
+        result = {}
+        for path_id in self.path_ids if path_ids is None else path_ids:
+            if path_id not in self._position:
+                continue
+            idx = self._position[path_id]
+            lo = self.offsets[idx] if start is None else self._search(path_id, start, 'left')
+            hi = self.offsets[idx + 1] if end is None else self._search(path_id, end, 'right')
+            result[path_id] = (self.ts[lo:hi], self.rtt[lo:hi])
+        return result
+
+    def query_frame(self, start=None, end=None, path_ids=None):
+        """
+        Mesmo resultado de query em formato longo (notebook/relatórios).
+
+        Returns:
+            DataFrame com timestamp, path_id e latency_ms, ordenado por tempo
+        """
+        parts = [pd.DataFrame({'timestamp': pd.to_datetime(np.asarray(ts), unit='s'), 'path_id': path_id,
+                               'latency_ms': np.asarray(rtt)})
+                 for path_id, (ts, rtt) in self.query(start, end, path_ids).items()]
+        if not parts:
+            return pd.DataFrame(columns=['timestamp', 'path_id', 'latency_ms'])
+        return pd.concat(parts, ignore_index=True).sort_values('timestamp', kind='stable', ignore_index=True)
+
+    def latest(self, at=None, path_ids=None):
+        """
+        Última latência de cada caminho até `at` (ou a primeira depois,
+        se o caminho ainda não tinha medições), como entrada do seletor.
+
+        Args:
+            at: Instante (segundos, string ou datetime; None = fim da série)
+            path_ids: Caminhos, na ordem desejada; para alimentar um modelo,
+                      passe os path_ids das colunas dele (o padrão só tem
+                      os caminhos com medições)
+
+        Returns:
+            Array com uma latência por caminho, na ordem de path_ids
+            (padrão: todos, ordenados); NaN para caminhos sem medições
+        """
+        at = to_seconds(at)
+        path_ids = self.path_ids if path_ids is None else path_ids
+        values = np.full(len(path_ids), np.nan)
+        for col, path_id in enumerate(path_ids):
+            idx = self._position.get(path_id)
+            if idx is None:
+                continue
+            start, end = self.offsets[idx], self.offsets[idx + 1]
+            if start == end:
+                continue
+            pos = end if at is None else self._search(path_id, at, 'right')
+            values[col] = self.rtt[max(pos - 1, start)]
+        return values
+
+
+def open_series_index(base_path, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Abre o índice de um par, (re)construindo-o quando não existe ou quando
+    o armazenamento colunar mudou desde a construção.
+
+    Args:
+        base_path: Diretório do par (analysis/<origem>/<origem>-<destino>)
+
+    Returns:
+        SeriesIndex (FileNotFoundError se o par não tem armazenamento
+        colunar em paths/store)
+    """
+    store_dir = os.path.join(base_path, 'paths', 'store')
+    if not list_segments(store_dir):
+        raise FileNotFoundError(f"Armazenamento colunar não encontrado ou vazio: {store_dir}")
+
+    index_dir = default_index_dir(base_path)
+    meta_path = os.path.join(index_dir, 'meta.json')
+
+    stale = True
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        stale = meta.get('block_size') != block_size or meta.get('source') != _store_fingerprint(store_dir)
+
+    if stale:
+        build_series_index(store_dir, index_dir, block_size)
+    return SeriesIndex(index_dir)
+
+
+def main():
+    # Configurações
+    origin = 'rj'
+    destination = 'es'
+    start = '2024-06-10 00:00'
+    end = '2024-06-11 00:00'
+
+    base_path = f'analysis/{origin}/{origin}-{destination}'
+
+    index = open_series_index(base_path)
+    print(f"✓ Índice de {base_path}: {len(index.path_ids)} caminhos, {len(index.ts)} medições")
+
+    df = index.query_frame(start, end)
+    print(f"\n🔎 {start} → {end}: {len(df)} medições")
+    for path_id, group in df.groupby('path_id'):
+        print(f"  Caminho {path_id}: {len(group)} medições, média {group['latency_ms'].mean():.2f}ms, "
+              f"máx {group['latency_ms'].max():.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+
+def build_topology(num_paths=3, num_nodes=20, hops=7, rng=None):
+    """
+    Gera caminhos sintéticos entre dois pontos de medição.
+
+    Os nós intermediários são sorteados de um conjunto de num_nodes IPs,
+    então caminhos diferentes compartilham nós e arestas como na rede real.
+
+    Args:
+        num_paths: Número de caminhos distintos
+        num_nodes: Número de IPs intermediários disponíveis
+        hops: Número médio de saltos por caminho
+        rng: numpy.random.Generator
+
+    Returns:
+        Tupla (lista de caminhos como listas de IPs, {ip: atraso do enlace até ele})
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    source = '10.0.0.1'
+    target = '10.255.255.254'
+    pool = [f'10.{1 + idx // 62500}.{(idx // 250) % 250}.{1 + idx % 250}' for idx in range(num_nodes)]
+
+    paths = []
+    seen = set()
+    attempts = 0
+    while len(paths) < num_paths and attempts < num_paths * 100:
+        attempts += 1
+        length = int(np.clip(hops - 1 + rng.integers(-1, 2), 1, len(pool)))
+        middle = [pool[idx] for idx in rng.choice(len(pool), size=length, replace=False)]
+        path = [source] + middle + [target]
+        if tuple(path) not in seen:
+            seen.add(tuple(path))
+            paths.append(path)
+
+    # Atraso de cada enlace (ms), atribuído ao nó de chegada
+    link_delay = {ip: float(rng.gamma(2.0, 1.0)) for ip in pool + [target]}
+    link_delay[source] = float(rng.uniform(0.2, 1.0))
+    return paths, link_delay
+
+
+def iter_synthetic_measurements(num_measurements, paths, link_delay, start_ts=1717718400, interval=600,
+                                noise=0.1, missing_ip_rate=0.02, wrong_destination_rate=0.001,
+                                route_change_rate=0.01, rng=None):
+    """
+    Gera medições no formato do dataset ({ts, val: [{ttl, query, success,
+    ip, hostname, rtt}]}).
+
+    Args:
+        num_measurements: Número de medições
+        paths: Caminhos de build_topology
+        link_delay: Atrasos por nó de build_topology
+        start_ts: Timestamp da primeira medição
+        interval: Intervalo médio entre medições (segundos)
+        noise: Desvio relativo (log-normal) do atraso de cada enlace
+        missing_ip_rate: Probabilidade de um hop intermediário vir sem IP/RTT
+        wrong_destination_rate: Probabilidade de a medição parar antes do destino
+        route_change_rate: Probabilidade de trocar de caminho a cada medição
+        rng: numpy.random.Generator
+
+    Yields:
+        Medições (dicionários)
+    """
+    rng = np.random.default_rng() if rng is None else rng
+
+    # O primeiro caminho é o dominante, como nos dados reais
+    weights = np.array([4.0] + [1.0] * (len(paths) - 1))
+    weights /= weights.sum()
+    current = 0
+
+    for idx in range(num_measurements):
+        if rng.random() < route_change_rate:
+            current = int(rng.choice(len(paths), p=weights))
+        path = paths[current]
+
+        ts = start_ts + idx * interval + int(rng.integers(-interval // 10, interval // 10 + 1))
+        delays = np.array([link_delay[ip] for ip in path]) * rng.lognormal(0.0, noise, len(path))
+        rtts = np.cumsum(delays)
+        missing = rng.random(len(path)) < missing_ip_rate
+        missing[0] = missing[-1] = False
+
+        stop = len(path)
+        if rng.random() < wrong_destination_rate:
+            stop = int(rng.integers(1, len(path)))
+
+        hops = []
+        for hop_idx in range(stop):
+            hop = {'ttl': hop_idx + 1, 'query': 1, 'success': 1}
+            if not missing[hop_idx]:
+                hop['ip'] = path[hop_idx]
+                if hop_idx == 0:
+                    hop['hostname'] = 'gateway'
+                hop['rtt'] = round(float(rtts[hop_idx]), 3)
+            hops.append(hop)
+
+        yield {'ts': ts, 'val': hops}
+
+
+def write_traceroute_file(filepath, measurements):
+    """
+    Grava as medições como um array JSON, uma medição por vez.
+
+    Returns:
+        Número de medições gravadas
+    """
+    count = 0
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for entry in measurements:
+            f.write(',\n' if count else '\n')
+            f.write(json.dumps(entry))
+            count += 1
+        f.write('\n]\n')
+    return count
+
+
+def generate_dataset(output_dir, num_measurements, num_paths=3, num_nodes=20, hops=7, noise=0.1,
+                     missing_ip_rate=0.02, wrong_destination_rate=0.001, seed=0,
+                     origin='syn', destination='pop'):
+    """
+    Gera um arquivo measure-traceroute_ref-<origem>_pop-<destino>.json sintético.
+
+    Returns:
+        Dicionário com filepath, origin_ip (último salto), destination_ip
+        (primeiro salto) e os caminhos gerados
+    """
+    rng = np.random.default_rng(seed)
+    paths, link_delay = build_topology(num_paths, num_nodes, hops, rng)
+
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, f'measure-traceroute_ref-{origin}_pop-{destination}.json')
+    write_traceroute_file(filepath, iter_synthetic_measurements(
+        num_measurements, paths, link_delay, noise=noise, missing_ip_rate=missing_ip_rate,
+        wrong_destination_rate=wrong_destination_rate, rng=rng
+    ))
+
+    return {'filepath': filepath, 'origin_ip': paths[0][-1], 'destination_ip': paths[0][0], 'paths': paths}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera arquivos de traceroute sintéticos no formato do dataset.')
+    parser.add_argument('--output', default='dataset/synthetic', help='Diretório de saída')
+    parser.add_argument('--measurements', type=int, default=10_000, help='Número de medições')
+    parser.add_argument('--paths', type=int, default=3, help='Número de caminhos distintos')
+    parser.add_argument('--nodes', type=int, default=20, help='Número de IPs intermediários')
+    parser.add_argument('--hops', type=int, default=7, help='Saltos médios por caminho')
+    parser.add_argument('--noise', type=float, default=0.1, help='Ruído relativo dos atrasos')
+    parser.add_argument('--missing-ip', type=float, default=0.02, help='Fração de hops sem IP')
+    parser.add_argument('--wrong-destination', type=float, default=0.001,
+                        help='Fração de medições que não chegam ao destino')
+    parser.add_argument('--seed', type=int, default=0, help='Semente aleatória')
+    args = parser.parse_args()
+
+    dataset = generate_dataset(args.output, args.measurements, args.paths, args.nodes, args.hops, args.noise,
+                               args.missing_ip, args.wrong_destination, args.seed)
+    print(f"✓ {args.measurements} medições em {dataset['filepath']}")
+    print(f"  Origem (último salto): {dataset['origin_ip']}")
+    print(f"  Destino (primeiro salto): {dataset['destination_ip']}")
+
+
+if __name__ == "__main__":
+    main()
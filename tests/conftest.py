@@ -0,0 +1,47 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Os módulos do projeto ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from network_extractor import run_extraction  # noqa: E402
+from synthetic_traceroute import build_topology, iter_synthetic_measurements, write_traceroute_file  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def synthetic():
+    """
+    Medições sintéticas pequenas, com trocas de rota, hops sem IP e
+    medições que não chegam ao destino.
+    """
+    rng = np.random.default_rng(0)
+    paths, link_delay = build_topology(num_paths=3, num_nodes=12, hops=5, rng=rng)
+    measurements = list(iter_synthetic_measurements(400, paths, link_delay, route_change_rate=0.05,
+                                                    wrong_destination_rate=0.02, rng=rng))
+    return {'measurements': measurements, 'origin_ip': paths[0][-1], 'destination_ip': paths[0][0]}
+
+
+def extract(filepath, output_root, synthetic, incremental=False, **kwargs):
+    """
+    run_extraction do par sintético, sem imagem e sem saída no terminal.
+    """
+    return run_extraction(str(filepath), 'syn', synthetic['origin_ip'], 'pop', synthetic['destination_ip'],
+                          output_root=str(output_root), incremental=incremental, verbose=False, render=False,
+                          **kwargs)
+
+
+@pytest.fixture(scope='session')
+def extracted(tmp_path_factory, synthetic):
+    """
+    Extração completa do par sintético (compartilhada entre os testes).
+
+    Returns:
+        Resultado de run_extraction
+    """
+    work_dir = tmp_path_factory.mktemp('extracted')
+    filepath = work_dir / 'measure-traceroute_ref-syn_pop-pop.json'
+    write_traceroute_file(filepath, synthetic['measurements'])
+    return extract(filepath, work_dir / 'analysis', synthetic)
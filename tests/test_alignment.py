@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from build_table import align_latency_matrix, load_latency_data_from_store, load_latency_data_from_txt
+from interpolation import align_series, load_store_timeseries, load_timeseries
+from network_extractor import extract_path_from_hops, extract_rtt_from_hops, load_checkpoint
+
+
+def _reference_matrix(measurements, destination_ip, path_to_nodes):
+    # Alinhamento direto das medições em um DataFrame (sem os arrays do projeto)
+    path_ids = {tuple(nodes): path_id for path_id, nodes in path_to_nodes.items()}
+    rows = {}
+    for entry in measurements:
+        nodes = tuple(extract_path_from_hops(entry['val']))
+        rtt = extract_rtt_from_hops(entry['val'])
+        if nodes and nodes[-1] == destination_ip and rtt is not None:
+            rows.setdefault(entry['ts'], {})[path_ids[nodes]] = rtt
+    return pd.DataFrame.from_dict(rows, orient='index').sort_index().sort_index(axis=1)
+
+
+def test_latency_matrix_matches_reference(extracted, synthetic):
+    base_path = extracted['base_path']
+    timestamps, path_ids, matrix = align_latency_matrix(
+        load_latency_data_from_store(os.path.join(base_path, 'paths', 'store'))
+    )
+
+    path_to_nodes = load_checkpoint(base_path)['path_to_nodes']
+    reference = _reference_matrix(synthetic['measurements'], synthetic['origin_ip'], path_to_nodes)
+
+    np.testing.assert_array_equal(timestamps, reference.index.to_numpy())
+    np.testing.assert_array_equal(path_ids, reference.columns.to_numpy())
+    np.testing.assert_array_equal(matrix, reference.to_numpy())
+
+
+def test_store_and_txt_alignment_match(extracted):
+    paths_dir = os.path.join(extracted['base_path'], 'paths')
+    store_dir = os.path.join(paths_dir, 'store')
+
+    from_txt = align_latency_matrix(load_latency_data_from_txt(paths_dir))
+    from_store = align_latency_matrix(load_latency_data_from_store(store_dir))
+    for txt_array, store_array in zip(from_txt, from_store):
+        np.testing.assert_array_equal(txt_array, store_array)
+
+    pd.testing.assert_frame_equal(align_series(load_timeseries(paths_dir)),
+                                  align_series(load_store_timeseries(store_dir)))
+
+
+def test_align_series_skips_empty_series():
+    index = pd.DatetimeIndex(pd.to_datetime([1717718400, 1717719000], unit='s'), name='timestamp')
+    series = {0: pd.Series([5.0, 6.0], index=index), 1: pd.Series([], index=pd.DatetimeIndex([]), dtype=float)}
+
+    aligned = align_series(series)
+    assert list(aligned.columns) == ['timestamp', 'latency_1']
+    assert len(aligned) == 2
+
+    assert align_series({}).empty
+    assert align_series({1: series[1]}).empty
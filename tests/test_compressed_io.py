@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from compressed_io import DedupJsonLinesWriter, iter_dedup_json_lines, open_text
+from conftest import extract
+from network_extractor import iter_traceroute_data
+from synthetic_traceroute import write_traceroute_file
+
+
+@pytest.mark.parametrize('suffix', ['', '.gz', '.xz'])
+def test_dedup_json_lines_round_trip(tmp_path, synthetic, suffix):
+    measurements = synthetic['measurements']
+    filepath = str(tmp_path / f'0.jsonl{suffix}')
+
+    # Duas sessões de escrita: a segunda (modo 'a') recomeça a tabela
+    with DedupJsonLinesWriter(filepath) as writer:
+        for entry in measurements[:150]:
+            writer.write(entry)
+    with DedupJsonLinesWriter(filepath, mode='a') as writer:
+        for entry in measurements[150:]:
+            writer.write(entry)
+
+    assert list(iter_dedup_json_lines(filepath)) == measurements
+
+
+@pytest.mark.parametrize('suffix', ['.gz', '.xz'])
+def test_compressed_input_parses_like_plain(tmp_path, synthetic, suffix):
+    plain = tmp_path / 'measure.json'
+    write_traceroute_file(plain, synthetic['measurements'])
+    compressed = str(tmp_path / f'measure.json{suffix}')
+    with open(plain, encoding='utf-8') as src, open_text(compressed, 'w') as dst:
+        dst.write(src.read())
+
+    assert list(iter_traceroute_data(compressed)) == list(iter_traceroute_data(str(plain)))
+
+
+def test_compressed_extraction_matches_plain(tmp_path, synthetic):
+    filepath = tmp_path / 'measure.json'
+    write_traceroute_file(filepath, synthetic['measurements'])
+    plain = extract(filepath, tmp_path / 'plain', synthetic, export_json=True)
+    compressed = extract(filepath, tmp_path / 'gzip', synthetic, export_json=True, compression='gzip')
+
+    plain_files = plain['files_created']['Séries temporais (TXT)']
+    compressed_files = compressed['files_created']['Séries temporais (TXT)']
+    assert [os.path.basename(f) + '.gz' for f in plain_files] == [os.path.basename(f) for f in compressed_files]
+    for plain_file, compressed_file in zip(plain_files, compressed_files):
+        with open_text(plain_file) as a, open_text(compressed_file) as b:
+            assert a.read() == b.read()
+
+    # Medições completas: JSON (sem compressão) e JSON Lines deduplicado
+    plain_json = plain['files_created']['Medições por caminho (JSON)']
+    compressed_json = compressed['files_created']['Medições por caminho (JSON)']
+    for plain_file, compressed_file in zip(plain_json, compressed_json):
+        assert list(iter_dedup_json_lines(compressed_file)) == list(iter_traceroute_data(plain_file))
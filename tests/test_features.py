@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataset_cache import DatasetCache
+from features import FeatureEngine, load_features
+
+
+@pytest.fixture
+def series():
+    # Grade de 10 min com lacunas (NaN) e medições reais só em parte das linhas
+    rng = np.random.default_rng(2)
+    timestamps = 1717718400 + 600 * np.arange(300, dtype=np.int64)
+    latencies = rng.gamma(5.0, 2.0, size=(300, 3))
+    latencies[rng.random(latencies.shape) < 0.05] = np.nan
+    real_mask = rng.random(latencies.shape) < 0.7
+    real_times = [timestamps[real_mask[:, col]] for col in range(3)]
+    return timestamps, latencies, real_mask, real_times
+
+
+@pytest.mark.parametrize('chunk', [1, 7])
+def test_append_matches_full_recompute(series, chunk):
+    timestamps, latencies, real_mask, real_times = series
+    columns = ['latency_1', 'latency_2', 'latency_3']
+    windows = (6, 36)
+
+    expected, names = FeatureEngine(columns, windows=windows).fit(timestamps, latencies, real_times)
+
+    split = 100
+    engine = FeatureEngine(columns, windows=windows)
+    head, _ = engine.fit(timestamps[:split], latencies[:split], [ts[ts < timestamps[split]] for ts in real_times])
+    rows = [head]
+    for start in range(split, len(timestamps), chunk):
+        rows.append(engine.append(timestamps[start:start + chunk], latencies[start:start + chunk],
+                                  real_mask[start:start + chunk]))
+
+    assert engine.names == names
+    np.testing.assert_array_equal(np.vstack(rows), expected)
+
+
+def test_load_features_cache_hit_matches_miss(tmp_path, series):
+    timestamps, latencies, _, _ = series
+    df = pd.DataFrame(latencies, columns=['latency_1', 'latency_2', 'latency_3'])
+    df.insert(0, 'timestamp', pd.to_datetime(timestamps, unit='s'))
+    latency_filepath = str(tmp_path / 'routes_latency.csv')
+    df.to_csv(latency_filepath, index=False)
+
+    cache = DatasetCache(str(tmp_path / 'cache'))
+    missing_store = str(tmp_path / 'missing' / 'store')
+    first, first_engine = load_features(latency_filepath, missing_store, cache=cache, windows=(6,))
+    second, second_engine = load_features(latency_filepath, missing_store, cache=cache, windows=(6,))
+
+    assert (cache.misses, cache.hits) == (2, 2)
+    pd.testing.assert_frame_equal(first, second)
+    assert second_engine.names == first_engine.names
+
+    # Depois de um acerto do cache, append continua do histórico restaurado
+    row = (timestamps[-1:] + 600, latencies[-1:])
+    np.testing.assert_array_equal(second_engine.append(*row), first_engine.append(*row))
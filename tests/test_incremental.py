@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+
+from conftest import extract
+from network_extractor import load_checkpoint
+from path_store import load_path_store, path_series
+from synthetic_traceroute import write_traceroute_file
+
+
+def _timeseries_files(base_path):
+    paths_dir = os.path.join(base_path, 'paths')
+    contents = {}
+    for name in sorted(os.listdir(paths_dir)):
+        if name.endswith('_timeseries.txt'):
+            with open(os.path.join(paths_dir, name), encoding='utf-8') as f:
+                contents[name] = f.read()
+    return contents
+
+
+def test_incremental_matches_full_run(tmp_path, synthetic):
+    measurements = synthetic['measurements']
+    filepath = tmp_path / 'measure.json'
+
+    write_traceroute_file(filepath, measurements)
+    full = extract(filepath, tmp_path / 'full', synthetic)
+
+    # Mesmo arquivo em duas etapas: metade, depois o arquivo completo
+    write_traceroute_file(filepath, measurements[:250])
+    extract(filepath, tmp_path / 'incremental', synthetic, incremental=True)
+    write_traceroute_file(filepath, measurements)
+    incremental = extract(filepath, tmp_path / 'incremental', synthetic, incremental=True)
+
+    for key in ('total_measurements', 'valid_measurements', 'filtered_count', 'num_paths', 'num_nodes',
+                'num_edges'):
+        assert incremental[key] == full[key], key
+
+    full_checkpoint = load_checkpoint(full['base_path'])
+    incremental_checkpoint = load_checkpoint(incremental['base_path'])
+    assert incremental_checkpoint['last_ts'] == full_checkpoint['last_ts']
+    assert incremental_checkpoint['path_to_nodes'] == full_checkpoint['path_to_nodes']
+    assert set(map(frozenset, incremental_checkpoint['edges'])) == set(map(frozenset, full_checkpoint['edges']))
+    assert incremental_checkpoint['latency_state'].to_dict() == full_checkpoint['latency_state'].to_dict()
+
+    full_series = path_series(load_path_store(os.path.join(full['base_path'], 'paths', 'store')))
+    incremental_series = path_series(load_path_store(os.path.join(incremental['base_path'], 'paths', 'store')))
+    assert sorted(incremental_series) == sorted(full_series)
+    for path_id, (ts, rtt) in full_series.items():
+        np.testing.assert_array_equal(incremental_series[path_id][0], ts)
+        np.testing.assert_array_equal(incremental_series[path_id][1], rtt)
+
+    assert _timeseries_files(incremental['base_path']) == _timeseries_files(full['base_path'])
+
+
+def test_unchanged_source_is_not_reprocessed(tmp_path, synthetic):
+    filepath = tmp_path / 'measure.json'
+    write_traceroute_file(filepath, synthetic['measurements'])
+
+    first = extract(filepath, tmp_path / 'analysis', synthetic, incremental=True)
+    second = extract(filepath, tmp_path / 'analysis', synthetic, incremental=True)
+
+    assert second['files_created'] == {}
+    assert second['total_measurements'] == first['total_measurements']
+    assert second['valid_measurements'] == first['valid_measurements']
+
+
+def test_missing_ts_counted_once(tmp_path, synthetic):
+    measurements = list(synthetic['measurements'])
+    for idx in (10, 50, 120):
+        measurements[idx] = {**measurements[idx], 'ts': None}
+    filepath = tmp_path / 'measure.json'
+
+    write_traceroute_file(filepath, measurements)
+    full = extract(filepath, tmp_path / 'full', synthetic)
+
+    for end in (250, 320, len(measurements)):
+        write_traceroute_file(filepath, measurements[:end])
+        incremental = extract(filepath, tmp_path / 'incremental', synthetic, incremental=True)
+
+    assert incremental['total_measurements'] == full['total_measurements'] == len(measurements)
+    assert incremental['filtered_count'] == full['filtered_count']
+    assert load_checkpoint(incremental['base_path'])['filtered_count'] == full['filtered_count']
+
+
+def test_full_run_clears_previous_path_outputs(tmp_path, synthetic):
+    filepath = tmp_path / 'measure.json'
+    write_traceroute_file(filepath, synthetic['measurements'])
+    first = extract(filepath, tmp_path / 'analysis', synthetic, export_json=True)
+    expected = _timeseries_files(first['base_path'])
+
+    # Saídas de uma execução anterior com mais caminhos
+    paths_dir = os.path.join(first['base_path'], 'paths')
+    for name in ('99_timeseries.txt', '99.json'):
+        with open(os.path.join(paths_dir, name), 'w', encoding='utf-8') as f:
+            f.write('stale\n')
+
+    second = extract(filepath, tmp_path / 'analysis', synthetic, export_json=True)
+    assert not os.path.exists(os.path.join(paths_dir, '99_timeseries.txt'))
+    assert not os.path.exists(os.path.join(paths_dir, '99.json'))
+    assert _timeseries_files(second['base_path']) == expected
@@ -0,0 +1,16 @@
+import numpy as np
+
+from util import hop_counts_from_path_to_nodes, label_routes, path_ids_from_columns
+
+
+def test_hop_counts_follow_matrix_columns():
+    # Caminho 1 sem amostras de RTT: não tem coluna latency_2 na matriz
+    path_to_nodes = {0: ['a', 'b', 'c', 'd'], 1: ['a', 'x'], 2: ['a', 'y', 'z']}
+    columns = ['latency_1', 'latency_3']
+
+    assert path_ids_from_columns(columns) == [0, 2]
+    hop_counts = hop_counts_from_path_to_nodes(path_to_nodes, columns)
+    np.testing.assert_array_equal(hop_counts, [3, 2])
+
+    labels = label_routes([[5.0, 5.0], [5.0, 7.0]], tie_break='fewest_hops', hop_counts=hop_counts)
+    np.testing.assert_array_equal(labels, [2, 1])
@@ -0,0 +1,37 @@
+import numpy as np
+
+from path_store import COLUMNS, PathStoreWriter, compact_path_store, list_segments, load_path_store
+
+
+def _write(store_dir, measurements, compact):
+    with PathStoreWriter(store_dir, segment_rows=64, compact=compact) as store:
+        for idx, entry in enumerate(measurements):
+            store.write(idx % 3, entry)
+
+
+def test_compaction_keeps_columns_and_restores_mmap(tmp_path, synthetic):
+    measurements = synthetic['measurements']
+    store_dir = str(tmp_path / 'store')
+    _write(store_dir, measurements[:250], compact=False)
+    _write(store_dir, measurements[250:], compact=False)
+    assert len(list_segments(store_dir)) > 2
+
+    before = load_path_store(store_dir)
+    assert compact_path_store(store_dir) > 2
+    after = load_path_store(store_dir)
+
+    assert len(list_segments(store_dir)) == 1
+    for name in COLUMNS:
+        assert isinstance(getattr(after, name), np.memmap), name
+        np.testing.assert_array_equal(getattr(after, name), getattr(before, name))
+    assert after.paths == before.paths and after.ips == before.ips
+
+
+def test_writer_compacts_on_close(tmp_path, synthetic):
+    measurements = synthetic['measurements']
+    store_dir = str(tmp_path / 'store')
+    _write(store_dir, measurements[:250], compact=True)
+    _write(store_dir, measurements[250:], compact=True)
+
+    assert len(list_segments(store_dir)) == 1
+    assert len(load_path_store(store_dir).ts) == len(measurements)
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from route_selector import RouteSelector, load_selector_model, train_selector_model
+
+
+@pytest.fixture
+def selector(tmp_path):
+    # Caminho 1 sem amostras de RTT: a matriz só tem latency_1 e latency_3
+    rng = np.random.default_rng(3)
+    latencies = rng.uniform(5.0, 15.0, size=(200, 2))
+    df = pd.DataFrame(latencies, columns=['latency_1', 'latency_3'])
+    df.insert(0, 'timestamp', pd.date_range('2024-06-10', periods=len(df), freq='10min'))
+    latency_filepath = str(tmp_path / 'routes_latency.csv')
+    df.to_csv(latency_filepath, index=False)
+
+    model_filepath = str(tmp_path / 'selector.joblib')
+    train_selector_model(latency_filepath, model_filepath)
+    model, path_ids = load_selector_model(model_filepath)
+    assert path_ids == [0, 2]
+
+    path_to_nodes = {0: ['a', 'b', 'z'], 1: ['a', 'c', 'z'], 2: ['a', 'd', 'z']}
+    selector = RouteSelector({'syn-pop': (model, path_to_nodes, path_ids)}).start()
+    yield selector
+    selector.stop()
+
+
+def test_labels_map_to_model_columns(selector):
+    # latency_3 (caminho 2) é o melhor no segundo vetor
+    assert selector.handle({'pair': 'syn-pop', 'latencies': [5.0, 14.0]}) == {'pathId': 0, 'nodes': ['a', 'b', 'z']}
+    assert selector.handle({'pair': 'syn-pop', 'latencies': [14.0, 5.0]}) == {'pathId': 2, 'nodes': ['a', 'd', 'z']}
+    assert selector.handle({'pair': 'syn-pop', 'batch': [[5.0, 14.0], [14.0, 5.0]]}) == {'pathIds': [0, 2]}
+
+
+def test_vector_length_must_match_model(selector):
+    with pytest.raises(ValueError):
+        selector.handle({'pair': 'syn-pop', 'latencies': [5.0, 14.0, 9.0]})
+    with pytest.raises(ValueError):
+        selector.handle({'pair': 'syn-pop', 'batch': [[5.0, 14.0, 9.0]]})
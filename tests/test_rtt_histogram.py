@@ -0,0 +1,32 @@
+import json
+
+import numpy as np
+
+from rtt_histogram import feature_names, histograms_on_grid, load_histograms
+
+
+def test_load_histograms_skips_entries_without_ts(tmp_path):
+    filepath = tmp_path / 'histograms.json'
+    entries = [
+        {'ts': 1000, 'val': {'7.00': 3, '6.50': 1}},
+        {'val': {'9.00': 2}},
+        {'ts': None, 'val': {'9.00': 2}},
+        {'ts': 'x', 'val': {'9.00': 2}},
+        {'ts': 1600.0, 'val': {'8.00': 'bad', '8.50': 4}},
+    ]
+    filepath.write_text(json.dumps(entries), encoding='utf-8')
+
+    table = load_histograms(str(filepath))
+    np.testing.assert_array_equal(table.ts, [1000, 1600])
+    np.testing.assert_array_equal(table.offsets, [0, 2, 3])
+    np.testing.assert_array_equal(table.values, [7.0, 6.5, 8.5])
+    np.testing.assert_array_equal(table.counts, [3, 1, 4])
+
+
+def test_histograms_on_empty_grid(tmp_path):
+    filepath = tmp_path / 'histograms.json'
+    filepath.write_text(json.dumps([{'ts': 1000, 'val': {'7.00': 3}}]), encoding='utf-8')
+
+    features, buckets = histograms_on_grid(load_histograms(str(filepath)), [])
+    assert features.shape == (0, len(feature_names()))
+    assert buckets.shape[0] == 0
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pytest
+
+from path_store import load_path_store, path_series
+from route_selector import RouteSelector
+from series_index import SeriesIndex, build_series_index, open_series_index
+
+
+@pytest.fixture(scope='module')
+def index_and_series(extracted, tmp_path_factory):
+    store_dir = os.path.join(extracted['base_path'], 'paths', 'store')
+    series = {path_id: (np.asarray(ts), np.asarray(rtt)) for path_id, (ts, rtt) in
+              path_series(load_path_store(store_dir)).items()}
+    # Blocos pequenos para que as consultas cruzem vários blocos
+    index_dir = build_series_index(store_dir, str(tmp_path_factory.mktemp('index')), block_size=8)
+    return SeriesIndex(index_dir), series
+
+
+def test_range_queries_match_brute_force(index_and_series):
+    index, series = index_and_series
+    all_ts = np.concatenate([ts for ts, _ in series.values()])
+    rng = np.random.default_rng(1)
+
+    for _ in range(200):
+        start, end = np.sort(rng.integers(all_ts.min() - 3600, all_ts.max() + 3600, size=2))
+        result = index.query(int(start), int(end))
+        for path_id, (ts, rtt) in series.items():
+            order = np.argsort(ts, kind='stable')
+            ts, rtt = ts[order], rtt[order]
+            inside = (ts >= start) & (ts <= end)
+            np.testing.assert_array_equal(result[path_id][0], ts[inside])
+            np.testing.assert_array_equal(result[path_id][1], rtt[inside])
+
+
+def test_latest_matches_brute_force(index_and_series):
+    index, series = index_and_series
+    all_ts = np.concatenate([ts for ts, _ in series.values()])
+
+    for at in np.linspace(all_ts.min() - 600, all_ts.max() + 600, 50).astype(np.int64):
+        latest = index.latest(int(at))
+        for col, path_id in enumerate(index.path_ids):
+            ts, rtt = series[path_id]
+            before = ts <= at
+            # Antes da primeira medição do caminho vale a primeira depois de at
+            expected = rtt[before][np.argmax(ts[before])] if before.any() else rtt[np.argmin(ts)]
+            assert latest[col] == expected
+
+
+def test_open_series_index_requires_store(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        open_series_index(str(tmp_path / 'missing'))
+    assert not os.path.exists(tmp_path / 'missing')
+
+
+def test_selector_at_request_uses_model_columns(index_and_series):
+    index, series = index_and_series
+
+    class RecordingModel:
+        # Guarda o vetor recebido e escolhe a primeira coluna
+        def predict(self, batch):
+            self.batch = np.asarray(batch)
+            return np.ones(len(batch), dtype=int)
+
+    # Colunas do modelo fora da ordem do índice e com um caminho sem medições
+    model_path_ids = [index.path_ids[-1], 999, index.path_ids[0]]
+    model = RecordingModel()
+    selector = RouteSelector({'syn-pop': (model, {}, model_path_ids)}, indexes={'syn-pop': index}).start()
+    try:
+        at = int(max(ts.max() for ts, _ in series.values()))
+        response = selector.handle({'pair': 'syn-pop', 'at': at})
+    finally:
+        selector.stop()
+
+    assert response['pathId'] == model_path_ids[0]
+    expected = index.latest(at)
+    np.testing.assert_array_equal(model.batch[0][[0, 2]], expected[[len(index.path_ids) - 1, 0]])
+    assert np.isnan(model.batch[0][1])
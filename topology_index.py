@@ -0,0 +1,323 @@
+import argparse
+import os
+
+import networkx as nx
+import numpy as np
+
+from network_extractor import load_checkpoint
+from path_store import load_path_store
+
+
+class TopologyIndex:
+    """
+    Topologia unificada de todos os pares, com IPs internados (um id
+    inteiro por IP) e arestas não direcionadas anotadas por par: número de
+    medições que atravessaram a aresta, primeira e última vez em que foi
+    vista (timestamps; None para topologias sem medições, como as manuais).
+
+    Uso:
+        index = build_topology_index('analysis')
+        index.pairs_for_edge('170.79.214.90', '170.79.213.197')
+        index.save('analysis/topology/topology_index.npz')
+    """
+
+    def __init__(self):
+        self.ips = []
+        self.pairs = []
+        self._ip_ids = {}
+        self._pair_ids = {}
+        # (id_a, id_b) com id_a < id_b -> {id do par: [contagem, primeira, última]}
+        self._edges = {}
+        self._node_edges = {}
+
+    def intern_ip(self, ip):
+        """
+        Returns:
+            Id inteiro do IP (criado na primeira vez)
+        """
+        ip_id = self._ip_ids.get(ip)
+        if ip_id is None:
+            ip_id = self._ip_ids[ip] = len(self.ips)
+            self.ips.append(ip)
+        return ip_id
+
+    def _pair_id(self, pair):
+        pair_id = self._pair_ids.get(pair)
+        if pair_id is None:
+            pair_id = self._pair_ids[pair] = len(self.pairs)
+            self.pairs.append(pair)
+        return pair_id
+
+    def _edge_key(self, a, b):
+        a, b = self.intern_ip(a), self.intern_ip(b)
+        return (a, b) if a < b else (b, a)
+
+    def add_edge(self, pair, a, b, count=0, first_seen=None, last_seen=None):
+        """
+        Registra que o par observou a aresta a-b (acumula com registros anteriores).
+        """
+        if a == b:
+            return
+        key = self._edge_key(a, b)
+        if key not in self._edges:
+            self._edges[key] = {}
+            self._node_edges.setdefault(key[0], []).append(key)
+            self._node_edges.setdefault(key[1], []).append(key)
+
+        entry = self._edges[key].setdefault(self._pair_id(pair), [0, None, None])
+        entry[0] += count
+        if first_seen is not None:
+            entry[1] = first_seen if entry[1] is None else min(entry[1], first_seen)
+        if last_seen is not None:
+            entry[2] = last_seen if entry[2] is None else max(entry[2], last_seen)
+
+    def add_path(self, pair, nodes, count=0, first_seen=None, last_seen=None):
+        """
+        Registra todas as arestas de um caminho (lista ordenada de IPs).
+        """
+        for a, b in zip(nodes[:-1], nodes[1:]):
+            self.add_edge(pair, a, b, count, first_seen, last_seen)
+
+    def add_pair_dir(self, pair, base_path):
+        """
+        Adiciona um par processado por network_extractor. Com o
+        armazenamento colunar, cada caminho contribui com o número de
+        medições e o intervalo em que foi visto; sem ele, usa os caminhos
+        do checkpoint ou, em último caso, as arestas do GML.
+
+        Returns:
+            True se algo foi adicionado
+        """
+        store_dir = os.path.join(base_path, 'paths', 'store')
+        if os.path.isdir(store_dir):
+            store = load_path_store(store_dir)
+            ts = np.asarray(store.ts)
+            path_ids = np.asarray(store.path_id)
+            if len(ts):
+                order = np.argsort(path_ids, kind='stable')
+                unique_ids, starts, counts = np.unique(path_ids[order], return_index=True, return_counts=True)
+                sorted_ts = ts[order]
+                first = np.minimum.reduceat(sorted_ts, starts)
+                last = np.maximum.reduceat(sorted_ts, starts)
+                for path_id, count, first_seen, last_seen in zip(unique_ids.tolist(), counts.tolist(),
+                                                                 first.tolist(), last.tolist()):
+                    nodes = [store.ips[idx] for idx in store.paths[path_id]]
+                    self.add_path(pair, nodes, count, first_seen, last_seen)
+                return True
+
+        checkpoint = load_checkpoint(base_path)
+        if checkpoint is not None:
+            for nodes in checkpoint['path_to_nodes'].values():
+                self.add_path(pair, nodes)
+            return True
+
+        gml_path = os.path.join(base_path, 'network_topology.gml')
+        if os.path.exists(gml_path):
+            self.add_gml(pair, gml_path)
+            return True
+        return False
+
+    def add_gml(self, pair, filepath):
+        """
+        Adiciona as arestas de um GML (ex: analysis/topology/manual/<par>/topologia.gml).
+        """
+        G = nx.read_gml(filepath)
+        for a, b in G.edges():
+            self.add_edge(pair, str(a), str(b))
+
+    def __len__(self):
+        return len(self._edges)
+
+    def _annotations(self, key):
+        return {
+            self.pairs[pair_id]: {'count': count, 'first_seen': first, 'last_seen': last}
+            for pair_id, (count, first, last) in sorted(self._edges.get(key, {}).items())
+        }
+
+    def pairs_for_edge(self, a, b):
+        """
+        Pares cujos caminhos atravessam a aresta a-b.
+
+        Returns:
+            Dicionário {par: {count, first_seen, last_seen}} (vazio se a
+            aresta não existe)
+        """
+        a_id, b_id = self._ip_ids.get(a), self._ip_ids.get(b)
+        if a_id is None or b_id is None:
+            return {}
+        return self._annotations((a_id, b_id) if a_id < b_id else (b_id, a_id))
+
+    def pairs_for_node(self, ip):
+        """
+        Returns:
+            Conjunto dos pares cujos caminhos passam pelo IP
+        """
+        ip_id = self._ip_ids.get(ip)
+        return {self.pairs[pair_id] for key in self._node_edges.get(ip_id, [])
+                for pair_id in self._edges[key]}
+
+    def affected_pairs(self, edges):
+        """
+        Pares afetados pela degradação de um conjunto de arestas.
+
+        Args:
+            edges: Lista de tuplas (ip_a, ip_b)
+
+        Returns:
+            Dicionário {par: número de medições nas arestas}
+        """
+        affected = {}
+        for a, b in edges:
+            for pair, annotation in self.pairs_for_edge(a, b).items():
+                affected[pair] = affected.get(pair, 0) + annotation['count']
+        return affected
+
+    def edges_for_pair(self, pair):
+        """
+        Returns:
+            Lista de arestas (ip_a, ip_b) observadas pelo par
+        """
+        pair_id = self._pair_ids.get(pair)
+        return [(self.ips[a], self.ips[b]) for (a, b), by_pair in self._edges.items() if pair_id in by_pair]
+
+    def edges(self):
+        """
+        Itera sobre (ip_a, ip_b, {par: anotações}).
+        """
+        for key in self._edges:
+            yield self.ips[key[0]], self.ips[key[1]], self._annotations(key)
+
+    def to_graph(self):
+        """
+        Grafo NetworkX unificado. Cada aresta tem os pares que a observaram
+        (separados por vírgula, compatível com GML), o total de medições e
+        o intervalo em que foi vista.
+        """
+        G = nx.Graph()
+        for a, b, annotations in self.edges():
+            attributes = {'pairs': ','.join(annotations),
+                          'count': sum(item['count'] for item in annotations.values())}
+            first = [item['first_seen'] for item in annotations.values() if item['first_seen'] is not None]
+            last = [item['last_seen'] for item in annotations.values() if item['last_seen'] is not None]
+            if first:
+                attributes['first_seen'] = min(first)
+                attributes['last_seen'] = max(last)
+            G.add_edge(a, b, **attributes)
+        return G
+
+    def save(self, filepath):
+        """
+        Salva o índice em .npz (uma linha por aresta e par; -1 para
+        timestamps desconhecidos).
+
+        Returns:
+            Caminho do arquivo criado
+        """
+        rows = [(a, b, pair_id, count, -1 if first is None else first, -1 if last is None else last)
+                for (a, b), by_pair in self._edges.items()
+                for pair_id, (count, first, last) in by_pair.items()]
+        table = np.array(rows, dtype=np.int64).reshape(-1, 6)
+
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        np.savez(filepath, ips=np.array(self.ips, dtype=str), pairs=np.array(self.pairs, dtype=str),
+                 edge_a=table[:, 0], edge_b=table[:, 1], pair_id=table[:, 2], count=table[:, 3],
+                 first_seen=table[:, 4], last_seen=table[:, 5])
+        return filepath
+
+    @classmethod
+    def load(cls, filepath):
+        """
+        Carrega um índice salvo por save.
+        """
+        index = cls()
+        with np.load(filepath) as data:
+            for ip in data['ips'].tolist():
+                index.intern_ip(ip)
+            for pair in data['pairs'].tolist():
+                index._pair_id(pair)
+            for a, b, pair_id, count, first, last in zip(
+                    data['edge_a'].tolist(), data['edge_b'].tolist(), data['pair_id'].tolist(),
+                    data['count'].tolist(), data['first_seen'].tolist(), data['last_seen'].tolist()):
+                index.add_edge(index.pairs[pair_id], index.ips[a], index.ips[b], count,
+                               None if first < 0 else first, None if last < 0 else last)
+        return index
+
+
+def discover_pair_dirs(root='analysis'):
+    """
+    Encontra as saídas de network_extractor (analysis/<origem>/<origem>-<destino>).
+
+    Returns:
+        Lista ordenada de tuplas (nome do par, diretório)
+    """
+    found = []
+    if not os.path.isdir(root):
+        return found
+    for origin in sorted(os.listdir(root)):
+        origin_dir = os.path.join(root, origin)
+        if origin == 'topology' or not os.path.isdir(origin_dir):
+            continue
+        for name in sorted(os.listdir(origin_dir)):
+            base_path = os.path.join(origin_dir, name)
+            if name.startswith(f'{origin}-') and os.path.isdir(base_path):
+                found.append((name, base_path))
+    return found
+
+
+def build_topology_index(root='analysis', manual_dir=None):
+    """
+    Monta o índice unificado a partir das saídas de todos os pares.
+
+    Args:
+        root: Diretório raiz das análises
+        manual_dir: Diretório com as topologias manuais (<par>/topologia.gml);
+                    seus pares recebem o sufixo ':manual'
+
+    Returns:
+        TopologyIndex
+    """
+    index = TopologyIndex()
+    for pair, base_path in discover_pair_dirs(root):
+        index.add_pair_dir(pair, base_path)
+
+    if manual_dir and os.path.isdir(manual_dir):
+        for pair in sorted(os.listdir(manual_dir)):
+            gml_path = os.path.join(manual_dir, pair, 'topologia.gml')
+            if os.path.exists(gml_path):
+                index.add_gml(f'{pair}:manual', gml_path)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Topologia unificada de todos os pares origem/destino.')
+    parser.add_argument('--root', default='analysis', help='Diretório raiz das análises')
+    parser.add_argument('--manual', default=None,
+                        help='Inclui as topologias manuais (ex: analysis/topology/manual)')
+    parser.add_argument('--output', default='analysis/topology', help='Diretório de saída')
+    parser.add_argument('--edge', nargs=2, metavar=('IP_A', 'IP_B'), action='append', default=[],
+                        help='Lista os pares que atravessam a aresta (pode repetir)')
+    args = parser.parse_args()
+
+    index_path = os.path.join(args.output, 'topology_index.npz')
+    if args.edge and os.path.exists(index_path):
+        index = TopologyIndex.load(index_path)
+    else:
+        print(f"📂 Lendo pares em: {args.root}")
+        index = build_topology_index(args.root, args.manual)
+        index.save(index_path)
+        gml_path = os.path.join(args.output, 'network_topology.gml')
+        nx.write_gml(index.to_graph(), gml_path)
+        print(f"✓ {len(index.pairs)} pares, {len(index.ips)} IPs, {len(index)} arestas")
+        print(f"✓ Índice salvo em: {index_path}")
+        print(f"✓ Grafo unificado salvo em: {gml_path}")
+
+    for a, b in args.edge:
+        annotations = index.pairs_for_edge(a, b)
+        print(f"\n🔎 {a} — {b}: {len(annotations)} pares")
+        for pair, item in annotations.items():
+            seen = f", vista de {item['first_seen']} a {item['last_seen']}" if item['first_seen'] is not None else ''
+            print(f"  • {pair}: {item['count']} medições{seen}")
+
+
+if __name__ == "__main__":
+    main()
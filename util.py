@@ -1,76 +1,132 @@
-from datetime import datetime
+import json
 import numpy as np
 import os
 import pandas as pd
 
-def generate_route_labels(filepath):
+from build_table import load_latency_data_from_txt
+from dataset_cache import cached_series
+from sampling_cadence import analyze_cadence, inter_sample_gaps, save_cadence_report
+
+TIE_BREAKS = ('first', 'last', 'fewest_hops')
+
+def path_ids_from_columns(columns):
+    # Colunas da matriz alinhada -> path_ids, na ordem das colunas (caminhos sem
+    # amostras de RTT não têm coluna): latency_<path_id + 1> (interpolation.py)
+    # ou path_<path_id> (build_table.py)
+    path_ids = []
+    for column in columns:
+        prefix, _, number = str(column).rpartition('_')
+        if prefix == 'latency' and number.isdigit():
+            path_ids.append(int(number) - 1)
+        elif prefix == 'path' and number.isdigit():
+            path_ids.append(int(number))
+        else:
+            raise ValueError(f"Coluna sem path_id (latency_<n> ou path_<n>): {column}")
+    return path_ids
+
+def hop_counts_from_path_to_nodes(path_to_nodes, columns):
+    # Número de saltos do caminho de cada coluna da matriz (latency_<path_id + 1>)
+    return np.array([len(path_to_nodes[path_id]) - 1 for path_id in path_ids_from_columns(columns)], dtype=float)
+
+def load_path_to_nodes(checkpoint_filepath):
+    with open(checkpoint_filepath, 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+
+    return {int(path_id): nodes for path_id, nodes in checkpoint['path_to_nodes'].items()}
+
+def label_routes(latencies, tolerance=0.0, tie_break='first', hop_counts=None, hop_weight=0.0, fill_label=0):
+    # Rotula todas as linhas de uma vez com o melhor caminho (1-based: path_1 = 1, ...)
+    # - score = latência + hop_weight * saltos (multiobjetivo quando hop_weight > 0)
+    # - caminhos até `tolerance` ms acima do melhor score contam como empatados
+    # - tie_break escolhe entre os empatados: 'first', 'last' ou 'fewest_hops'
+    # - linhas sem nenhuma latência recebem fill_label
+    if tie_break not in TIE_BREAKS:
+        raise ValueError(f"tie_break deve ser um de {TIE_BREAKS}: {tie_break}")
+
+    scores = np.asarray(latencies, dtype=float)
+    num_paths = scores.shape[1]
+
+    if hop_counts is not None:
+        hop_counts = np.asarray(hop_counts, dtype=float)
+        if len(hop_counts) != num_paths:
+            raise ValueError(f"hop_counts tem {len(hop_counts)} caminhos, a matriz tem {num_paths}")
+        if hop_weight:
+            scores = scores + hop_weight * hop_counts
+    elif tie_break == 'fewest_hops' or hop_weight:
+        raise ValueError("hop_counts é obrigatório para tie_break='fewest_hops' ou hop_weight")
+
+    valid = ~np.isnan(scores)
+    masked = np.where(valid, scores, np.inf)
+    best = masked.min(axis=1)
+    candidates = valid & (masked <= best[:, None] + tolerance)
+
+    if tie_break == 'first':
+        min_idx = candidates.argmax(axis=1)
+    elif tie_break == 'last':
+        min_idx = num_paths - 1 - candidates[:, ::-1].argmax(axis=1)
+    else:
+        min_idx = np.where(candidates, hop_counts, np.inf).argmin(axis=1)
+
+    labels = min_idx + 1
+    labels[~valid.any(axis=1)] = fill_label
+
+    return labels
+
+def label_routes_by_policy(latencies, policies, **common):
+    # Rotula a mesma matriz com várias políticas: {nome: kwargs de label_routes}
+    return {name: label_routes(latencies, **common, **kwargs) for name, kwargs in policies.items()}
+
+def generate_route_labels(filepath, tolerance=0.0, tie_break='first', path_to_nodes=None, hop_weight=0.0,
+                          output_filepath=None):
     df = pd.read_csv(filepath)
     rows = df.iloc[:, 1:].values
 
-    min_path_ids = []
-    for row_latencies in rows:
-        # Encontra o índice do menor valor (tratando nan)
-        # Converte para 1-based: path_1 = 1, path_2 = 2...
-        min_idx = np.nanargmin(row_latencies)
-        min_path_ids.append(int(min_idx + 1))
+    hop_counts = hop_counts_from_path_to_nodes(path_to_nodes, df.columns[1:]) if path_to_nodes else None
+    min_path_ids = label_routes(rows, tolerance=tolerance, tie_break=tie_break,
+                                hop_counts=hop_counts, hop_weight=hop_weight)
 
-    print(min_path_ids[:20])
+    print(min_path_ids[:20].tolist())
     
-    output_filepath = filepath.replace('_latency.csv', '_labels.txt')
+    if output_filepath is None:
+        output_filepath = filepath.replace('_latency.csv', '_labels.txt')
 
-    with open(output_filepath, 'w') as f:
-        for path_id in min_path_ids:
-            f.write(f"{path_id}\n")
+    np.savetxt(output_filepath, min_path_ids, fmt='%d')
 
-def interval_counter(root_dir):
+    return min_path_ids
+
+def interval_counter(root_dir, outage_threshold=3600):
     timeseries_dir = f'{root_dir}/paths/timeseries'
     out_dir = f'{root_dir}/paths/timeseries/intervals'
+    os.makedirs(out_dir, exist_ok=True)
 
-    files = [f for f in os.listdir(timeseries_dir) if os.path.isfile(os.path.join(timeseries_dir, f))]
-
-    for f in files:
-        filepath = os.path.join(timeseries_dir, f)
-        out_filepath = os.path.join(out_dir, f)
-
-        with open(out_filepath, 'w', encoding='utf-8') as fout:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                for line in f:
-                    next_line = f.readline()
-
-                    timestamp1 = line.split(',')[0]
-                    timestamp2 = next_line.split(',')[0]
+    latency_by_path = cached_series(load_latency_data_from_txt, timeseries_dir)
+    timestamps_by_path = {path_id: ts for path_id, (ts, _) in latency_by_path.items()}
 
-                    if(timestamp2 != ''):
-                        dt_object1 = datetime.fromtimestamp(int(timestamp1))
-                        dt_object2 = datetime.fromtimestamp(int(timestamp2))
+    # Intervalos (em segundos) entre todas as amostras consecutivas de cada caminho
+    for path_id, timestamps in timestamps_by_path.items():
+        out_filepath = os.path.join(out_dir, f'{path_id}_timeintervals.txt')
+        np.savetxt(out_filepath, inter_sample_gaps(timestamps), fmt='%d')
 
-                        time_difference = dt_object2 - dt_object1
+    report = analyze_cadence(timestamps_by_path, outage_threshold)
+    return save_cadence_report(report, os.path.join(out_dir, 'cadence.json'))
 
-                        fout.write(f'{time_difference}\n')
-
-def time_aggregation():
-    ids = [0, 1, 2]
-
-    timestamps = []
-    out_filepath = 'timestamps.txt'
+def time_aggregation(root_dir):
+    timeseries_dir = f'{root_dir}/paths/timeseries'
+    out_filepath = f'{root_dir}/paths/timeseries/intervals/all_timestamps.txt'
 
-    for pathid in ids:
-        with open(out_filepath, 'w') as fout:
-            filepath = f'{pathid}_timeseries.txt'
+    latency_by_path = cached_series(load_latency_data_from_txt, timeseries_dir) if os.path.isdir(timeseries_dir) else {}
+    if not latency_by_path:
+        print(f"❌ Nenhum dado de latência encontrado em {timeseries_dir}")
+        return None
+    os.makedirs(os.path.dirname(out_filepath), exist_ok=True)
 
-            with open(filepath, 'r') as f:
-                for line in f:
-                    if line == 'timestamp,latency_ms\n':
-                        continue
-                    
-                    timestamp1 = line.split(',')[0]
-                    timestamps.append(f'{timestamp1},{pathid}')
-            
-            timestamps.sort()
-            tuple(timestamps)
+    # Junta os timestamps de todos os caminhos e ordena uma única vez
+    timestamps = np.concatenate([ts for ts, _ in latency_by_path.values()])
+    path_ids = np.concatenate([np.full(len(ts), path_id) for path_id, (ts, _) in latency_by_path.items()])
+    order = np.lexsort((path_ids, timestamps))
 
-            for t in timestamps:
-                fout.write(f'{t}\n')
+    np.savetxt(out_filepath, np.column_stack((timestamps[order], path_ids[order])), fmt='%d', delimiter=',')
+    return out_filepath
 
 def main():
     # origin = 'rj'
@@ -79,7 +135,7 @@ def main():
     # root_dir = f'analysis/{origin}/{origin}-{destination}'
 
     # interval_counter(root_dir)
-    # time_aggregation()
+    # time_aggregation(root_dir)
 
     filepath = 'analysis/rj/rj-es/ml/routes_latency.csv'
     generate_route_labels(filepath)
@@ -0,0 +1,228 @@
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+
+from dataset_cache import read_csv_cached
+from util import label_routes
+
+
+def load_routes_dataset(latency_filepath):
+    """
+    Carrega a matriz alinhada de latências (routes_latency.csv) e gera os
+    rótulos do oráculo (menor latência) com util.label_routes. O CSV
+    inalterado é lido do cache em disco.
+
+    Args:
+        latency_filepath: Caminho do routes_latency.csv
+
+    Returns:
+        Tupla (timestamps, latências, rótulos do oráculo)
+    """
+    df = read_csv_cached(latency_filepath)
+    latencies = df.iloc[:, 1:].to_numpy(dtype=float)
+    return df.iloc[:, 0].to_numpy(), latencies, label_routes(latencies)
+
+
+def walk_forward_splits(n_samples, initial_train, horizon, step=None, window=None):
+    """
+    Gera as janelas de avaliação em ordem temporal: treina nas linhas
+    passadas e testa nas `horizon` linhas seguintes.
+
+    Args:
+        n_samples: Número de linhas
+        initial_train: Tamanho do primeiro conjunto de treino
+        horizon: Número de linhas previstas por janela
+        step: Avanço entre janelas (padrão: horizon)
+        window: Tamanho fixo do treino (janela deslizante); None = expansível
+
+    Returns:
+        Lista de tuplas (índices de treino, índices de teste)
+    """
+    step = horizon if step is None else step
+    splits = []
+
+    for train_end in range(initial_train, n_samples, step):
+        train_start = 0 if window is None else max(0, train_end - window)
+        test_end = min(train_end + horizon, n_samples)
+        splits.append((np.arange(train_start, train_end), np.arange(train_end, test_end)))
+
+    return splits
+
+
+def latency_penalty(latencies, labels, oracle_labels):
+    """
+    Latência extra (ms) de cada escolha em relação à escolha do oráculo.
+
+    Args:
+        latencies: Matriz de latências (linhas × caminhos)
+        labels: Caminhos escolhidos (1-based)
+        oracle_labels: Caminhos do oráculo (1-based; 0 = sem dados)
+
+    Returns:
+        Array de penalidades (NaN onde não há latência para comparar)
+    """
+    rows = np.arange(len(labels))
+    valid = (labels > 0) & (oracle_labels > 0)
+
+    chosen = np.full(len(labels), np.nan)
+    best = np.full(len(labels), np.nan)
+    chosen[valid] = latencies[rows[valid], labels[valid] - 1]
+    best[valid] = latencies[rows[valid], oracle_labels[valid] - 1]
+
+    return chosen - best
+
+
+def _fit_predict(model, X_train, y_train, X_test):
+    """
+    Ajusta o modelo e prevê; com uma única classe no treino (comum em
+    janelas curtas), repete essa classe.
+    """
+    classes = np.unique(y_train)
+    if len(classes) == 1:
+        return model, np.full(len(X_test), classes[0])
+
+    model.fit(X_train, y_train)
+    return model, model.predict(X_test)
+
+
+def _window_metrics(window_idx, train_idx, test_idx, y_pred, y, latencies, timestamps):
+    """
+    Calcula as métricas de uma janela.
+    """
+    penalty = latency_penalty(latencies[test_idx], y_pred, y[test_idx])
+
+    return {
+        'window': window_idx,
+        'train_size': len(train_idx),
+        'test_size': len(test_idx),
+        'test_start': timestamps[test_idx[0]],
+        'test_end': timestamps[test_idx[-1]],
+        'accuracy': accuracy_score(y[test_idx], y_pred),
+        'penalty_mean_ms': np.nanmean(penalty) if np.any(~np.isnan(penalty)) else np.nan,
+        'penalty_p95_ms': np.nanpercentile(penalty, 95) if np.any(~np.isnan(penalty)) else np.nan,
+        'penalty_max_ms': np.nanmax(penalty) if np.any(~np.isnan(penalty)) else np.nan,
+    }
+
+
+def _evaluate_window(estimator, window_idx, train_idx, test_idx, X, y, latencies, timestamps):
+    _, y_pred = _fit_predict(clone(estimator), X[train_idx], y[train_idx], X[test_idx])
+    return _window_metrics(window_idx, train_idx, test_idx, y_pred, y, latencies, timestamps)
+
+
+def supports_warm_start(estimator):
+    """
+    Indica se o estimador aceita warm_start (ex: florestas, regressão logística).
+    """
+    return 'warm_start' in estimator.get_params()
+
+
+def walk_forward_evaluate(estimator, X, y, latencies=None, timestamps=None, initial_train=288,
+                          horizon=144, step=None, window=None, warm_start=False,
+                          trees_per_window=10, n_jobs=-1):
+    """
+    Avaliação walk-forward de um modelo de seleção de rota: para cada
+    janela, treina apenas com linhas passadas e prevê o horizonte seguinte.
+
+    Sem warm_start, as janelas são independentes e rodam em paralelo.
+    Com warm_start (e um estimador que o suporte), as janelas rodam em
+    sequência reaproveitando o modelo anterior: ensembles ganham
+    trees_per_window árvores por janela em vez de serem refeitos.
+
+    Args:
+        estimator: Classificador scikit-learn
+        X: Atributos (linhas em ordem temporal)
+        y: Rótulos do oráculo (util.label_routes)
+        latencies: Matriz de latências para a penalidade (padrão: X)
+        timestamps: Rótulo temporal das linhas (padrão: índice)
+        initial_train: Linhas do primeiro treino (padrão: 2 dias em 10 min)
+        horizon: Linhas previstas por janela (padrão: 1 dia em 10 min)
+        step: Avanço entre janelas (padrão: horizon)
+        window: Tamanho da janela deslizante (None = expansível)
+        warm_start: Reaproveita o modelo entre janelas quando possível
+        trees_per_window: Árvores adicionadas por janela em ensembles
+        n_jobs: Processos usados sem warm_start (-1 = todos os núcleos)
+
+    Returns:
+        DataFrame com acurácia e penalidade de latência (ms) por janela
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y)
+    latencies = X if latencies is None else np.asarray(latencies, dtype=float)
+    timestamps = np.arange(len(X)) if timestamps is None else np.asarray(timestamps)
+
+    splits = walk_forward_splits(len(X), initial_train, horizon, step, window)
+
+    if not (warm_start and supports_warm_start(estimator)):
+        rows = Parallel(n_jobs=n_jobs)(
+            delayed(_evaluate_window)(estimator, idx, train_idx, test_idx, X, y, latencies, timestamps)
+            for idx, (train_idx, test_idx) in enumerate(splits)
+        )
+        return pd.DataFrame(rows)
+
+    rows = []
+    model = None
+    model_classes = None
+    for idx, (train_idx, test_idx) in enumerate(splits):
+        classes = np.unique(y[train_idx])
+
+        # Recomeça do zero se o conjunto de classes mudou (árvores antigas
+        # não conhecem as classes novas)
+        if model is None or not np.array_equal(classes, model_classes):
+            model = clone(estimator).set_params(warm_start=True)
+        elif 'n_estimators' in model.get_params():
+            model.set_params(n_estimators=model.get_params()['n_estimators'] + trees_per_window)
+
+        model, y_pred = _fit_predict(model, X[train_idx], y[train_idx], X[test_idx])
+        if len(classes) > 1:
+            model_classes = classes
+
+        rows.append(_window_metrics(idx, train_idx, test_idx, y_pred, y, latencies, timestamps))
+
+    return pd.DataFrame(rows)
+
+
+def summarize_walk_forward(results):
+    """
+    Resume as janelas ponderando pelo tamanho de cada horizonte.
+
+    Returns:
+        Dicionário com número de janelas, acurácia média e penalidades médias
+    """
+    weights = results['test_size'].to_numpy(dtype=float)
+    penalty = results['penalty_mean_ms'].to_numpy(dtype=float)
+    has_penalty = ~np.isnan(penalty)
+
+    return {
+        'windows': len(results),
+        'accuracy': float(np.average(results['accuracy'], weights=weights)),
+        'penalty_mean_ms': (float(np.average(penalty[has_penalty], weights=weights[has_penalty]))
+                            if has_penalty.any() else np.nan),
+        'penalty_p95_ms': float(results['penalty_p95_ms'].mean()),
+        'penalty_max_ms': float(results['penalty_max_ms'].max()),
+    }
+
+
+def main():
+    latency_filepath = 'analysis/rj/rj-es/ml/routes_latency.csv'
+
+    print(f"📂 Carregando dados de: {latency_filepath}")
+    timestamps, latencies, labels = load_routes_dataset(latency_filepath)
+    print(f"✓ {latencies.shape[0]} linhas × {latencies.shape[1]} caminhos")
+
+    for warm_start in (False, True):
+        results = walk_forward_evaluate(RandomForestClassifier(n_estimators=50, random_state=0),
+                                        latencies, labels, timestamps=timestamps,
+                                        warm_start=warm_start)
+        summary = summarize_walk_forward(results)
+        print(f"\n📊 RandomForest (warm_start={warm_start})")
+        print(f"  Janelas: {summary['windows']}")
+        print(f"  Acurácia média: {summary['accuracy']:.3f}")
+        print(f"  Penalidade média: {summary['penalty_mean_ms']:.3f}ms "
+              f"(p95: {summary['penalty_p95_ms']:.3f}ms, máx: {summary['penalty_max_ms']:.3f}ms)")
+
+
+if __name__ == "__main__":
+    main()